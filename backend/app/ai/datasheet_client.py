@@ -7,12 +7,19 @@ import json
 import re
 from typing import Dict, Any, List, Optional
 
+from app.services.provider_health import ProviderUnavailableError, get_provider_guard
+from app.services.rate_limiter import PRIORITY_INTERACTIVE, estimate_prompt_tokens, get_rate_limiter
+
 try:
     from google import genai
     GEMINI_AVAILABLE = True
 except ImportError:
     GEMINI_AVAILABLE = False
 
+GEMINI_MODEL = "gemini-2.5-flash"
+# Typical response size, reserved against the token rate limit before the call
+GEMINI_EXPECTED_OUTPUT_TOKENS = 1024
+
 
 def _get_gemini_client():
     """Initialize and return Gemini client"""
@@ -90,11 +97,7 @@ def ask_datasheet_ai(
         
         if mode == "qa":
             prompt = _build_qa_prompt(context, question)
-            # New SDK API: use models.generate_content
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
+            response = _generate_content(client, prompt, operation=mode)
             
             # Parse response - new SDK returns response.text directly
             answer_text = response.text.strip()
@@ -126,11 +129,7 @@ def ask_datasheet_ai(
         
         elif mode == "suggestions":
             prompt = _build_suggestions_prompt(context)
-            # New SDK API: use models.generate_content
-            response = client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=prompt
-            )
+            response = _generate_content(client, prompt, operation=mode)
             
             suggestions_text = response.text.strip()
             
@@ -158,6 +157,10 @@ def ask_datasheet_ai(
         else:
             raise ValueError(f"Invalid mode: {mode}. Must be 'qa' or 'suggestions'")
     
+    except ProviderUnavailableError as e:
+        # Circuit open after repeated Gemini failures: answer locally without waiting on the API
+        print(f"Gemini unavailable: {e}")
+        return _fallback_response(mode, context=context, question=question)
     except RuntimeError as e:
         # RuntimeError indicates package missing, API key missing, or initialization failure
         error_msg = str(e)
@@ -186,6 +189,33 @@ def ask_datasheet_ai(
             return _fallback_response(mode, context=context, question=question)
 
 
+def _generate_content(client, prompt: str, operation: str = "generate"):
+    """
+    Call Gemini through the shared rate limiter in the interactive lane.
+    
+    The call is guarded by the Gemini circuit breaker (raising
+    ProviderUnavailableError while it is open) and hedged when slow.
+    """
+    limiter = get_rate_limiter("gemini")
+    estimated = estimate_prompt_tokens(prompt) + GEMINI_EXPECTED_OUTPUT_TOKENS
+    
+    def attempt():
+        reserved = limiter.acquire_sync(PRIORITY_INTERACTIVE, estimated)
+        response = None
+        try:
+            # New SDK API: use models.generate_content
+            response = client.models.generate_content(
+                model=GEMINI_MODEL,
+                contents=prompt
+            )
+        finally:
+            usage = getattr(response, "usage_metadata", None)
+            limiter.settle(reserved, getattr(usage, "total_token_count", None) if response is not None else 0)
+        return response
+    
+    return get_provider_guard("gemini").call_sync(operation, attempt, hedge=True)
+
+
 def _extract_citations_from_text(text: str, chunks: List[Dict]) -> List[Dict]:
     """Extract citations from answer text by finding page references"""
     citations = []
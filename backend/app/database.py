@@ -274,6 +274,115 @@ def ensure_user_profile_image_column():
             "Unable to ensure profile_image_url column on SQLite: %s", exc, exc_info=True
         )
 
+def ensure_project_revision_column():
+    """
+    Ensure projects table has revision column when running on SQLite.
+    This keeps local development databases in sync with the ORM model.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+
+    try:
+        with engine.begin() as conn:
+            existing_columns = {
+                row[1]
+                for row in conn.execute(text("PRAGMA table_info(projects)"))
+            }
+
+            if "revision" not in existing_columns:
+                conn.exec_driver_sql(
+                    "ALTER TABLE projects ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"
+                )
+                logger.info("✓ Added revision column to projects table (SQLite)")
+                print("✓ Added revision column to projects table (SQLite)", flush=True)
+    except Exception as exc:
+        logger.warning(
+            "Unable to ensure revision column on SQLite: %s", exc, exc_info=True
+        )
+
+def ensure_score_fingerprint_column():
+    """
+    Ensure scores table has input_fingerprint column when running on SQLite.
+    This keeps local development databases in sync with the ORM model.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+
+    try:
+        with engine.begin() as conn:
+            existing_columns = {
+                row[1]
+                for row in conn.execute(text("PRAGMA table_info(scores)"))
+            }
+
+            if "input_fingerprint" not in existing_columns:
+                conn.exec_driver_sql(
+                    "ALTER TABLE scores ADD COLUMN input_fingerprint VARCHAR(64)"
+                )
+                logger.info("✓ Added input_fingerprint column to scores table (SQLite)")
+                print("✓ Added input_fingerprint column to scores table (SQLite)", flush=True)
+    except Exception as exc:
+        logger.warning(
+            "Unable to ensure input_fingerprint column on SQLite: %s", exc, exc_info=True
+        )
+
+def ensure_job_run_after_column():
+    """
+    Ensure jobs table has run_after column when running on SQLite.
+    This keeps local development databases in sync with the ORM model.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+
+    try:
+        with engine.begin() as conn:
+            existing_columns = {
+                row[1]
+                for row in conn.execute(text("PRAGMA table_info(jobs)"))
+            }
+
+            if "run_after" not in existing_columns:
+                conn.exec_driver_sql(
+                    "ALTER TABLE jobs ADD COLUMN run_after DATETIME"
+                )
+                logger.info("✓ Added run_after column to jobs table (SQLite)")
+                print("✓ Added run_after column to jobs table (SQLite)", flush=True)
+    except Exception as exc:
+        logger.warning(
+            "Unable to ensure run_after column on SQLite: %s", exc, exc_info=True
+        )
+
+def ensure_datasheet_document_columns():
+    """
+    Ensure datasheet_documents has its indexing, ingestion and content columns when running on SQLite.
+    This keeps local development databases in sync with the ORM model.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+
+    required_columns = {
+        "search_index": "TEXT",
+        "pages_parsed": "INTEGER",
+        "content_sha256": "VARCHAR(64)",
+    }
+
+    try:
+        with engine.begin() as conn:
+            existing_columns = {
+                row[1]
+                for row in conn.execute(text("PRAGMA table_info(datasheet_documents)"))
+            }
+
+            for column_name, column_type in required_columns.items():
+                if column_name not in existing_columns:
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE datasheet_documents ADD COLUMN {column_name} {column_type}"
+                    )
+    except Exception as exc:
+        logger.warning(
+            "Unable to ensure datasheet document columns on SQLite: %s", exc, exc_info=True
+        )
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
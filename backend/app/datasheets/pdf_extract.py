@@ -0,0 +1,293 @@
+"""
+Per-page PDF text extraction, optionally sharded across worker processes.
+
+Large PDFs are split into page ranges that are extracted in parallel by a
+process pool (text extraction is CPU-bound pure Python, so threads would not
+help). Each worker:
+
+- caps its address space at PDF_WORKER_MEMORY_MB, so a pathological page
+  fails with MemoryError instead of exhausting the host;
+- gives each page PDF_PAGE_TIMEOUT_SECONDS before abandoning it;
+- is replaced after a few shards, returning memory pdfminer never frees;
+- is terminated if a shard hangs past its deadline.
+
+Each document gets its own pool, so restarting one after a hang or crash
+never disturbs another document's extraction. A shard whose worker crashed
+is retried once; a shard that hung is not. A page that fails or times out
+comes back as None, so callers keep page numbering intact. If more than
+PDF_MAX_FAILED_PAGE_FRACTION of the pages are lost, extraction fails instead
+of returning a mostly blank document.
+
+This module is imported by the worker processes, so it must stay free of
+application imports.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PDF_PARALLEL_ENABLED = os.getenv("PDF_PARALLEL_ENABLED", "true").lower() == "true"
+# Smaller PDFs are extracted in the calling process; pool overhead would dominate
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+PDF_PAGES_PER_SHARD = int(os.getenv("PDF_PAGES_PER_SHARD", "16"))
+PDF_PAGE_TIMEOUT_SECONDS = float(os.getenv("PDF_PAGE_TIMEOUT_SECONDS", "20"))
+PDF_WORKER_MEMORY_MB = int(os.getenv("PDF_WORKER_MEMORY_MB", "1024"))
+# Extraction fails when more than this share of pages could not be extracted
+PDF_MAX_FAILED_PAGE_FRACTION = float(os.getenv("PDF_MAX_FAILED_PAGE_FRACTION", "0.5"))
+
+# Workers are recycled after this many shards
+SHARDS_PER_WORKER = 8
+# Runs of a shard whose worker crashed, before its pages are given up
+MAX_SHARD_ATTEMPTS = 2
+
+
+# Called with (pages done, total pages) as extraction advances
+ProgressCallback = Callable[[int, int], None]
+
+
+class PdfExtractionError(Exception):
+    """Too many pages of a PDF could not be extracted."""
+
+
+class PageTimeoutError(BaseException):
+    """
+    A page took longer than PDF_PAGE_TIMEOUT_SECONDS to extract.
+
+    Not an Exception subclass, so handlers inside pdfminer cannot swallow it.
+    """
+
+
+def extract_page_texts(file_path: str, on_progress: Optional[ProgressCallback] = None) -> List[Optional[str]]:
+    """
+    Extract the text of every page, in page order.
+
+    Args:
+        file_path: Path to the PDF file
+        on_progress: Called with (pages done, total pages) after each page,
+            or after each shard when extracting in parallel
+
+    Returns:
+        One entry per page: its text ("" if it has none), or None if
+        extracting that page failed
+
+    Raises:
+        ImportError: If pdfplumber is not installed
+        PdfExtractionError: If more than PDF_MAX_FAILED_PAGE_FRACTION of the pages failed
+        Exception: If the PDF cannot be opened at all
+    """
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+    if on_progress:
+        on_progress(0, page_count)
+
+    if _use_pool(page_count):
+        texts = _extract_in_pool(file_path, page_count, on_progress)
+    else:
+        texts = _extract_serially(file_path, on_progress)
+
+    failed = sum(1 for text in texts if text is None)
+    if texts and failed / len(texts) > PDF_MAX_FAILED_PAGE_FRACTION:
+        raise PdfExtractionError(f"Could not extract text from {failed} of {len(texts)} pages")
+    return texts
+
+
+def _extract_serially(file_path: str, on_progress: Optional[ProgressCallback] = None) -> List[Optional[str]]:
+    import pdfplumber
+
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+        texts = []
+        for page_number, page in enumerate(pdf.pages, start=1):
+            texts.append(_extract_page(page, page_number))
+            if on_progress:
+                on_progress(page_number, page_count)
+        return texts
+
+
+def _use_pool(page_count: int) -> bool:
+    return PDF_PARALLEL_ENABLED and PDF_EXTRACT_WORKERS > 1 and page_count >= PDF_PARALLEL_MIN_PAGES
+
+
+def _extract_page(page, page_number: int) -> Optional[str]:
+    try:
+        return page.extract_text() or ""
+    except Exception as e:
+        logger.warning(f"Failed to parse page {page_number}: {str(e)}")
+        return None
+    finally:
+        # Drop the page's parsed layout; pdfplumber otherwise keeps it for the whole document
+        page.close()
+
+
+def _extract_in_pool(
+    file_path: str,
+    page_count: int,
+    on_progress: Optional[ProgressCallback] = None
+) -> List[Optional[str]]:
+    shard_size = max(1, PDF_PAGES_PER_SHARD)
+    pending = [(start, min(start + shard_size, page_count + 1)) for start in range(1, page_count + 1, shard_size)]
+    shard_count = len(pending)
+    texts: Dict[int, Optional[str]] = {}
+    attempts: Dict[Tuple[int, int], int] = {}
+    settled_pages = 0
+    timed_out = False
+
+    while pending:
+        # A pool per document: restarting it after a hang or crash touches no other document's shards
+        pool = _start_pool(min(PDF_EXTRACT_WORKERS, len(pending)))
+        hung = False
+        try:
+            futures = [(shard, _submit_shard(pool, file_path, shard)) for shard in pending]
+            pending = []
+            for (start, end), future in futures:
+                shard = (start, end)
+                if hung:
+                    # The pool was terminated; keep what finished before that and rerun the rest
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        texts.update(future.result())
+                    else:
+                        pending.append(shard)
+                        continue
+                else:
+                    attempts[shard] = attempts.get(shard, 0) + 1
+                    # Every page could run into its timeout; allow that plus time to open the file
+                    shard_timeout = PDF_PAGE_TIMEOUT_SECONDS * (end - start) + 30
+                    try:
+                        texts.update(future.result(timeout=shard_timeout))
+                    except FutureTimeoutError:
+                        logger.warning(f"Pages {start}-{end - 1} of {file_path} timed out; restarting its workers")
+                        hung = timed_out = True
+                        _stop_pool(pool, terminate=True)
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. killed for exceeding its memory) or could not start
+                        if attempts[shard] < MAX_SHARD_ATTEMPTS:
+                            pending.append(shard)
+                            continue
+                        logger.warning(f"Failed to parse pages {start}-{end - 1} of {file_path}: {str(e)}")
+                    except Exception as e:
+                        logger.warning(f"Failed to parse pages {start}-{end - 1} of {file_path}: {str(e)}")
+                settled_pages += end - start
+                if on_progress:
+                    on_progress(settled_pages, page_count)
+        finally:
+            _stop_pool(pool)
+
+    if not texts and not timed_out:
+        # The pool never produced anything (workers cannot start here); extract in this process instead
+        logger.warning(f"Parallel extraction of {file_path} failed entirely; extracting pages serially")
+        return _extract_serially(file_path, on_progress)
+
+    logger.info(f"Extracted {page_count} pages from {file_path} in {shard_count} parallel shards")
+    return [texts.get(page_number) for page_number in range(1, page_count + 1)]
+
+
+def _submit_shard(pool: ProcessPoolExecutor, file_path: str, shard: Tuple[int, int]) -> Future:
+    """Submit a shard; a pool that cannot start workers yields a failed future instead of raising."""
+    try:
+        return pool.submit(_extract_shard, file_path, shard[0], shard[1], PDF_PAGE_TIMEOUT_SECONDS)
+    except Exception as e:
+        failed: Future = Future()
+        failed.set_exception(e if isinstance(e, BrokenProcessPool) else BrokenProcessPool(str(e)))
+        return failed
+
+
+def _extract_shard(file_path: str, start: int, end: int, page_timeout: float) -> List[Tuple[int, Optional[str]]]:
+    """Worker: extract pages ``start`` to ``end - 1`` (1-based)."""
+    import pdfplumber
+
+    results = []
+    with pdfplumber.open(file_path, pages=list(range(start, end))) as pdf:
+        for page_number, page in zip(range(start, end), pdf.pages):
+            try:
+                with _page_deadline(page_timeout):
+                    text = _extract_page(page, page_number)
+            except PageTimeoutError:
+                logger.warning(f"Page {page_number} timed out after {page_timeout:.0f}s")
+                text = None
+            results.append((page_number, text))
+    return results
+
+
+class _page_deadline:
+    """Raise PageTimeoutError in the worker's main thread once ``seconds`` have passed (Unix only)."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._previous = None
+
+    def __enter__(self):
+        import signal
+        if self.seconds > 0 and hasattr(signal, "setitimer"):
+            self._previous = signal.signal(signal.SIGALRM, _raise_page_timeout)
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+        return self
+
+    def __exit__(self, *exc_info):
+        import signal
+        if self._previous is not None:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous)
+        return False
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+
+def _init_worker(memory_mb: int):
+    """Cap the worker's address space (where the platform supports it)."""
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not cap PDF worker memory: {e}")
+
+
+_active_pools: Set[ProcessPoolExecutor] = set()
+_pools_lock = threading.Lock()
+
+
+def _start_pool(workers: int) -> ProcessPoolExecutor:
+    # Spawned, not forked: the web process has threads and open connections
+    pool = ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(PDF_WORKER_MEMORY_MB,),
+        max_tasks_per_child=SHARDS_PER_WORKER,
+    )
+    with _pools_lock:
+        _active_pools.add(pool)
+    return pool
+
+
+def _stop_pool(pool: ProcessPoolExecutor, terminate: bool = False):
+    """Shut a document's pool down; with ``terminate``, kill its workers (one of them hung)."""
+    with _pools_lock:
+        _active_pools.discard(pool)
+    if terminate:
+        # The executor has no public way to stop a busy worker
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pdf_pool():
+    """Stop all extraction workers (call on application shutdown)."""
+    with _pools_lock:
+        pools = list(_active_pools)
+    for pool in pools:
+        _stop_pool(pool, terminate=True)
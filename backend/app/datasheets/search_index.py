@@ -0,0 +1,224 @@
+"""
+BM25 inverted index over datasheet chunks.
+
+Pages are split into chunks once, at parse time, and each chunk's terms are
+recorded in an inverted index (term -> postings of chunk and term frequency).
+The index is stored as JSON on the datasheet document, so answering a
+question only touches the postings of the question's terms instead of
+rescanning every page. Decoding that JSON costs far more than a search, so
+decoded indexes are kept in a per-process LRU (``get_index_cache``).
+"""
+
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+INDEX_VERSION = 1
+
+# Decoded indexes kept in memory per process
+DATASHEET_INDEX_CACHE_SIZE = int(os.getenv("DATASHEET_INDEX_CACHE_SIZE", "64"))
+
+CHUNK_SIZE = 2000
+MAX_CHUNKS_PER_PAGE = 2
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Section title terms count this many times in each chunk of their page
+SECTION_TITLE_WEIGHT = 2
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from',
+    'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on', 'that', 'the',
+    'to', 'was', 'will', 'with', 'what', 'when', 'where', 'who', 'how'
+}
+
+# Numbers keep their decimal point and unit suffix ("3.3v", "125c")
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?[a-z]*|[a-z][a-z0-9]*")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of ``text``, without stop words and with simple plural folding."""
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if len(token) < 2 or token in STOP_WORDS:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss") and token[0].isalpha():
+            token = token[:-1]
+        terms.append(token)
+    return terms
+
+
+def split_into_chunks(text: str, max_chunk_size: int = CHUNK_SIZE) -> List[str]:
+    """
+    Split text into chunks of at most ``max_chunk_size`` characters, on line boundaries.
+
+    A single line longer than the limit becomes its own chunk.
+    """
+    if len(text) <= max_chunk_size:
+        return [text]
+
+    chunks = []
+    current_chunk: List[str] = []
+    current_size = 0
+
+    for line in text.split('\n'):
+        line_len = len(line) + 1  # +1 for newline
+
+        if current_size + line_len > max_chunk_size and current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk = [line]
+            current_size = line_len
+        else:
+            current_chunk.append(line)
+            current_size += line_len
+
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+
+    return chunks
+
+
+class ChunkIndex:
+    """Chunks of one datasheet plus a BM25 inverted index over them."""
+
+    def __init__(
+        self,
+        chunks: List[Dict[str, Any]],
+        lengths: List[int],
+        postings: Dict[str, List[List[int]]],
+    ):
+        self.chunks = chunks
+        self.lengths = lengths
+        self.postings = postings
+        self.avg_length = (sum(lengths) / len(lengths)) if lengths else 0.0
+
+    @classmethod
+    def build(cls, pages: Sequence[Any]) -> "ChunkIndex":
+        """
+        Index pages (anything with page_number, raw_text and section_title).
+
+        Pages without text are skipped.
+        """
+        chunks: List[Dict[str, Any]] = []
+        lengths: List[int] = []
+        postings: Dict[str, List[List[int]]] = {}
+        for page in pages:
+            if not page.raw_text:
+                continue
+            title_terms = tokenize(page.section_title or "") * SECTION_TITLE_WEIGHT
+            for chunk_text in split_into_chunks(page.raw_text):
+                chunk_id = len(chunks)
+                terms = tokenize(chunk_text) + title_terms
+                chunks.append({
+                    "page_number": page.page_number,
+                    "section_title": page.section_title,
+                    "text": chunk_text,
+                })
+                lengths.append(len(terms))
+                for term, frequency in Counter(terms).items():
+                    postings.setdefault(term, []).append([chunk_id, frequency])
+        return cls(chunks, lengths, postings)
+
+    def search(self, question: str, max_chunks: int = 8) -> List[Dict[str, Any]]:
+        """
+        The best-scoring chunks for ``question``, at most MAX_CHUNKS_PER_PAGE per page.
+
+        Returns:
+            Chunk dicts with page_number, section_title and text, best first;
+            empty when no question term occurs in the datasheet
+        """
+        scores: Dict[int, float] = {}
+        total = len(self.chunks)
+        for term in set(tokenize(question)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings:
+                norm = 1 - BM25_B + BM25_B * self.lengths[chunk_id] / (self.avg_length or 1)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (BM25_K1 + 1) / (
+                    frequency + BM25_K1 * norm
+                )
+
+        results: List[Dict[str, Any]] = []
+        per_page: Counter = Counter()
+        # Ties go to the earlier chunk, so page order decides between equal matches
+        for chunk_id in sorted(scores, key=lambda cid: (-scores[cid], cid)):
+            chunk = self.chunks[chunk_id]
+            if per_page[chunk["page_number"]] >= MAX_CHUNKS_PER_PAGE:
+                continue
+            per_page[chunk["page_number"]] += 1
+            results.append(dict(chunk))
+            if len(results) >= max_chunks:
+                break
+        return results
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "version": INDEX_VERSION,
+            "chunks": self.chunks,
+            "lengths": self.lengths,
+            "postings": self.postings,
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> Optional["ChunkIndex"]:
+        """Load a stored index; None if there is none or it was built by an older version."""
+        if not data:
+            return None
+        try:
+            payload = json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        if not isinstance(payload, dict) or payload.get("version") != INDEX_VERSION:
+            return None
+        return cls(payload["chunks"], payload["lengths"], payload["postings"])
+
+
+class ChunkIndexCache:
+    """
+    Thread-safe LRU of decoded indexes.
+
+    Keys must change whenever the stored index can change (e.g. the content
+    hash, or a document id plus its parse time).
+    """
+
+    def __init__(self, max_entries: int = DATASHEET_INDEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ChunkIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[ChunkIndex]]) -> Optional[ChunkIndex]:
+        """The cached index for ``key``, or ``load()``'s result (cached unless None)."""
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                return index
+        # Loaded outside the lock; two misses for one key just decode twice
+        index = load()
+        if index is not None and self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = index
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+_index_cache = ChunkIndexCache()
+
+
+def get_index_cache() -> ChunkIndexCache:
+    """Get the decoded index cache singleton."""
+    return _index_cache
@@ -28,6 +28,10 @@ from app.database import (
     ensure_project_group_schema,
     ensure_supplier_material_columns,
     ensure_user_profile_image_column,
+    ensure_project_revision_column,
+    ensure_score_fingerprint_column,
+    ensure_datasheet_document_columns,
+    ensure_job_run_after_column,
 )
 from app.routers import (
     auth,
@@ -43,8 +47,13 @@ from app.routers import (
     onboarding,
     search,
     suppliers,
-    cad
+    cad,
+    jobs
 )
+from app.services.ai_service import close_ai_service
+from app.services.jobs import resume_in_process_jobs
+from app.worker import start_embedded_worker, stop_embedded_worker
+from app.datasheets.pdf_extract import shutdown_pdf_pool
 
 # Create all database tables and run migrations
 print("=" * 60, flush=True)
@@ -56,6 +65,10 @@ run_sql_migrations()
 ensure_project_group_schema()
 ensure_supplier_material_columns()
 ensure_user_profile_image_column()
+ensure_project_revision_column()
+ensure_score_fingerprint_column()
+ensure_datasheet_document_columns()
+ensure_job_run_after_column()
 print("=" * 60, flush=True)
 
 # Initialize FastAPI app
@@ -134,6 +147,7 @@ app.include_router(onboarding.router)
 app.include_router(search.router)
 app.include_router(suppliers.router)
 app.include_router(cad.router)
+app.include_router(jobs.router)
 
 
 @app.on_event("startup")
@@ -164,10 +178,23 @@ async def startup_event():
         print("⚠ ANTHROPIC_API_KEY is NOT set")
         print("  AI component discovery and scoring will not be available")
     
+    # Pick up jobs a previous in-process run left queued or running
+    resume_in_process_jobs()
+    # With the Postgres backend, claim jobs here too so no separate worker is required
+    start_embedded_worker()
+    
     print("=" * 60)
     print()
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close shared outbound connection pools and worker processes"""
+    await stop_embedded_worker()
+    await close_ai_service()
+    shutdown_pdf_pool()
+
+
 @app.get("/")
 def read_root():
     """Root endpoint with API information"""
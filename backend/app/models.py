@@ -1,6 +1,6 @@
-from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Enum, Text
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Enum, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 import uuid
 import enum
@@ -139,6 +139,7 @@ class Project(Base):
     status = Column(Enum(ProjectStatus), default=ProjectStatus.DRAFT)
     trade_study_report = Column(Text)  # AI-generated trade study report
     report_generated_at = Column(DateTime(timezone=True))  # Timestamp when report was generated
+    revision = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on component/criterion/score writes
 
     # Relationships
     creator = relationship("User", back_populates="projects")
@@ -189,6 +190,10 @@ class Component(Base):
 
 class Score(Base):
     __tablename__ = "scores"
+    __table_args__ = (
+        # Conflict target for bulk score upserts
+        Index("uq_scores_component_criterion", "component_id", "criterion_id", unique=True),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     component_id = Column(UUID(as_uuid=True), ForeignKey("components.id"), nullable=False)
@@ -200,12 +205,56 @@ class Score(Base):
     manually_adjusted = Column(Boolean, default=False)
     adjusted_by = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     adjusted_at = Column(DateTime(timezone=True))
+    input_fingerprint = Column(String(64))  # Hash of the component/criterion definitions this score was generated from
 
     # Relationships
     component = relationship("Component", back_populates="scores")
     criterion = relationship("Criterion", back_populates="scores")
     adjuster = relationship("User")
 
+class ScoringBatch(Base):
+    """An offline AI scoring run submitted through the Message Batches API"""
+    __tablename__ = "scoring_batches"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=False, index=True)
+    provider_batch_id = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="submitted")  # submitted, applied, failed, canceled
+    request_map = Column(Text, nullable=False)  # JSON: custom_id -> component id and expected score fingerprints
+    request_count = Column(Integer, nullable=False, default=0)
+    scores_created = Column(Integer)
+    scores_updated = Column(Integer)
+    errors = Column(Text)  # JSON array of per-request error messages
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    project = relationship("Project")
+
+class Job(Base):
+    """A unit of long-running background work (AI scoring, report generation, ...)"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job first
+        Index("ix_jobs_status_created_at", "status", "created_at"),
+    )
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed, canceled
+    project_id = Column(UUID(as_uuid=True), ForeignKey("projects.id", ondelete="CASCADE"), nullable=True)
+    payload = Column(Text)  # JSON arguments for the job handler
+    result = Column(Text)  # JSON result returned by the handler
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    locked_by = Column(String)  # Worker that claimed the job
+    heartbeat_at = Column(DateTime(timezone=True))  # Refreshed while running; stale jobs are reclaimed
+    run_after = Column(DateTime(timezone=True))  # A queued job is not claimed before this time
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
 # Version History Models
 class ProjectVersion(Base):
     __tablename__ = "project_versions"
@@ -292,10 +341,52 @@ class DatasheetDocument(Base):
     parse_status = Column(String, nullable=False, default="pending")  # pending, success, failed
     parse_error = Column(Text)
     suggested_questions = Column(Text)  # JSON array of cached AI-generated questions
+    # JSON BM25 index over the page chunks, built at parse time; large, so loaded only when accessed
+    search_index = deferred(Column(Text))
+    pages_parsed = Column(Integer)  # Progress while parse_status is pending; num_pages holds the total
+    # Shared parsed content; documents uploaded before content sharing keep their own pages and index
+    content_sha256 = Column(String(64), ForeignKey("datasheet_contents.sha256"), index=True)
 
     # Relationships
     component = relationship("Component", back_populates="datasheet_document")
     pages = relationship("DatasheetPage", back_populates="datasheet", cascade="all, delete-orphan")
+    content = relationship("DatasheetContent")
+
+class DatasheetContent(Base):
+    """Parsed content of one distinct PDF, shared by every datasheet document with the same bytes"""
+    __tablename__ = "datasheet_contents"
+
+    sha256 = Column(String(64), primary_key=True)
+    file_path = Column(String, nullable=False)  # Content-addressed blob
+    size_bytes = Column(Integer)
+    num_pages = Column(Integer)
+    parse_status = Column(String, nullable=False, default="pending")  # pending, success, failed
+    parse_error = Column(Text)
+    parse_job_id = Column(UUID(as_uuid=True))  # Job parsing it while pending
+    search_index = deferred(Column(Text))
+    suggested_questions = Column(Text)  # JSON array of cached AI-generated questions
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    parsed_at = Column(DateTime(timezone=True))
+
+    # Relationships
+    pages = relationship("DatasheetContentPage", back_populates="content", cascade="all, delete-orphan")
+
+class DatasheetContentPage(Base):
+    """Extracted text of one page of shared datasheet content"""
+    __tablename__ = "datasheet_content_pages"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    content_sha256 = Column(String(64), ForeignKey("datasheet_contents.sha256"), nullable=False)
+    page_number = Column(Integer, nullable=False)
+    raw_text = Column(Text)
+    section_title = Column(String)
+
+    # Relationships
+    content = relationship("DatasheetContent", back_populates="pages")
+
+    __table_args__ = (
+        Index("uq_datasheet_content_pages_page", "content_sha256", "page_number", unique=True),
+    )
 
 class DatasheetPage(Base):
     """Represents extracted text per page"""
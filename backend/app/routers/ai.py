@@ -1,35 +1,128 @@
 """AI-powered endpoints for optimization, discovery, scoring, chat, and PDF proxy."""
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 import io
+import json
 import asyncio
 from typing import Tuple, Optional, List
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 import logging
 
 from app import models, schemas
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.services.ai_service import get_ai_service
-from app.services.scoring_service import get_scoring_service
+from app.services.project_snapshot import ComponentRecord, CriterionRecord, load_project_snapshot
+from app.services.ranking_cache import bump_project_revision, get_project_rankings
+from app.services.batch_scoring import (
+    SCORING_BATCH_POLL_INTERVAL_SECONDS,
+    SCORING_BATCH_POLL_TIMEOUT_SECONDS,
+    cancel_scoring_batch,
+    get_batch_transport,
+    refresh_scoring_batch,
+    scoring_batch_summary,
+    submit_scoring_batch,
+)
+from app.services.score_fingerprint import ScoreFingerprints
+from app.services.scoring_packer import (
+    ScoringPack,
+    component_prompt_fields,
+    criteria_prompt_fields,
+    pack_output_limit,
+    pack_scoring_work,
+)
+from app.services.score_writer import CriterionResolver, build_score_rows, upsert_scores
+from app.services.concurrency import (
+    AI_SCORING_TIMEOUT_SECONDS,
+    AdaptiveConcurrencyLimiter,
+    get_scoring_limiter,
+    is_overload_error,
+)
+from app.services.llm_cache import get_response_cache
+from app.services.jobs import RescheduleJob, enqueue_job, job_handler, job_summary
+from app.services.singleflight import get_singleflight
+from app.services.provider_health import ProviderUnavailableError, provider_health_snapshot
+from app.services.rate_limiter import rate_limit_snapshot
 from app.services.change_logger import log_project_change
 from app.services.word_service import get_word_service
 from app.services.report_builder import build_report_pdf
 from app.utils.file_helpers import is_pdf_content
+from app.utils.json_stream import JsonElementStream
 
 router = APIRouter(tags=["ai"])
 logger = logging.getLogger(__name__)
 
+# all: every component x criterion pair; dirty: only missing or stale pairs;
+# batch: every pair, submitted offline through the Message Batches API
+SCORING_MODES = ("all", "dirty", "batch")
+
+# max_tokens of a single-component scoring call; packed calls scale their timeout from it
+SINGLE_COMPONENT_OUTPUT_TOKENS = 4096
+
 
 @router.post("/api/projects/{project_id}/discover")
-def discover_components(
+async def discover_components(
     project_id: UUID,
     request: schemas.DiscoverComponentsRequest = schemas.DiscoverComponentsRequest(),
     db: Session = Depends(get_db)
 ):
-    """Trigger AI component discovery using Anthropic Claude."""
+    """Trigger AI component discovery using Anthropic Claude.
+    Identical concurrent requests for the same project share one discovery run.
+    """
+    operation = ("discover", request.location_preference, request.number_of_components)
+    return await _coalesced(
+        db, project_id, operation,
+        lambda session: _discover_components(project_id, request, session)
+    )
+
+
+async def _discover_components(
+    project_id: UUID,
+    request: schemas.DiscoverComponentsRequest,
+    db: Session
+):
+    """
+    Discover components with AI and add the new ones to the project.
+    
+    Database work runs in worker threads; only the AI call is awaited on the event loop.
+    """
+    project, criteria_names = await asyncio.to_thread(_load_discovery_context, project_id, db)
+    
+    try:
+        ai_service = get_ai_service()
+        components_data = await ai_service.discover_components_async(
+            project_name=project.name,
+            component_type=project.component_type,
+            description=project.description,
+            criteria_names=criteria_names,
+            location_preference=request.location_preference,
+            number_of_components=request.number_of_components or 5
+        )
+        
+        components = await asyncio.to_thread(_add_discovered_components, project_id, components_data, db)
+        return {
+            "status": "success",
+            "discovered_count": len(components),
+            "components": components
+        }
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        logger.error(f"ValueError in discover_components: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Invalid data: {str(e)}")
+    except RuntimeError as e:
+        logger.error(f"RuntimeError in discover_components: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
+    except Exception as e:
+        logger.error(f"Unexpected error in discover_components: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Discovery failed: {str(e)}")
+
+
+def _load_discovery_context(project_id: UUID, db: Session) -> Tuple[models.Project, Optional[List[str]]]:
+    """The project to discover components for and its criterion names (runs in a worker thread)."""
     # Retry once if the database is missing the project_group_id column (migration not applied yet)
     from sqlalchemy.exc import ProgrammingError
     from app.database import run_sql_migrations, ensure_project_group_schema
@@ -57,199 +150,295 @@ def discover_components(
     
     criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
     criteria_names = [c.name for c in criteria] if criteria else None
-    
-    try:
-        ai_service = get_ai_service()
-        components_data = ai_service.discover_components(
-            project_name=project.name,
-            component_type=project.component_type,
-            description=project.description,
-            criteria_names=criteria_names,
-            location_preference=request.location_preference,
-            number_of_components=request.number_of_components or 5
-        )
+    return project, criteria_names
+
+
+def _add_discovered_components(project_id: UUID, components_data: list, db: Session) -> list:
+    """Add the discovered components the project does not have yet (runs in a worker thread)."""
+    discovered_components = []
+    for comp_data in components_data:
+        if not isinstance(comp_data, dict) or "manufacturer" not in comp_data or "part_number" not in comp_data:
+            continue
         
-        discovered_components = []
-        for comp_data in components_data:
-            if not isinstance(comp_data, dict) or "manufacturer" not in comp_data or "part_number" not in comp_data:
-                continue
-            
-            existing = db.query(models.Component).filter(
-                models.Component.project_id == project_id,
-                models.Component.manufacturer == comp_data["manufacturer"],
-                models.Component.part_number == comp_data["part_number"]
-            ).first()
-            
-            if existing:
-                continue
-            
-            # Normalize availability value (AI might return uppercase like "LEAD_TIME" but enum expects "lead_time")
-            raw_availability = comp_data.get("availability", "in_stock")
-            logger.info(f"Raw availability from AI: '{raw_availability}' (type: {type(raw_availability)})")
-            
-            # Always normalize to lowercase with underscores
-            if isinstance(raw_availability, str):
-                normalized = raw_availability.lower().replace("-", "_").strip()
-                logger.info(f"Normalized to: '{normalized}'")
-            else:
-                normalized = "in_stock"
-                logger.warning(f"Non-string availability: {raw_availability}, using default 'in_stock'")
-            
-            # Map to valid enum values
-            availability_map = {
-                "leadtime": "lead_time",
-                "lead_time": "lead_time",
-                "instock": "in_stock",
-                "in_stock": "in_stock",
-                "limited": "limited",
-                "obsolete": "obsolete",
-            }
-            availability_str = availability_map.get(normalized, "in_stock")
-            logger.info(f"Mapped availability: '{normalized}' -> '{availability_str}'")
-            
-            # Validate and convert to enum, defaulting to IN_STOCK if invalid
-            try:
-                availability = models.ComponentAvailability(availability_str)
-                logger.info(f"Created enum: {availability} with value: '{availability.value}'")
-                # CRITICAL: Ensure we're using the enum VALUE, not the name
-                # SQLAlchemy should handle this, but we'll be explicit
-                if availability.value != availability_str:
-                    logger.warning(f"Enum value mismatch! Expected '{availability_str}', got '{availability.value}'. This might cause issues.")
-            except (ValueError, KeyError) as e:
-                logger.error(f"Failed to create enum from '{availability_str}': {e}, defaulting to IN_STOCK")
-                availability = models.ComponentAvailability.IN_STOCK
-            
-            # Create component - explicitly ensure we use the enum value
-            # SQLAlchemy should serialize the enum value (e.g., "lead_time"), not the name (e.g., "LEAD_TIME")
-            db_component = models.Component(
-                manufacturer=comp_data["manufacturer"],
-                part_number=comp_data["part_number"],
-                description=comp_data.get("description"),
-                datasheet_url=comp_data.get("datasheet_url"),
-                availability=availability,  # This is the enum instance - SQLAlchemy should use .value
-                project_id=project_id,
-                source=models.ComponentSource.AI_DISCOVERED
-            )
-            
-            # Verify the value before insert - this should be lowercase
-            final_value = db_component.availability.value if hasattr(db_component.availability, 'value') else str(db_component.availability)
-            logger.info(f"Component created with availability value: '{final_value}' (should be lowercase like 'lead_time', NOT 'LEAD_TIME')")
-            
-            # Double-check: if somehow the value is uppercase, force it to lowercase
-            if final_value and final_value.isupper():
-                logger.error(f"CRITICAL: Availability value is uppercase '{final_value}'! This will cause database error. Forcing to lowercase.")
-                # Recreate with explicit lowercase value
-                db_component.availability = models.ComponentAvailability(final_value.lower())
-            db.add(db_component)
-            db.flush()
-            log_project_change(
-                db, project_id=project_id, change_type="component_discovered",
-                description=f"Discovered component {db_component.manufacturer} {db_component.part_number}",
-                entity_type="component", entity_id=db_component.id,
-                new_value={"manufacturer": db_component.manufacturer, "part_number": db_component.part_number,
-                    "description": db_component.description or "", "datasheet_url": db_component.datasheet_url or ""},
-            )
-            discovered_components.append(db_component)
+        existing = db.query(models.Component).filter(
+            models.Component.project_id == project_id,
+            models.Component.manufacturer == comp_data["manufacturer"],
+            models.Component.part_number == comp_data["part_number"]
+        ).first()
         
-        log_project_change(
-            db, project_id=project_id, change_type="component_discovery_run",
-            description=f"Ran AI discovery and found {len(discovered_components)} new component(s)",
-            entity_type="system", new_value={"discovered_count": len(discovered_components)},
-        )
-        db.commit()
+        if existing:
+            continue
         
-        for comp in discovered_components:
-            db.refresh(comp)
+        # Normalize availability value (AI might return uppercase like "LEAD_TIME" but enum expects "lead_time")
+        raw_availability = comp_data.get("availability", "in_stock")
+        logger.info(f"Raw availability from AI: '{raw_availability}' (type: {type(raw_availability)})")
         
-        return {
-            "status": "success",
-            "discovered_count": len(discovered_components),
-            "components": [schemas.Component.model_validate(c) for c in discovered_components]
+        # Always normalize to lowercase with underscores
+        if isinstance(raw_availability, str):
+            normalized = raw_availability.lower().replace("-", "_").strip()
+            logger.info(f"Normalized to: '{normalized}'")
+        else:
+            normalized = "in_stock"
+            logger.warning(f"Non-string availability: {raw_availability}, using default 'in_stock'")
+        
+        # Map to valid enum values
+        availability_map = {
+            "leadtime": "lead_time",
+            "lead_time": "lead_time",
+            "instock": "in_stock",
+            "in_stock": "in_stock",
+            "limited": "limited",
+            "obsolete": "obsolete",
         }
-    except ValueError as e:
-        logger.error(f"ValueError in discover_components: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Invalid data: {str(e)}")
-    except RuntimeError as e:
-        logger.error(f"RuntimeError in discover_components: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"AI service error: {str(e)}")
-    except Exception as e:
-        logger.error(f"Unexpected error in discover_components: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=f"Discovery failed: {str(e)}")
+        availability_str = availability_map.get(normalized, "in_stock")
+        logger.info(f"Mapped availability: '{normalized}' -> '{availability_str}'")
+        
+        # Validate and convert to enum, defaulting to IN_STOCK if invalid
+        try:
+            availability = models.ComponentAvailability(availability_str)
+            logger.info(f"Created enum: {availability} with value: '{availability.value}'")
+            # CRITICAL: Ensure we're using the enum VALUE, not the name
+            # SQLAlchemy should handle this, but we'll be explicit
+            if availability.value != availability_str:
+                logger.warning(f"Enum value mismatch! Expected '{availability_str}', got '{availability.value}'. This might cause issues.")
+        except (ValueError, KeyError) as e:
+            logger.error(f"Failed to create enum from '{availability_str}': {e}, defaulting to IN_STOCK")
+            availability = models.ComponentAvailability.IN_STOCK
+        
+        # Create component - explicitly ensure we use the enum value
+        # SQLAlchemy should serialize the enum value (e.g., "lead_time"), not the name (e.g., "LEAD_TIME")
+        db_component = models.Component(
+            manufacturer=comp_data["manufacturer"],
+            part_number=comp_data["part_number"],
+            description=comp_data.get("description"),
+            datasheet_url=comp_data.get("datasheet_url"),
+            availability=availability,  # This is the enum instance - SQLAlchemy should use .value
+            project_id=project_id,
+            source=models.ComponentSource.AI_DISCOVERED
+        )
+        
+        # Verify the value before insert - this should be lowercase
+        final_value = db_component.availability.value if hasattr(db_component.availability, 'value') else str(db_component.availability)
+        logger.info(f"Component created with availability value: '{final_value}' (should be lowercase like 'lead_time', NOT 'LEAD_TIME')")
+        
+        # Double-check: if somehow the value is uppercase, force it to lowercase
+        if final_value and final_value.isupper():
+            logger.error(f"CRITICAL: Availability value is uppercase '{final_value}'! This will cause database error. Forcing to lowercase.")
+            # Recreate with explicit lowercase value
+            db_component.availability = models.ComponentAvailability(final_value.lower())
+        db.add(db_component)
+        db.flush()
+        log_project_change(
+            db, project_id=project_id, change_type="component_discovered",
+            description=f"Discovered component {db_component.manufacturer} {db_component.part_number}",
+            entity_type="component", entity_id=db_component.id,
+            new_value={"manufacturer": db_component.manufacturer, "part_number": db_component.part_number,
+                "description": db_component.description or "", "datasheet_url": db_component.datasheet_url or ""},
+        )
+        discovered_components.append(db_component)
+    
+    log_project_change(
+        db, project_id=project_id, change_type="component_discovery_run",
+        description=f"Ran AI discovery and found {len(discovered_components)} new component(s)",
+        entity_type="system", new_value={"discovered_count": len(discovered_components)},
+    )
+    if discovered_components:
+        bump_project_revision(db, project_id)
+    db.commit()
+    
+    for comp in discovered_components:
+        db.refresh(comp)
+    
+    return [schemas.Component.model_validate(c) for c in discovered_components]
 
 
 async def _score_component_batch(
     ai_service,
-    component: models.Component,
-    criteria: List[models.Criterion],
-    timeout_seconds: int = 60
-) -> Tuple[models.Component, List[dict], Optional[Exception]]:
-    """Score a component against ALL criteria in one AI call. Much faster."""
+    component: ComponentRecord,
+    criteria: List[CriterionRecord],
+    limiter: AdaptiveConcurrencyLimiter,
+    usage: Optional[dict] = None,
+    timeout_seconds: float = AI_SCORING_TIMEOUT_SECONDS
+) -> Tuple[ComponentRecord, List[dict], Optional[Exception]]:
+    """Score a component against ALL criteria in one AI call. Much faster.
+
+    The response is parsed as it streams in, so if the call fails or times
+    out the scores that had already arrived are still returned with the error.
+    """
+    stream = JsonElementStream()
     try:
-        component_dict = {
-            "manufacturer": component.manufacturer,
-            "part_number": component.part_number,
-            "description": component.description or "",
-        }
-        criteria_dicts = [
-            {
-                "name": c.name,
-                "description": c.description or "",
-                "unit": c.unit or "",
-                "higher_is_better": c.higher_is_better,
-            }
-            for c in criteria
-        ]
-        
-        # Add timeout to prevent hanging
-        scores = await asyncio.wait_for(
-            asyncio.to_thread(
-                ai_service.score_component_batch,
-                component=component_dict,
-                criteria=criteria_dicts
-            ),
+        # The limiter widens while calls succeed and backs off on 429s and timeouts.
+        # Its slot and the timeout start once the rate limit budget is granted.
+        scores = await ai_service.score_component_batch_async(
+            component=component_prompt_fields(component),
+            criteria=criteria_prompt_fields(criteria),
+            usage=usage,
+            stream=stream,
+            admission=limiter.slot,
             timeout=timeout_seconds
         )
         logger.info(f"Scored component {component.manufacturer} {component.part_number}")
         return component, scores, None
     except asyncio.TimeoutError:
         logger.error(f"Timeout scoring component {component.id}")
-        return component, [], Exception("Scoring timed out")
+        return component, ai_service.streamed_scores(stream), asyncio.TimeoutError("Scoring timed out")
     except Exception as e:
         logger.error(f"Error batch scoring component {component.id}: {str(e)}")
-        return component, [], e
+        return component, ai_service.streamed_scores(stream), e
+
+
+async def _request_pack_scores(
+    ai_service,
+    pack: ScoringPack,
+    limiter: AdaptiveConcurrencyLimiter,
+    usage: Optional[dict] = None
+) -> Tuple[List[Optional[List[dict]]], Optional[Exception]]:
+    """Send one scoring request for a pack; returns the scores received per component and any error."""
+    if len(pack.components) == 1:
+        _, scores, error = await _score_component_batch(ai_service, pack.components[0], pack.criteria, limiter, usage)
+        return [scores or None], error
+    
+    # Larger packs produce proportionally more output, so allow them more time
+    timeout_seconds = AI_SCORING_TIMEOUT_SECONDS * max(1.0, pack.estimated_output_tokens / SINGLE_COMPONENT_OUTPUT_TOKENS)
+    stream = JsonElementStream()
+    try:
+        packed_scores = await ai_service.score_components_packed_async(
+            components=[component_prompt_fields(c) for c in pack.components],
+            criteria=criteria_prompt_fields(pack.criteria),
+            max_tokens=pack.max_tokens,
+            usage=usage,
+            stream=stream,
+            admission=limiter.slot,
+            timeout=timeout_seconds
+        )
+        return packed_scores, None
+    except Exception as e:
+        error = asyncio.TimeoutError("Scoring timed out") if isinstance(e, asyncio.TimeoutError) else e
+        logger.error(f"Packed scoring of {len(pack.components)} components failed: {error}")
+        return ai_service.unpack_streamed_scores(stream, len(pack.components)), error
+
+
+def _missing_criteria(resolver: CriterionResolver, criteria: List[CriterionRecord], scores: List[dict]) -> List[CriterionRecord]:
+    """Requested criteria that none of the returned scores resolved to."""
+    scored_ids = set()
+    for score in scores:
+        criterion = resolver.resolve(score.get("criterion_name", ""))
+        if criterion is not None:
+            scored_ids.add(criterion.id)
+    return [c for c in criteria if c.id not in scored_ids]
+
+
+async def _score_component_pack(
+    ai_service,
+    pack: ScoringPack,
+    limiter: AdaptiveConcurrencyLimiter,
+    usage: Optional[dict] = None
+) -> List[Tuple[ComponentRecord, List[dict], Optional[Exception]]]:
+    """Score a pack of components in one AI call, isolating failures per component.
+
+    Every complete score that arrived is kept, even from a failed or
+    truncated response. Criteria still missing afterwards are requested once
+    more, one component at a time and only for those criteria, so one bad
+    component cannot sink the rest of its pack. After rate limiting or a
+    timeout nothing is retried; the missing pairs are reported as errors and
+    are picked up by the next dirty run.
+    """
+    packed_scores, pack_error = await _request_pack_scores(ai_service, pack, limiter, usage)
+    resolver = CriterionResolver(pack.criteria)
+    retry_allowed = pack_error is None or not is_overload_error(pack_error)
+    
+    results = []
+    retry = []
+    for component, scores in zip(pack.components, packed_scores):
+        scores = scores or []
+        missing = _missing_criteria(resolver, pack.criteria, scores)
+        if not missing:
+            logger.info(f"Scored component {component.manufacturer} {component.part_number}")
+            results.append((component, scores, None))
+        elif not retry_allowed or (len(pack.components) == 1 and not scores):
+            # A lone component that returned nothing has already had its own request
+            results.append((component, scores, pack_error or Exception(
+                f"No scores returned for {component.manufacturer} {component.part_number}"
+            )))
+        else:
+            retry.append((component, scores, missing))
+    
+    if retry:
+        retried = await asyncio.gather(*[
+            _score_component_batch(ai_service, component, missing, limiter, usage)
+            for component, _, missing in retry
+        ])
+        for (component, scores, _), (_, more_scores, error) in zip(retry, retried):
+            results.append((component, scores + more_scores, error))
+    return results
 
 
 @router.post("/api/projects/{project_id}/score")
-async def score_all_components(project_id: UUID, db: Session = Depends(get_db)):
+async def score_all_components(
+    project_id: UUID,
+    mode: str = "all",
+    run_async: bool = Query(False, alias="async"),
+    db: Session = Depends(get_db)
+):
     """Trigger AI scoring for all components against all criteria.
     Uses batch scoring - one AI call per component (scores all criteria at once).
+    With mode=dirty, only missing or stale component/criterion pairs are sent.
+    With mode=batch, the work is submitted as a Message Batch and applied later
+    via GET /api/projects/{project_id}/score/batches/{batch_id}.
+    With async=true, scoring runs as a background job and 202 is returned with
+    the job to poll at GET /api/jobs/{job_id}.
+    Concurrent requests with the same mode on the same project revision share
+    one scoring run and its result.
     """
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    if mode not in SCORING_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(SCORING_MODES)}")
+    
+    if run_async:
+        return await asyncio.to_thread(_enqueue_project_job, db, project_id, "score_project", {"mode": mode})
+    
+    return await _coalesced(
+        db, project_id, ("score", mode),
+        lambda session: _score_project(project_id, mode, session)
+    )
+
+
+async def _score_project(project_id: UUID, mode: str, db: Session):
+    """Score a project's components in the given mode and persist the results."""
+    snapshot = await asyncio.to_thread(load_project_snapshot, db, project_id)
+    if not snapshot:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
+    components = snapshot.components
+    criteria = snapshot.criteria
     
     if not components:
         raise HTTPException(status_code=400, detail="No components found for this project")
     if not criteria:
         raise HTTPException(status_code=400, detail="No criteria found for this project")
     
-    criterion_map = {c.name: c for c in criteria}
-    component_ids = [c.id for c in components]
-    criterion_ids = [c.id for c in criteria]
-    existing_scores = {
-        (s.component_id, s.criterion_id): s
-        for s in db.query(models.Score).filter(
-            models.Score.component_id.in_(component_ids),
-            models.Score.criterion_id.in_(criterion_ids)
-        ).all()
-    }
+    resolver = CriterionResolver(criteria)
+    fingerprints = ScoreFingerprints(components, criteria)
+    if mode == "dirty":
+        pending = fingerprints.dirty_criteria(components, criteria, snapshot.scores_dict)
+    else:
+        pending = {component.id: criteria for component in components}
+    pairs_requested = sum(len(pending_criteria) for pending_criteria in pending.values())
     
-    scores_created = 0
-    scores_updated = 0
+    score_rows: list[dict] = []
     errors: list[str] = []
+    
+    if not pending:
+        return {
+            "status": "success",
+            "mode": mode,
+            "scores_created": 0,
+            "scores_updated": 0,
+            "total_scores": 0,
+            "components_evaluated": 0,
+            "criteria_evaluated": len(criteria),
+            "pairs_requested": 0,
+            "scores_in_database": len(snapshot.scores)
+        }
 
     try:
         try:
@@ -260,80 +449,70 @@ async def score_all_components(project_id: UUID, db: Session = Depends(get_db)):
                 detail=f"AI scoring unavailable: {exc}"
             ) from exc
         
-        logger.info(f"Starting batch scoring for {len(components)} components with {len(criteria)} criteria")
-
-        scoring_tasks = [
-            _score_component_batch(ai_service, component, criteria, timeout_seconds=60)
-            for component in components
-        ]
-
-        semaphore = asyncio.Semaphore(2)
-
-        async def bounded_score(task):
-            async with semaphore:
-                return await task
+        if mode == "batch":
+            batch = await submit_scoring_batch(
+                db, project_id, snapshot, pending, ai_service, get_batch_transport(ai_service)
+            )
+            await asyncio.to_thread(db.commit)
+            # Results are applied by the poll job even if no client polls the batch
+            poll_deadline = datetime.now(timezone.utc) + timedelta(seconds=SCORING_BATCH_POLL_TIMEOUT_SECONDS)
+            poll_job = await asyncio.to_thread(
+                enqueue_job, db, "poll_scoring_batch",
+                {"project_id": str(project_id), "batch_id": str(batch.id), "deadline": poll_deadline.isoformat()},
+                project_id=project_id
+            )
+            return {
+                **scoring_batch_summary(batch),
+                "mode": mode,
+                "pairs_requested": pairs_requested,
+                "poll_job_id": poll_job.id,
+            }
+        
+        logger.info(
+            f"Starting {mode} batch scoring: {pairs_requested} pairs across "
+            f"{len(pending)} of {len(components)} components"
+        )
 
-        bounded_tasks = [bounded_score(task) for task in scoring_tasks]
-        results = await asyncio.gather(*bounded_tasks, return_exceptions=True)
+        limiter = get_scoring_limiter()
+        usage: dict = {}
+        pack_limit = pack_output_limit(ai_service.MODEL_MAX_OUTPUT_TOKENS)
+        packs = pack_scoring_work(components, pending, max_tokens=pack_limit)
+        scoring_tasks = [_score_component_pack(ai_service, pack, limiter, usage) for pack in packs]
+        pack_results = await asyncio.gather(*scoring_tasks, return_exceptions=True)
         
-        for result in results:
-            if isinstance(result, Exception):
-                errors.append(str(result))
-                continue
-            
-            component, scores_list, error = result
+        results = []
+        for pack_result in pack_results:
+            if isinstance(pack_result, BaseException):
+                errors.append(str(pack_result))
+            else:
+                results.extend(pack_result)
+        
+        for component, scores_list, error in results:
             if error:
                 errors.append(str(error))
-                continue
+            # Scores that arrived before an error are still kept
             
-            for score_data in scores_list:
-                criterion_name = score_data.get("criterion_name", "")
-                criterion = criterion_map.get(criterion_name)
-                
-                if not criterion:
-                    for crit_name, crit in criterion_map.items():
-                        if crit_name.lower() in criterion_name.lower() or criterion_name.lower() in crit_name.lower():
-                            criterion = crit
-                            break
-                
-                if not criterion:
-                    continue
-                
-                score_key = (component.id, criterion.id)
-                existing_score = existing_scores.get(score_key)
-                
-                if existing_score:
-                    existing_score.score = score_data["score"]
-                    existing_score.rationale = score_data.get("rationale", "")
-                    existing_score.raw_value = score_data.get("raw_value")
-                    existing_score.extraction_confidence = score_data.get("confidence", 0.5)
-                    scores_updated += 1
-                else:
-                    db_score = models.Score(
-                        component_id=component.id,
-                        criterion_id=criterion.id,
-                        score=score_data["score"],
-                        rationale=score_data.get("rationale", ""),
-                        raw_value=score_data.get("raw_value"),
-                        extraction_confidence=score_data.get("confidence", 0.5)
-                    )
-                    db.add(db_score)
-                    scores_created += 1
+            requested_ids = {c.id for c in pending[component.id]}
+            score_rows.extend(build_score_rows(
+                component.id, scores_list, resolver,
+                fingerprints=fingerprints, criterion_ids=requested_ids
+            ))
         
-        db.commit()
-        
-        saved_scores_count = db.query(models.Score).join(models.Component).filter(
-            models.Component.project_id == project_id
-        ).count()
+        scores_created, scores_updated = await asyncio.to_thread(_save_score_rows, db, project_id, score_rows)
         
         response = {
             "status": "success",
+            "mode": mode,
             "scores_created": scores_created,
             "scores_updated": scores_updated,
             "total_scores": scores_created + scores_updated,
-            "components_evaluated": len(components),
+            "components_evaluated": len(pending),
             "criteria_evaluated": len(criteria),
-            "scores_in_database": saved_scores_count
+            "pairs_requested": pairs_requested,
+            "requests_sent": len(packs),
+            "scores_in_database": len(snapshot.scores) + scores_created,
+            "concurrency": limiter.snapshot(),
+            "prompt_cache": _prompt_cache_summary(usage)
         }
         
         if errors:
@@ -351,6 +530,87 @@ async def score_all_components(project_id: UUID, db: Session = Depends(get_db)):
             detail=f"Scoring failed: {str(e)}"
         )
 
+
+def _save_score_rows(db: Session, project_id: UUID, score_rows: List[dict]) -> Tuple[int, int]:
+    """Upsert scored rows, bump the project revision if anything changed and commit."""
+    scores_created, scores_updated = upsert_scores(db, score_rows)
+    if scores_created or scores_updated:
+        bump_project_revision(db, project_id)
+    db.commit()
+    return scores_created, scores_updated
+
+
+def _lock_scoring_batch(db: Session, batch_id: UUID, project_id: Optional[UUID] = None):
+    """Fetch a scoring batch row locked for update, optionally scoped to a project."""
+    query = db.query(models.ScoringBatch).filter(models.ScoringBatch.id == batch_id)
+    if project_id is not None:
+        query = query.filter(models.ScoringBatch.project_id == project_id)
+    return query.with_for_update().first()
+
+
+def _prompt_cache_summary(usage: dict) -> dict:
+    """Token usage for a scoring run, with the share of input served from the cached prefix."""
+    cache_read = usage.get("cache_read_input_tokens", 0)
+    total_input = cache_read + usage.get("cache_creation_input_tokens", 0) + usage.get("input_tokens", 0)
+    return {
+        **usage,
+        "prefix_reuse_ratio": round(cache_read / total_input, 4) if total_input else None,
+    }
+
+
+@router.get("/api/projects/{project_id}/score/batches/{batch_id}")
+async def get_scoring_batch(project_id: UUID, batch_id: UUID, db: Session = Depends(get_db)):
+    """Poll an offline scoring batch, applying its results once the provider has finished."""
+    batch = await asyncio.to_thread(_lock_scoring_batch, db, batch_id, project_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Scoring batch not found")
+    
+    if batch.status == "submitted":
+        snapshot = await asyncio.to_thread(load_project_snapshot, db, project_id)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Project not found")
+        try:
+            ai_service = get_ai_service()
+            await refresh_scoring_batch(db, batch, snapshot, ai_service, get_batch_transport(ai_service))
+            await asyncio.to_thread(db.commit)
+        except Exception as e:
+            await asyncio.to_thread(db.rollback)
+            logger.exception(f"Error refreshing scoring batch {batch_id}")
+            raise HTTPException(status_code=502, detail=f"Could not refresh scoring batch: {str(e)}")
+    
+    return scoring_batch_summary(batch)
+
+
+@router.get("/api/ai/scoring/concurrency")
+def get_scoring_concurrency():
+    """Current adaptive concurrency window for AI scoring calls."""
+    return get_scoring_limiter().snapshot()
+
+
+@router.get("/api/ai/rate-limits")
+def get_ai_rate_limits():
+    """Queue depth, wait times and remaining budget of the shared LLM rate limiters."""
+    return rate_limit_snapshot()
+
+
+@router.get("/api/ai/providers")
+def get_ai_provider_health():
+    """Circuit breaker state, hedged-call counters and latency percentiles per LLM provider."""
+    return provider_health_snapshot()
+
+
+@router.get("/api/ai/coalescing")
+def get_ai_coalescing_stats():
+    """Counters of executed and coalesced project-level AI operations."""
+    return get_singleflight().snapshot()
+
+
+@router.get("/api/ai/cache/stats")
+def get_ai_response_cache_stats():
+    """Hit/miss counters for the persistent AI response cache."""
+    return get_response_cache().stats()
+
+
 @router.post("/api/ai/optimize-project")
 async def optimize_project_with_ai(request: dict):
     """Use AI to suggest component type and description for a project."""
@@ -360,22 +620,37 @@ async def optimize_project_with_ai(request: dict):
     
     try:
         ai_service = get_ai_service()
-        result = ai_service.optimize_project(project_name)
+        # The sync client may wait on the shared rate limiter; keep it off the event loop
+        result = await asyncio.to_thread(ai_service.optimize_project, project_name)
         return result
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (ValueError, RuntimeError) as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/api/ai/optimize-criteria/{project_id}")
 async def optimize_criteria_with_ai(project_id: UUID, db: Session = Depends(get_db)):
-    """Use AI to suggest evaluation criteria for a project."""
+    """Use AI to suggest evaluation criteria for a project.
+    Concurrent requests for the same project revision share one AI call.
+    """
+    return await _coalesced(
+        db, project_id, ("optimize_criteria",),
+        lambda session: _suggest_criteria(project_id, session)
+    )
+
+
+async def _suggest_criteria(project_id: UUID, db: Session):
+    """Ask the AI for evaluation criteria suited to the project."""
     project = db.query(models.Project).filter(models.Project.id == project_id).first()
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
     try:
         ai_service = get_ai_service()
-        criteria_suggestions = ai_service.optimize_criteria(
+        # The sync client may wait on the shared rate limiter; keep it off the event loop
+        criteria_suggestions = await asyncio.to_thread(
+            ai_service.optimize_criteria,
             project_name=project.name,
             component_type=project.component_type,
             description=project.description
@@ -393,6 +668,8 @@ async def optimize_criteria_with_ai(project_id: UUID, db: Session = Depends(get_
         ]
         
         return {"status": "success", "criteria": suggested_criteria}
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (ValueError, RuntimeError) as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -406,71 +683,143 @@ async def ai_chat(request: dict):
     
     try:
         ai_service = get_ai_service()
-        response_text = ai_service.chat(question)
+        response_text = await ai_service.chat_async(question)
         return {"response": response_text, "status": "success"}
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (ValueError, RuntimeError) as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/api/projects/{project_id}/generate-report")
-async def generate_trade_study_report(project_id: UUID, db: Session = Depends(get_db)):
-    """Generate a comprehensive trade study report using AI."""
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
-        raise HTTPException(status_code=404, detail="Project not found")
-    
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
-    
-    if not components:
-        raise HTTPException(status_code=400, detail="No components found for this project")
-    if not criteria:
-        raise HTTPException(status_code=400, detail="No criteria found for this project")
-    
-    all_scores = db.query(models.Score).join(models.Component).filter(
-        models.Component.project_id == project_id
-    ).all()
-    
-    if not all_scores:
-        raise HTTPException(status_code=400, detail="No scores found. Please score components first.")
-    
-    scores_dict = {(str(score.component_id), str(score.criterion_id)): score for score in all_scores}
+async def generate_trade_study_report(
+    project_id: UUID,
+    run_async: bool = Query(False, alias="async"),
+    db: Session = Depends(get_db)
+):
+    """Generate a comprehensive trade study report using AI.
+    With async=true, the report is generated by a background job and 202 is
+    returned with the job to poll at GET /api/jobs/{job_id}.
+    Concurrent requests on the same project revision share one generation.
+    """
+    if run_async:
+        return await asyncio.to_thread(_enqueue_project_job, db, project_id, "generate_report", {})
     
-    scoring_service = get_scoring_service()
-    results = scoring_service.calculate_weighted_scores(components, criteria, scores_dict)
+    return await _coalesced(
+        db, project_id, ("generate_report",),
+        lambda session: _generate_report(project_id, session)
+    )
+
+
+async def _generate_report(project_id: UUID, db: Session):
+    """Generate a trade study report and save it on the project."""
+    rankings = _load_report_rankings(db, project_id)
+    project = rankings.project
     
     try:
         ai_service = get_ai_service()
-        
-        components_data = _prepare_components_data(results, criteria, scores_dict)
-        criteria_summary = _prepare_criteria_summary(criteria)
-        
-        report = await asyncio.to_thread(
-            ai_service.generate_trade_study_report,
-            project_name=project.name,
-            project_description=project.description,
-            component_type=project.component_type,
-            criteria=criteria_summary,
-            components=components_data
-        )
-        
-        project.trade_study_report = report
-        project.report_generated_at = datetime.utcnow()
-        log_project_change(
-            db, project_id=project_id, change_type="report_generated",
-            description="Generated trade study report", entity_type="system",
-            new_value={"generated_at": project.report_generated_at.isoformat() if project.report_generated_at else None},
-        )
-        db.commit()
+        report = await ai_service.generate_trade_study_report_async(**_report_request(rankings))
+        _save_report(db, project, report)
         db.refresh(project)
         
         return {"status": "success", "report": report, "generated_at": project.report_generated_at}
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except (ValueError, RuntimeError) as e:
         raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Report generation failed: {str(e)}")
 
 
+@router.get("/api/projects/{project_id}/generate-report/stream")
+async def stream_trade_study_report(project_id: UUID, db: Session = Depends(get_db)):
+    """Generate a trade study report, streaming it as Server-Sent Events.
+    
+    Emits ``delta`` events ({"text": ...}) as tokens arrive, then a ``done``
+    event ({"generated_at": ...}) once the full report has been saved to the
+    project, or an ``error`` event ({"detail": ...}) if generation fails.
+    Nothing is saved when the stream fails or the client disconnects.
+    """
+    rankings = _load_report_rankings(db, project_id)
+    try:
+        ai_service = get_ai_service()
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    request = _report_request(rankings)
+    
+    async def events():
+        parts: list[str] = []
+        try:
+            async for text in ai_service.stream_trade_study_report_async(**request):
+                parts.append(text)
+                yield _sse_event("delta", {"text": text})
+        except Exception as e:
+            logger.error(f"Streaming report generation failed for project {project_id}: {e}")
+            yield _sse_event("error", {"detail": f"Report generation failed: {str(e)}"})
+            return
+        
+        # The request session may already be closed once streaming starts
+        save_db = SessionLocal()
+        try:
+            project = save_db.query(models.Project).filter(models.Project.id == project_id).first()
+            if project is None:
+                yield _sse_event("error", {"detail": "Project not found"})
+                return
+            _save_report(save_db, project, "".join(parts))
+            yield _sse_event("done", {"generated_at": project.report_generated_at})
+        finally:
+            save_db.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+
+def _load_report_rankings(db: Session, project_id: UUID):
+    """Rankings for report generation; raises if the project is not ready for a report."""
+    rankings = get_project_rankings(db, project_id)
+    if not rankings:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if not rankings.components:
+        raise HTTPException(status_code=400, detail="No components found for this project")
+    if not rankings.criteria:
+        raise HTTPException(status_code=400, detail="No criteria found for this project")
+    if not rankings.scores:
+        raise HTTPException(status_code=400, detail="No scores found. Please score components first.")
+    return rankings
+
+
+def _report_request(rankings) -> dict:
+    """Arguments for the AI report generation calls."""
+    project = rankings.project
+    return {
+        "project_name": project.name,
+        "project_description": project.description,
+        "component_type": project.component_type,
+        "criteria": _prepare_criteria_summary(rankings.criteria),
+        "components": _prepare_components_data(rankings.results, rankings.criteria, rankings.scores_dict),
+    }
+
+
+def _save_report(db: Session, project: models.Project, report: str):
+    """Store a generated report on the project and log the change."""
+    project.trade_study_report = report
+    project.report_generated_at = datetime.now(timezone.utc)
+    log_project_change(
+        db, project_id=project.id, change_type="report_generated",
+        description="Generated trade study report", entity_type="system",
+        new_value={"generated_at": project.report_generated_at.isoformat() if project.report_generated_at else None},
+    )
+    db.commit()
+
+
 def _prepare_components_data(results, criteria, scores_dict):
     """Prepare component data for report generation."""
     components_data = []
@@ -479,7 +828,7 @@ def _prepare_components_data(results, criteria, scores_dict):
         component_scores = []
         
         for criterion in criteria:
-            key = (str(component.id), str(criterion.id))
+            key = (component.id, criterion.id)
             if key in scores_dict:
                 score = scores_dict[key]
                 component_scores.append({
@@ -517,6 +866,106 @@ def _prepare_criteria_summary(criteria):
     ]
 
 
+async def _coalesced(db: Session, project_id: UUID, operation: tuple, run):
+    """
+    Run ``run(session)`` once for concurrent identical requests.
+    
+    Requests are identical when they target the same project, operation
+    (including its parameters) and project revision. The shared run gets its
+    own session, since the request that started it may finish first.
+    """
+    revision = await asyncio.to_thread(
+        lambda: db.query(models.Project.revision).filter(models.Project.id == project_id).scalar()
+    )
+    if revision is None:
+        # Unknown project: let the operation raise its usual 404
+        return await run(db)
+    
+    async def shared():
+        session = SessionLocal()
+        try:
+            return await run(session)
+        finally:
+            session.close()
+    
+    return await get_singleflight().do((project_id, operation, revision), shared)
+
+
+def _enqueue_project_job(db: Session, project_id: UUID, kind: str, payload: dict) -> JSONResponse:
+    """Queue a project-level job and answer 202 with its status."""
+    exists = db.query(models.Project.id).filter(models.Project.id == project_id).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Project not found")
+    job = enqueue_job(db, kind, {**payload, "project_id": str(project_id)}, project_id=project_id)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(job_summary(job)))
+
+
+@job_handler("score_project")
+async def _run_score_project_job(db: Session, payload: dict):
+    return await score_all_components(
+        UUID(payload["project_id"]), mode=payload.get("mode", "all"), run_async=False, db=db
+    )
+
+
+async def _stop_scoring_batch(db: Session, batch_id: UUID, reason: str):
+    """Cancel a still-submitted batch at the provider, so it is no longer processed and billed."""
+    batch = await asyncio.to_thread(_lock_scoring_batch, db, batch_id)
+    if batch is None or batch.status != "submitted":
+        await asyncio.to_thread(db.rollback)
+        return
+    ai_service = get_ai_service()
+    await cancel_scoring_batch(db, batch, get_batch_transport(ai_service), reason)
+    await asyncio.to_thread(db.commit)
+
+
+async def _cancel_polled_scoring_batch(db: Session, payload: dict):
+    await _stop_scoring_batch(db, UUID(payload["batch_id"]), "Polling was canceled")
+
+
+@job_handler("poll_scoring_batch", on_cancel=_cancel_polled_scoring_batch)
+async def _run_poll_scoring_batch_job(db: Session, payload: dict):
+    """
+    Check an offline scoring batch once and apply its results if the provider has finished.
+    
+    While the batch is still processing, the job is rescheduled rather than
+    waiting, so it holds no worker slot between checks.
+    """
+    project_id = UUID(payload["project_id"])
+    batch_id = UUID(payload["batch_id"])
+    deadline = datetime.fromisoformat(payload["deadline"])
+    
+    batch = await asyncio.to_thread(_lock_scoring_batch, db, batch_id)
+    if batch is None:
+        return {"status": "missing", "batch_id": str(batch_id)}
+    
+    if batch.status == "submitted":
+        snapshot = await asyncio.to_thread(load_project_snapshot, db, project_id)
+        if not snapshot:
+            await asyncio.to_thread(db.rollback)
+            return {"status": "missing", "batch_id": str(batch_id)}
+        try:
+            ai_service = get_ai_service()
+            await refresh_scoring_batch(db, batch, snapshot, ai_service, get_batch_transport(ai_service))
+        except Exception as e:
+            # A failed check is retried at the next interval
+            await asyncio.to_thread(db.rollback)
+            logger.warning(f"Could not refresh scoring batch {batch_id}: {e}")
+    await asyncio.to_thread(db.commit)
+    
+    if batch.status != "submitted":
+        return scoring_batch_summary(batch)
+    if datetime.now(timezone.utc) >= deadline:
+        message = f"Scoring batch {batch_id} did not end within {SCORING_BATCH_POLL_TIMEOUT_SECONDS:.0f}s"
+        await _stop_scoring_batch(db, batch_id, message)
+        raise TimeoutError(message)
+    raise RescheduleJob(SCORING_BATCH_POLL_INTERVAL_SECONDS)
+
+
+@job_handler("generate_report")
+async def _run_generate_report_job(db: Session, payload: dict):
+    return await generate_trade_study_report(UUID(payload["project_id"]), run_async=False, db=db)
+
+
 @router.get("/api/projects/{project_id}/report", response_model=schemas.TradeStudyReportResponse)
 def get_trade_study_report(project_id: UUID, db: Session = Depends(get_db)):
     """Fetch the most recent trade study report for a project."""
@@ -533,25 +982,18 @@ def get_trade_study_report(project_id: UUID, db: Session = Depends(get_db)):
 @router.get("/api/projects/{project_id}/report/pdf")
 def download_trade_study_report_pdf(project_id: UUID, db: Session = Depends(get_db)):
     """Download the stored trade study report as a professional PDF file."""
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    # Fetch data for professional PDF
+    rankings = get_project_rankings(db, project_id)
+    if not rankings:
         raise HTTPException(status_code=404, detail="Project not found")
+    project = rankings.project
     
     if not project.trade_study_report:
         raise HTTPException(status_code=404, detail="No trade study report found. Please generate a report first by clicking 'Generate Study Report' on the Component Discovery page.")
     
-    # Fetch data for professional PDF
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
-    all_scores = db.query(models.Score).join(models.Component).filter(
-        models.Component.project_id == project_id
-    ).all()
+    logger.info(f"PDF Generation - Project {project_id}: components={len(rankings.components)}, criteria={len(rankings.criteria)}, scores={len(rankings.scores)}")
     
-    logger.info(f"PDF Generation - Project {project_id}: components={len(components)}, criteria={len(criteria)}, scores={len(all_scores)}")
-    
-    from app.services.pdf_report_service import get_pdf_service, REPORTLAB_AVAILABLE
-    
-    pdf_buffer = _generate_pdf_buffer(project, components, criteria, all_scores)
+    pdf_buffer = _generate_pdf_buffer(project, rankings)
     
     safe_name = _sanitize_filename(project.name or "trade_study")
     filename = f"trade_study_report_{safe_name}.pdf"
@@ -563,7 +1005,7 @@ def download_trade_study_report_pdf(project_id: UUID, db: Session = Depends(get_
     )
 
 
-def _generate_pdf_buffer(project, components, criteria, all_scores):
+def _generate_pdf_buffer(project, rankings):
     """Generate PDF buffer with professional or fallback PDF."""
     from app.services.pdf_report_service import get_pdf_service, REPORTLAB_AVAILABLE
     
@@ -571,16 +1013,12 @@ def _generate_pdf_buffer(project, components, criteria, all_scores):
         logger.warning("reportlab not available - generating text-only PDF")
         return build_report_pdf(project.trade_study_report)
     
-    if not components or not criteria or not all_scores:
+    if not rankings.components or not rankings.criteria or not rankings.scores:
         logger.warning(f"Missing data for professional PDF")
         return build_report_pdf(project.trade_study_report)
     
-    scores_dict = {(str(s.component_id), str(s.criterion_id)): s for s in all_scores}
-    scoring_service = get_scoring_service()
-    results = scoring_service.calculate_weighted_scores(components, criteria, scores_dict)
-    
-    components_data = _prepare_components_data(results, criteria, scores_dict)
-    criteria_data = _prepare_criteria_summary(criteria)
+    components_data = _prepare_components_data(rankings.results, rankings.criteria, rankings.scores_dict)
+    criteria_data = _prepare_criteria_summary(rankings.criteria)
     
     try:
         pdf_service = get_pdf_service()
@@ -605,14 +1043,14 @@ def _sanitize_filename(name: str) -> str:
     return "".join(ch if ch.isalnum() or ch in ("_", "-") else "_" for ch in safe_name)
 
 
-def _generate_basic_report(project, components, criteria, all_scores):
+def _generate_basic_report(project, rankings):
     """Generate a basic trade study report from project data if no AI-generated report exists."""
-    scores_dict = {(str(s.component_id), str(s.criterion_id)): s for s in all_scores}
-    scoring_service = get_scoring_service()
-    results = scoring_service.calculate_weighted_scores(components, criteria, scores_dict)
+    components = rankings.components
+    criteria = rankings.criteria
+    scores_dict = rankings.scores_dict
     
     # Sort by rank
-    sorted_results = sorted(results, key=lambda x: x.get("rank", 999))
+    sorted_results = sorted(rankings.results, key=lambda x: x.get("rank", 999))
     
     report_lines = [
         f"# {project.name}",
@@ -664,7 +1102,7 @@ def _generate_basic_report(project, components, criteria, all_scores):
         # Get scores for this component
         component_scores = []
         for criterion in criteria:
-            key = (str(component.id), str(criterion.id))
+            key = (component.id, criterion.id)
             if key in scores_dict:
                 score = scores_dict[key]
                 component_scores.append({
@@ -715,24 +1153,18 @@ def download_trade_study_report_docx(project_id: UUID, db: Session = Depends(get
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Get project data
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
-    all_scores = db.query(models.Score).join(models.Component).filter(
-        models.Component.project_id == project_id
-    ).all()
-    
     # Use stored report if available, otherwise generate a basic one
     if project.trade_study_report:
         report_text = project.trade_study_report
-    elif components and criteria:
-        # Generate basic report from data
-        report_text = _generate_basic_report(project, components, criteria, all_scores)
     else:
-        raise HTTPException(
-            status_code=400,
-            detail="No report available. Please add components and criteria, or generate a report first."
-        )
+        rankings = get_project_rankings(db, project_id)
+        if not rankings or not rankings.components or not rankings.criteria:
+            raise HTTPException(
+                status_code=400,
+                detail="No report available. Please add components and criteria, or generate a report first."
+            )
+        # Generate basic report from data
+        report_text = _generate_basic_report(project, rankings)
     
     word_service = get_word_service()
     docx_buffer = word_service.generate_report_docx(report_text)
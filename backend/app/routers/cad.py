@@ -2,6 +2,7 @@
 
 from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
 from sqlalchemy.orm import Session
+import asyncio
 import pandas as pd
 import io
 import logging
@@ -441,13 +442,14 @@ async def analyze_cad_file(
         filename_lower = file.filename.lower()
 
         # Parse file
+        # Geometry analysis and the blocking AI calls (which may wait on the rate limiter) run in a thread
         if filename_lower.endswith(('.stl', '.step', '.stp', '.obj', '.fbx', '.3mf', '.iges', '.igs', '.dae', '.gltf', '.glb')):
             # For 3D model files, split by geometry first with AI as a fallback
-            components = analyze_3d_model(content, file.filename)
+            components = await asyncio.to_thread(analyze_3d_model, content, file.filename)
         else:
             # Fallback to Excel/CSV parsing if provided
             df = parse_excel_or_csv(content, file.filename)
-            components = analyze_with_ai(df)
+            components = await asyncio.to_thread(analyze_with_ai, df)
 
         # Calculate summary
         longest_component = max(components, key=lambda c: c.totalDays) if components else None
@@ -10,6 +10,8 @@ from app import models, schemas
 from app.database import get_db
 from app.services.excel_service import get_excel_service
 from app.services.change_logger import log_project_change
+from app.services.datasheet_contents import release_datasheet_contents
+from app.services.ranking_cache import bump_project_revision
 
 router = APIRouter(tags=["components"])
 
@@ -51,6 +53,7 @@ def add_component(project_id: UUID, component: schemas.ComponentCreateInput, db:
         entity_id=db_component.id,
         new_value=_component_snapshot(db_component),
     )
+    bump_project_revision(db, project_id)
     db.commit()
     db.refresh(db_component)
     return db_component
@@ -86,6 +89,7 @@ def update_component(component_id: UUID, component_update: schemas.ComponentUpda
         new_value=_component_snapshot(db_component),
     )
 
+    bump_project_revision(db, db_component.project_id)
     db.commit()
     db.refresh(db_component)
     return db_component
@@ -99,6 +103,8 @@ def delete_component(component_id: UUID, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Component not found")
 
     snapshot = _component_snapshot(db_component)
+    datasheet_doc = db_component.datasheet_document
+    datasheet_sha256 = datasheet_doc.content_sha256 if datasheet_doc else None
     db.delete(db_component)
     log_project_change(
         db,
@@ -109,7 +115,9 @@ def delete_component(component_id: UUID, db: Session = Depends(get_db)):
         entity_id=component_id,
         old_value=snapshot,
     )
+    bump_project_revision(db, db_component.project_id)
     db.commit()
+    release_datasheet_contents(db, [datasheet_sha256])
     return None
 
 
@@ -149,6 +157,7 @@ async def upload_components_excel(project_id: UUID, file: UploadFile = File(...)
             )
             created_components.append(db_component)
 
+        bump_project_revision(db, project_id)
         db.commit()
 
         return {
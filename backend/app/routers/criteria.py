@@ -10,6 +10,7 @@ from app import models, schemas
 from app.database import get_db
 from app.services.excel_service import get_excel_service
 from app.services.change_logger import log_project_change
+from app.services.ranking_cache import bump_project_revision
 
 router = APIRouter(tags=["criteria"])
 
@@ -45,6 +46,7 @@ def add_criterion(project_id: UUID, criterion: schemas.CriterionBase, db: Sessio
         entity_id=db_criterion.id,
         new_value=_criterion_snapshot(db_criterion),
     )
+    bump_project_revision(db, project_id)
     db.commit()
     db.refresh(db_criterion)
     return db_criterion
@@ -80,6 +82,7 @@ def update_criterion(criterion_id: UUID, criterion_update: schemas.CriterionBase
         new_value=_criterion_snapshot(db_criterion),
     )
 
+    bump_project_revision(db, db_criterion.project_id)
     db.commit()
     db.refresh(db_criterion)
     return db_criterion
@@ -103,6 +106,7 @@ def delete_criterion(criterion_id: UUID, db: Session = Depends(get_db)):
         entity_id=criterion_id,
         old_value=snapshot,
     )
+    bump_project_revision(db, db_criterion.project_id)
     db.commit()
     return None
 
@@ -135,6 +139,7 @@ async def upload_criteria_excel(project_id: UUID, file: UploadFile = File(...),
             )
             created_criteria.append(db_criterion)
 
+        bump_project_revision(db, project_id)
         db.commit()
 
         return {
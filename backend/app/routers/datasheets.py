@@ -1,27 +1,44 @@
 """Datasheet management endpoints for PDF upload, parsing, and querying."""
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from uuid import UUID
 from pathlib import Path
 from typing import Optional, Tuple, List
 from urllib.parse import urljoin
+from datetime import datetime, timezone
+import asyncio
+import logging
+import os
 import shutil
+import time
+import uuid
 import httpx
 import re
 
 from app import models, schemas
-from app.database import get_db
+from app.database import SessionLocal, get_db
 from app.datasheets import parser
+from app.datasheets.search_index import ChunkIndex, get_index_cache
 from app.ai import datasheet_client
 from app.utils.file_helpers import is_pdf_content
+from app.services.ranking_cache import bump_project_revision
+from app.services.blob_store import content_hash, get_blob_store
+from app.services.datasheet_contents import content_parse_in_progress, content_referenced, release_datasheet_contents
+from app.services.jobs import enqueue_job, job_handler
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["datasheets"])
 
 
 MAX_DATASHEET_SIZE = 50 * 1024 * 1024  # 50MB
-DATASHEETS_DIR = Path("datasheets")
-DATASHEETS_DIR.mkdir(exist_ok=True)
+# How often a parse job writes its pages-done progress
+DATASHEET_PROGRESS_INTERVAL_SECONDS = float(os.getenv("DATASHEET_PROGRESS_INTERVAL_SECONDS", "1"))
+# Rows per multi-row INSERT of parsed pages; 5 columns each stays under SQLite's 999-parameter limit
+PAGE_INSERT_BATCH_SIZE = 150
 PDF_LINK_PATTERN = re.compile(r'href=["\']([^"\']+\.pdf(?:\?[^"\']*)?)["\']', re.IGNORECASE)
 
 
@@ -75,67 +92,100 @@ async def _download_pdf_from_url(url: str) -> Tuple[bytes, str]:
     )
 
 
-def _save_and_parse_datasheet(
+def _get_or_create_content(db: Session, sha256: str, blob_path: Path, size_bytes: int) -> models.DatasheetContent:
+    """
+    The shared content row for a stored blob, created on first upload.
+    
+    The row stays locked until the caller commits, so a parse job cannot
+    finish between reading its status and registering a waiting document,
+    and the content cannot be collected before the document references it.
+    """
+    content = db.query(models.DatasheetContent).filter(
+        models.DatasheetContent.sha256 == sha256
+    ).with_for_update().first()
+    if content:
+        return content
+    content = models.DatasheetContent(
+        sha256=sha256,
+        file_path=str(blob_path),
+        size_bytes=size_bytes,
+        parse_status="pending"
+    )
+    try:
+        # Flushed in a savepoint; it is committed with the rest of the upload
+        with db.begin_nested():
+            db.add(content)
+        return content
+    except IntegrityError:
+        # The same file was uploaded concurrently, fetch its row
+        return db.query(models.DatasheetContent).filter(
+            models.DatasheetContent.sha256 == sha256
+        ).with_for_update().one()
+
+
+def _mark_document_parsed(db: Session, datasheet_doc: models.DatasheetDocument, content: models.DatasheetContent):
+    """Point a document at successfully parsed content and expose it on its component."""
+    datasheet_doc.parse_status = "success"
+    datasheet_doc.parse_error = None
+    datasheet_doc.num_pages = content.num_pages
+    datasheet_doc.pages_parsed = content.num_pages
+    datasheet_doc.parsed_at = datetime.now(timezone.utc)
+    component = datasheet_doc.component
+    component.datasheet_file_path = datasheet_doc.file_path
+    bump_project_revision(db, component.project_id)
+
+
+def _save_and_queue_datasheet(
     component: models.Component,
     file_bytes: bytes,
     filename: str,
     db: Session
-):
-    file_path = DATASHEETS_DIR / f"{component.id}.pdf"
-
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_bytes)
-
-    existing_doc = db.query(models.DatasheetDocument).filter(
+) -> dict:
+    """
+    Store an uploaded datasheet and make sure its content gets parsed.
+    
+    Files are stored and parsed once per distinct content (SHA-256). If the
+    same bytes were parsed before, the document is ready immediately; if they
+    are being parsed, it waits for that job; otherwise a parse_datasheet job
+    is queued. Clients poll the status endpoint for progress. Content the
+    document pointed at before is released once the upload is committed.
+    """
+    blob_store = get_blob_store()
+    sha256 = content_hash(file_bytes)
+    blob_path = blob_store.path_for(sha256)
+    content = _get_or_create_content(db, sha256, blob_path, len(file_bytes))
+    # Written under the content lock, so it replaces a blob collected just before
+    blob_store.put(file_bytes)
+
+    previous_sha256 = None
+    datasheet_doc = db.query(models.DatasheetDocument).filter(
         models.DatasheetDocument.component_id == component.id
     ).first()
-
-    if existing_doc:
+    if datasheet_doc:
+        if datasheet_doc.content_sha256 != sha256:
+            previous_sha256 = datasheet_doc.content_sha256
+        # Pages parsed for this document alone predate shared content and are no longer read
         db.query(models.DatasheetPage).filter(
-            models.DatasheetPage.datasheet_id == existing_doc.id
-        ).delete()
-
-        existing_doc.original_filename = filename
-        existing_doc.file_path = str(file_path)
-        existing_doc.parse_status = "pending"
-        existing_doc.parse_error = None
-        existing_doc.num_pages = None
-        existing_doc.suggested_questions = None
-        db.commit()
-        datasheet_doc = existing_doc
+            models.DatasheetPage.datasheet_id == datasheet_doc.id
+        ).delete(synchronize_session=False)
+        datasheet_doc.search_index = None
     else:
-        datasheet_doc = models.DatasheetDocument(
-            component_id=component.id,
-            original_filename=filename,
-            file_path=str(file_path),
-            parse_status="pending"
-        )
+        datasheet_doc = models.DatasheetDocument(component=component)
         db.add(datasheet_doc)
+    datasheet_doc.original_filename = filename
+    datasheet_doc.file_path = str(blob_path)
+    datasheet_doc.content_sha256 = sha256
+    datasheet_doc.parse_error = None
+    datasheet_doc.suggested_questions = None
+
+    if content.parse_status == "success":
+        _mark_document_parsed(db, datasheet_doc, content)
         db.commit()
-        db.refresh(datasheet_doc)
-
-    try:
-        parsed_pages = parser.parse_pdf_to_pages(str(file_path))
-
-        for parsed_page in parsed_pages:
-            db_page = models.DatasheetPage(
-                datasheet_id=datasheet_doc.id,
-                page_number=parsed_page.page_number,
-                raw_text=parsed_page.raw_text,
-                section_title=parsed_page.section_title
-            )
-            db.add(db_page)
-
-        datasheet_doc.parse_status = "success"
-        datasheet_doc.num_pages = len(parsed_pages)
-        component.datasheet_file_path = str(file_path)
-
-        db.commit()
-        db.refresh(datasheet_doc)
-
+        release_datasheet_contents(db, [previous_sha256])
         return {
             "status": "success",
-            "message": "Datasheet uploaded and parsed successfully",
+            "message": "Datasheet uploaded; identical content was already parsed",
+            "job_id": None,
             "datasheet": {
                 "num_pages": datasheet_doc.num_pages,
                 "parsed_at": datasheet_doc.parsed_at,
@@ -143,23 +193,221 @@ def _save_and_parse_datasheet(
             }
         }
 
-    except Exception as parse_error:
-        datasheet_doc.parse_status = "failed"
-        datasheet_doc.parse_error = str(parse_error)
+    # Queries wait for "success"; the parse job marks every document waiting on this content
+    datasheet_doc.parse_status = "pending"
+    datasheet_doc.num_pages = None
+    datasheet_doc.pages_parsed = 0
+    if not content_parse_in_progress(db, content):
+        content.parse_status = "pending"
+        content.parse_error = None
+        job = enqueue_job(db, "parse_datasheet", {"sha256": sha256})
+        content.parse_job_id = job.id
+    db.commit()
+    release_datasheet_contents(db, [previous_sha256])
+
+    return {
+        "status": "pending",
+        "message": "Datasheet uploaded; parsing has started",
+        "job_id": str(content.parse_job_id),
+        "datasheet": {
+            "num_pages": datasheet_doc.num_pages,
+            "parsed_at": datasheet_doc.parsed_at,
+            "parse_status": datasheet_doc.parse_status
+        }
+    }
+
+
+def _waiting_documents(db: Session, sha256: str):
+    """Documents pending on the given content."""
+    return db.query(models.DatasheetDocument).filter(
+        models.DatasheetDocument.content_sha256 == sha256,
+        models.DatasheetDocument.parse_status == "pending"
+    )
+
+
+class _ParseProgress:
+    """Records pages parsed so far on documents waiting for content, at most once per DATASHEET_PROGRESS_INTERVAL_SECONDS."""
+
+    def __init__(self, sha256: str):
+        self.sha256 = sha256
+        self._last_write = 0.0
+
+    def __call__(self, pages_done: int, total_pages: int):
+        now = time.monotonic()
+        if 0 < pages_done < total_pages and now - self._last_write < DATASHEET_PROGRESS_INTERVAL_SECONDS:
+            return
+        self._last_write = now
+        # Called from the parsing thread, so it uses its own session
+        db = SessionLocal()
+        try:
+            _waiting_documents(db, self.sha256).update(
+                {
+                    models.DatasheetDocument.pages_parsed: pages_done,
+                    models.DatasheetDocument.num_pages: total_pages,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+        except Exception as e:
+            logger.warning(f"Could not record parse progress for datasheet content {self.sha256}: {e}")
+        finally:
+            db.close()
+
+
+def _replace_content_pages(db: Session, sha256: str, parsed_pages: List[parser.ParsedPage]):
+    """
+    Replace the stored pages of a content with ``parsed_pages``.
+    
+    Rows are written with multi-row INSERT statements rather than one ORM
+    object per page; the caller commits, so readers never see a partial set.
+    """
+    db.query(models.DatasheetContentPage).filter(
+        models.DatasheetContentPage.content_sha256 == sha256
+    ).delete(synchronize_session=False)
+    for start in range(0, len(parsed_pages), PAGE_INSERT_BATCH_SIZE):
+        db.execute(insert(models.DatasheetContentPage).values([
+            {
+                "id": uuid.uuid4(),
+                "content_sha256": sha256,
+                "page_number": parsed_page.page_number,
+                "raw_text": parsed_page.raw_text,
+                "section_title": parsed_page.section_title,
+            }
+            for parsed_page in parsed_pages[start:start + PAGE_INSERT_BATCH_SIZE]
+        ]))
+
+
+@job_handler("parse_datasheet")
+async def _run_parse_datasheet_job(db: Session, payload: dict):
+    """Parse and index one datasheet content, then mark every document waiting on it parsed."""
+    sha256 = payload["sha256"]
+
+    def load_content() -> Optional[models.DatasheetContent]:
+        # Locked like in uploads, so no document can start waiting while waiters are being released
+        return db.query(models.DatasheetContent).filter(
+            models.DatasheetContent.sha256 == sha256
+        ).with_for_update().first()
+
+    content = load_content()
+    if content is None:
+        return {"status": "missing", "sha256": sha256}
+    if content.parse_status != "success":
+        file_path = content.file_path
+        # Release the read transaction while the PDF is parsed
         db.commit()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to parse PDF: {str(parse_error)}"
-        )
+
+        try:
+            if not os.path.exists(file_path):
+                # Uploads are written by the web process; a worker elsewhere needs the same storage
+                raise FileNotFoundError(
+                    f"Datasheet file {file_path} is not available to this job worker; "
+                    "DATASHEET_BLOB_DIR must be storage shared with the web service"
+                )
+            # PDF extraction is CPU-bound; keep it off the event loop
+            parsed_pages = await asyncio.to_thread(parser.parse_pdf_to_pages, file_path, _ParseProgress(sha256))
+            # Chunked and indexed once here so each question is an index lookup
+            search_index = await asyncio.to_thread(lambda: parser.build_chunk_index(parsed_pages).to_json())
+        except Exception as parse_error:
+            content = load_content()
+            content.parse_status = "failed"
+            content.parse_error = str(parse_error)
+            content.parse_job_id = None
+            for datasheet_doc in _waiting_documents(db, sha256).all():
+                datasheet_doc.parse_status = "failed"
+                datasheet_doc.parse_error = str(parse_error)
+            db.commit()
+            if not content_referenced(db, sha256):
+                release_datasheet_contents(db, [sha256])
+            raise Exception(f"Failed to parse PDF: {str(parse_error)}")
+
+        content = load_content()
+        _replace_content_pages(db, sha256, parsed_pages)
+
+        content.search_index = search_index
+        content.parse_status = "success"
+        content.parse_error = None
+        content.num_pages = len(parsed_pages)
+        content.parsed_at = datetime.now(timezone.utc)
+        content.parse_job_id = None
+
+    waiting = _waiting_documents(db, sha256).all()
+    for datasheet_doc in waiting:
+        _mark_document_parsed(db, datasheet_doc, content)
+
+    # Pages, index and document statuses become visible together
+    db.commit()
+    if not content_referenced(db, sha256):
+        # Every document moved on while this content was parsing
+        release_datasheet_contents(db, [sha256])
+
+    return {"status": "success", "sha256": sha256, "num_pages": content.num_pages, "documents": len(waiting)}
+
+
+def _sync_with_content(db: Session, datasheet_doc: models.DatasheetDocument):
+    """Settle a document still pending on content that has finished parsing (e.g. without row locks on SQLite)."""
+    if datasheet_doc.parse_status != "pending" or datasheet_doc.content is None:
+        return
+    content = datasheet_doc.content
+    if content.parse_status == "success":
+        _mark_document_parsed(db, datasheet_doc, content)
+    elif content.parse_status == "failed":
+        datasheet_doc.parse_status = "failed"
+        datasheet_doc.parse_error = content.parse_error
+    else:
+        return
+    db.commit()
 
 
-@router.post("/api/components/{component_id}/datasheet")
+def _datasheet_pages(db: Session, datasheet_doc: models.DatasheetDocument) -> list:
+    """Parsed pages of a document, in page order, from its shared content when it has one."""
+    if datasheet_doc.content_sha256:
+        return db.query(models.DatasheetContentPage).filter(
+            models.DatasheetContentPage.content_sha256 == datasheet_doc.content_sha256
+        ).order_by(models.DatasheetContentPage.page_number).all()
+    return db.query(models.DatasheetPage).filter(
+        models.DatasheetPage.datasheet_id == datasheet_doc.id
+    ).order_by(models.DatasheetPage.page_number).all()
+
+
+def _datasheet_index(db: Session, datasheet_doc: models.DatasheetDocument) -> Optional[ChunkIndex]:
+    """
+    The search index of a document, built and kept if it is missing or outdated.
+    
+    Decoded indexes are cached per process, so only the first question after
+    a parse (or restart) reads the stored index. Parsed content never
+    changes under its hash; legacy documents are keyed by their parse time.
+    
+    Returns None if the document has no parsed pages.
+    """
+    if datasheet_doc.content_sha256:
+        cache_key = f"content:{datasheet_doc.content_sha256}"
+    else:
+        cache_key = f"document:{datasheet_doc.id}:{datasheet_doc.parsed_at}"
+
+    def load() -> Optional[ChunkIndex]:
+        owner = datasheet_doc.content or datasheet_doc
+        index = ChunkIndex.from_json(owner.search_index)
+        if index is None:
+            # Parsed before indexing existed (or by an older index version)
+            pages = _datasheet_pages(db, datasheet_doc)
+            if not pages:
+                return None
+            index = parser.build_chunk_index(pages)
+            owner.search_index = index.to_json()
+            db.commit()
+        return index
+
+    return get_index_cache().get_or_load(cache_key, load)
+
+
+@router.post("/api/components/{component_id}/datasheet", status_code=202)
 async def upload_datasheet(
     component_id: UUID,
+    response: Response,
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
-    """Upload and parse a datasheet PDF for a component"""
+    """Upload a datasheet PDF for a component; it is parsed in the background (poll /datasheet/status)"""
     component = db.query(models.Component).filter(models.Component.id == component_id).first()
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
@@ -183,7 +431,11 @@ async def upload_datasheet(
         )
     
     try:
-        return _save_and_parse_datasheet(component, file_bytes, file.filename, db)
+        # Hashing, the blob write and the row lock can block; keep them off the event loop
+        result = await asyncio.to_thread(_save_and_queue_datasheet, component, file_bytes, file.filename, db)
+        if result["status"] == "success":
+            response.status_code = 200
+        return result
     except HTTPException:
         raise
     except Exception as e:
@@ -193,13 +445,14 @@ async def upload_datasheet(
         )
 
 
-@router.post("/api/components/{component_id}/datasheet/from-url")
+@router.post("/api/components/{component_id}/datasheet/from-url", status_code=202)
 async def upload_datasheet_from_url(
     component_id: UUID,
     request: schemas.DatasheetFromUrlRequest,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Download a datasheet from a URL and parse it."""
+    """Download a datasheet from a URL and queue it for parsing."""
     component = db.query(models.Component).filter(models.Component.id == component_id).first()
     if not component:
         raise HTTPException(status_code=404, detail="Component not found")
@@ -220,7 +473,10 @@ async def upload_datasheet_from_url(
         if not filename.lower().endswith(".pdf"):
             filename += ".pdf"
 
-        return _save_and_parse_datasheet(component, file_bytes, filename, db)
+        result = await asyncio.to_thread(_save_and_queue_datasheet, component, file_bytes, filename, db)
+        if result["status"] == "success":
+            response.status_code = 200
+        return result
 
     except HTTPException:
         raise
@@ -248,10 +504,13 @@ def get_datasheet_status(component_id: UUID, db: Session = Depends(get_db)):
             parsed=False
         )
     
+    _sync_with_content(db, datasheet_doc)
+    
     return schemas.DatasheetStatus(
         has_datasheet=True,
         parsed=(str(datasheet_doc.parse_status) == "success"),
         num_pages=int(datasheet_doc.num_pages) if datasheet_doc.num_pages else None,
+        pages_parsed=datasheet_doc.pages_parsed,
         parsed_at=datasheet_doc.parsed_at,
         parse_status=str(datasheet_doc.parse_status),
         parse_error=str(datasheet_doc.parse_error) if datasheet_doc.parse_error else None,
@@ -280,17 +539,15 @@ async def query_datasheet(
             detail="No datasheet uploaded for this component. Please upload a datasheet first."
         )
     
+    _sync_with_content(db, datasheet_doc)
     if str(datasheet_doc.parse_status) != "success":
         raise HTTPException(
             status_code=400,
             detail=f"Datasheet parsing failed or incomplete. Status: {datasheet_doc.parse_status}"
         )
     
-    pages = db.query(models.DatasheetPage).filter(
-        models.DatasheetPage.datasheet_id == datasheet_doc.id
-    ).order_by(models.DatasheetPage.page_number).all()
-    
-    if not pages:
+    index = _datasheet_index(db, datasheet_doc)
+    if index is None:
         raise HTTPException(status_code=400, detail="No datasheet content available")
     
     project = db.query(models.Project).filter(models.Project.id == component.project_id).first()
@@ -307,7 +564,7 @@ async def query_datasheet(
             models.Criterion.id == request.criterion_id
         ).first()
     
-    relevant_chunks = parser.retrieve_relevant_chunks(request.question, pages, max_chunks=8)
+    relevant_chunks = parser.retrieve_relevant_chunks(request.question, [], max_chunks=8, index=index)
     
     context = {
         "project": {
@@ -340,7 +597,9 @@ async def query_datasheet(
     }
     
     try:
-        ai_response = datasheet_client.ask_datasheet_ai(
+        # The Gemini client is synchronous and may wait on the shared rate limiter
+        ai_response = await asyncio.to_thread(
+            datasheet_client.ask_datasheet_ai,
             context=context,
             question=request.question,
             mode="qa"
@@ -379,11 +638,13 @@ def get_datasheet_suggestions(component_id: UUID, db: Session = Depends(get_db))
         models.DatasheetDocument.component_id == component_id
     ).first()
     
-    if datasheet_doc and datasheet_doc.suggested_questions:
+    # Suggestions are cached on the shared content, so identical datasheets reuse them
+    suggestions_owner = (datasheet_doc.content or datasheet_doc) if datasheet_doc else None
+    if suggestions_owner and suggestions_owner.suggested_questions:
         # Return cached suggestions if available
         try:
             import json
-            cached_suggestions = json.loads(datasheet_doc.suggested_questions)
+            cached_suggestions = json.loads(suggestions_owner.suggested_questions)
             if cached_suggestions and isinstance(cached_suggestions, list):
                 return schemas.DatasheetSuggestionsResponse(
                     suggestions=cached_suggestions
@@ -400,11 +661,7 @@ def get_datasheet_suggestions(component_id: UUID, db: Session = Depends(get_db))
         models.Criterion.project_id == component.project_id
     ).all()
     
-    pages: List[models.DatasheetPage] = []
-    if datasheet_doc:
-        pages = db.query(models.DatasheetPage).filter(
-            models.DatasheetPage.datasheet_id == datasheet_doc.id
-        ).order_by(models.DatasheetPage.page_number.asc()).all()
+    pages = _datasheet_pages(db, datasheet_doc) if datasheet_doc else []
 
     datasheet_chunks = []
     for page in pages[:8]:
@@ -451,9 +708,9 @@ def get_datasheet_suggestions(component_id: UUID, db: Session = Depends(get_db))
         suggestions = ai_response.get("suggestions", [])
         
         # Cache the suggestions in the database
-        if datasheet_doc and suggestions:
+        if suggestions_owner and suggestions:
             import json
-            datasheet_doc.suggested_questions = json.dumps(suggestions)
+            suggestions_owner.suggested_questions = json.dumps(suggestions)
             db.commit()
         
         return schemas.DatasheetSuggestionsResponse(
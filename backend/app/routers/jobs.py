@@ -0,0 +1,46 @@
+"""
+Background job routes.
+
+Endpoints are async so the in-process job backend can schedule work on the
+running event loop.
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from uuid import UUID
+
+from app import models, schemas
+from app.database import get_db
+from app.services.jobs import FINISHED_STATUSES, cancel_job, enqueue_job, job_summary
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+
+@router.post("", response_model=schemas.JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(job: schemas.JobCreate, db: Session = Depends(get_db)):
+    """Enqueue a background job of a registered kind."""
+    try:
+        created = enqueue_job(db, job.kind, job.payload, project_id=job.project_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job_summary(created)
+
+
+@router.get("/{job_id}", response_model=schemas.JobStatus)
+async def get_job(job_id: UUID, db: Session = Depends(get_db)):
+    """Get the status and, once finished, the result of a job."""
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_summary(job)
+
+
+@router.post("/{job_id}/cancel", response_model=schemas.JobStatus)
+async def cancel_background_job(job_id: UUID, db: Session = Depends(get_db)):
+    """Cancel a queued job or request cancellation of a running one."""
+    job = db.query(models.Job).filter(models.Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status in FINISHED_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return job_summary(cancel_job(db, job))
@@ -7,6 +7,7 @@ from sqlalchemy.exc import IntegrityError
 from uuid import UUID
 from pathlib import Path
 from typing import List, Optional, Dict, Any
+import asyncio
 import mimetypes
 import logging
 
@@ -239,7 +240,8 @@ async def upload_document(
             
             # Parse document
             parser = DocumentParserService()
-            parse_result = parser.parse_document(str(file_path), mime_type)
+            # Parsing waits on the process pool; keep it off the event loop
+            parse_result = await asyncio.to_thread(parser.parse_document, str(file_path), mime_type)
             
             if not parse_result["success"]:
                 user_doc.processing_status = models.ProcessingStatus.FAILED
@@ -260,7 +262,8 @@ async def upload_document(
             # Generate embeddings
             try:
                 embedding_service = EmbeddingService()
-                embedding_service.add_document(
+                await asyncio.to_thread(
+                    embedding_service.add_document,
                     user_id=user.id,
                     doc_id=str(user_doc.id),
                     text=parse_result["raw_text"],
@@ -9,6 +9,7 @@ from uuid import UUID
 from app import models, schemas, auth
 from app.database import get_db, run_sql_migrations, ensure_project_group_schema
 from app.services.change_logger import log_project_change
+from app.services.datasheet_contents import release_datasheet_contents
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
@@ -170,6 +171,12 @@ def delete_project(project_id: UUID, db: Session = Depends(get_db)):
     if not db_project:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    datasheet_sha256s = [
+        sha256 for (sha256,) in db.query(models.DatasheetDocument.content_sha256)
+        .join(models.Component, models.DatasheetDocument.component_id == models.Component.id)
+        .filter(models.Component.project_id == project_id)
+    ]
+
     try:
         # Clean up dependent rows that don't have ORM cascades yet to avoid FK violations.
         db.query(models.ProjectChange).filter(models.ProjectChange.project_id == project_id).delete(synchronize_session=False)
@@ -183,4 +190,5 @@ def delete_project(project_id: UUID, db: Session = Depends(get_db)):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Failed to delete project: {exc}") from exc
 
+    release_datasheet_contents(db, datasheet_sha256s)
     return None
@@ -6,10 +6,9 @@ from sqlalchemy.orm import Session
 from uuid import UUID
 from datetime import datetime
 
-from app import models
 from app.database import get_db
 from app.services.excel_service import get_excel_service
-from app.services.scoring_service import get_scoring_service
+from app.services.ranking_cache import get_project_rankings
 from app.services.change_logger import log_project_change
 
 router = APIRouter(tags=["results"])
@@ -18,53 +17,28 @@ router = APIRouter(tags=["results"])
 @router.get("/api/projects/{project_id}/results")
 def get_project_results(project_id: UUID, db: Session = Depends(get_db)):
     """Get ranked results with weighted scores"""
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    rankings = get_project_rankings(db, project_id)
+    if not rankings:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
-    
-    # Get all scores
-    all_scores = db.query(models.Score).join(models.Component).filter(
-        models.Component.project_id == project_id
-    ).all()
-    
-    # Create scores dict for easy lookup
-    scores_dict = {(str(score.component_id), str(score.criterion_id)): score for score in all_scores}
-    
-    # Calculate results using scoring service
-    scoring_service = get_scoring_service()
-    results = scoring_service.calculate_weighted_scores(components, criteria, scores_dict)
+    project = rankings.project
 
     return {
         "project": project,
-        "criteria": criteria,
-        "results": results
+        "criteria": rankings.criteria,
+        "results": rankings.results
     }
 
 
 @router.get("/api/projects/{project_id}/export/full")
 def export_full_trade_study(project_id: UUID, db: Session = Depends(get_db)):
     """Export complete trade study to multi-sheet Excel file"""
-    project = db.query(models.Project).filter(models.Project.id == project_id).first()
-    if not project:
+    rankings = get_project_rankings(db, project_id)
+    if not rankings:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    components = db.query(models.Component).filter(models.Component.project_id == project_id).all()
-    criteria = db.query(models.Criterion).filter(models.Criterion.project_id == project_id).all()
-
-    # Get all scores
-    all_scores = db.query(models.Score).join(models.Component).filter(
-        models.Component.project_id == project_id
-    ).all()
-    
-    # Create scores dict
-    scores_dict = {(str(score.component_id), str(score.criterion_id)): score for score in all_scores}
-    
-    # Calculate results using scoring service
-    scoring_service = get_scoring_service()
-    results = scoring_service.calculate_weighted_scores(components, criteria, scores_dict)
+    project = rankings.project
+    components = rankings.components
+    criteria = rankings.criteria
+    results = rankings.results
 
     # Convert results to format expected by Excel service
     formatted_results = []
@@ -7,6 +7,9 @@ from uuid import UUID
 
 from app import models, schemas
 from app.database import get_db
+from app.services.project_snapshot import ScoreRecord
+from app.services.ranking_cache import apply_score_update, bump_project_revision
+from app.services.score_writer import upsert_scores
 
 router = APIRouter(tags=["scores"])
 
@@ -14,13 +17,72 @@ router = APIRouter(tags=["scores"])
 @router.post("/api/scores", response_model=schemas.Score, status_code=status.HTTP_201_CREATED)
 def create_score(score: schemas.ScoreCreate, db: Session = Depends(get_db)):
     """Create or update a score for a component-criterion pair"""
-    db_score = models.Score(**score.model_dump())
-    db.add(db_score)
+    project_id = db.query(models.Component.project_id).filter(
+        models.Component.id == score.component_id
+    ).scalar()
+    if not project_id:
+        raise HTTPException(status_code=404, detail="Component not found")
+
+    # (component_id, criterion_id) is unique, so reuse an existing row
+    db_score = db.query(models.Score).filter(
+        models.Score.component_id == score.component_id,
+        models.Score.criterion_id == score.criterion_id
+    ).first()
+    if db_score:
+        for key, value in score.model_dump().items():
+            setattr(db_score, key, value)
+    else:
+        db_score = models.Score(**score.model_dump())
+        db.add(db_score)
+    # User-entered, so dirty-only AI re-scoring must not overwrite it
+    db_score.manually_adjusted = True
+    db_score.input_fingerprint = None
+    bump_project_revision(db, project_id)
     db.commit()
     db.refresh(db_score)
     return db_score
 
 
+@router.post("/api/scores/bulk", response_model=schemas.ScoreBulkUpsertResult)
+def bulk_upsert_scores(payload: schemas.ScoreBulkUpsert, db: Session = Depends(get_db)):
+    """Create or update many component-criterion scores in one write"""
+    if not payload.scores:
+        raise HTTPException(status_code=400, detail="No scores provided")
+
+    component_ids = {s.component_id for s in payload.scores}
+    criterion_ids = {s.criterion_id for s in payload.scores}
+    component_projects = dict(
+        db.query(models.Component.id, models.Component.project_id)
+        .filter(models.Component.id.in_(component_ids)).all()
+    )
+    criterion_projects = dict(
+        db.query(models.Criterion.id, models.Criterion.project_id)
+        .filter(models.Criterion.id.in_(criterion_ids)).all()
+    )
+
+    for s in payload.scores:
+        if s.component_id not in component_projects:
+            raise HTTPException(status_code=404, detail=f"Component {s.component_id} not found")
+        if s.criterion_id not in criterion_projects:
+            raise HTTPException(status_code=404, detail=f"Criterion {s.criterion_id} not found")
+        if component_projects[s.component_id] != criterion_projects[s.criterion_id]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Component {s.component_id} and criterion {s.criterion_id} belong to different projects"
+            )
+
+    created, updated = upsert_scores(db, [s.model_dump() for s in payload.scores], manually_adjusted=True)
+    for project_id in set(component_projects.values()):
+        bump_project_revision(db, project_id)
+    db.commit()
+
+    return schemas.ScoreBulkUpsertResult(
+        scores_created=created,
+        scores_updated=updated,
+        total_scores=created + updated
+    )
+
+
 @router.get("/api/projects/{project_id}/scores", response_model=List[schemas.Score])
 def get_project_scores(project_id: UUID, db: Session = Depends(get_db)):
     """Get all scores for a project"""
@@ -40,7 +102,12 @@ def update_score(score_id: UUID, score_update: schemas.ScoreUpdate, db: Session
     for key, value in score_update.model_dump(exclude_unset=True).items():
         setattr(db_score, key, value)
 
+    project_id = db_score.component.project_id
+    revision = bump_project_revision(db, project_id)
     db.commit()
     db.refresh(db_score)
+
+    # Move just this component in the cached ranking instead of recomputing all totals
+    apply_score_update(project_id, revision, ScoreRecord.from_model(db_score))
     return db_score
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
 from enum import Enum
@@ -187,6 +187,36 @@ class Score(ScoreBase):
     class Config:
         from_attributes = True
 
+class ScoreBulkUpsert(BaseModel):
+    """Batch of scores to create or update in one request"""
+    scores: List[ScoreCreate]
+
+class ScoreBulkUpsertResult(BaseModel):
+    """Outcome of a bulk score upsert"""
+    scores_created: int
+    scores_updated: int
+    total_scores: int
+
+class JobCreate(BaseModel):
+    """Request to run background work"""
+    kind: str
+    payload: Dict[str, Any] = {}
+    project_id: Optional[UUID] = None
+
+class JobStatus(BaseModel):
+    """State of a background job"""
+    id: UUID
+    kind: str
+    status: str  # queued, running, succeeded, failed, canceled
+    project_id: Optional[UUID] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    cancel_requested: bool = False
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
 # Project with Details
 class ProjectWithDetails(Project):
     criteria: List[Criterion] = []
@@ -278,6 +308,7 @@ class DatasheetStatus(BaseModel):
     has_datasheet: bool
     parsed: bool
     num_pages: Optional[int] = None
+    pages_parsed: Optional[int] = None
     parsed_at: Optional[datetime] = None
     parse_status: Optional[str] = None
     parse_error: Optional[str] = None
@@ -151,6 +151,26 @@ Write in formal technical style. Reference specific scores and rankings.
 Be thorough but concise. Focus on actionable insights."""
 
 
+# Map stage of map-reduce report generation: summarizes one group of components
+REPORT_GROUP_SUMMARY_PROMPT = """You are summarizing part of a large trade study so that a final report can be written from the summaries.
+
+Project: {project_name}
+Component Type: {component_type}
+
+CRITERIA EVALUATED:
+{criteria_text}
+
+COMPONENTS RANKED {first_rank} TO {last_rank} OF {total_components}:
+{components_text}
+
+For each component above, write 2-4 sentences covering its rank, total weighted score,
+the criteria where it is strongest and weakest (with scores), and anything from the
+rationales that matters when choosing between candidates. Keep manufacturer and part
+number exactly as given. Finish with one sentence comparing this group as a whole.
+
+Use plain Markdown with no preamble."""
+
+
 # Chat System Prompt
 CHAT_SYSTEM_PROMPT = """You are a helpful assistant for TradeForm, a trade study automation platform.
 You help users with:
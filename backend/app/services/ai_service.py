@@ -7,30 +7,64 @@ for aerospace trade studies.
 
 import os
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import AsyncContextManager, AsyncIterator, Callable, List, Dict, Any, Optional, Union
 from uuid import UUID
 
-from app.utils.ai_helpers import extract_response_text, clean_json_response
+from app.utils.ai_helpers import accumulate_usage, extract_response_text, clean_json_response, rate_limited_tokens
+from app.utils.json_stream import JsonElementStream, recover_json_elements
+from app.services.llm_cache import AI_RESPONSE_CACHE_ENABLED, get_response_cache, response_cache_key
+from app.services.provider_health import get_provider_guard
+from app.services.rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_STANDARD,
+    estimate_prompt_tokens,
+    get_rate_limiter,
+)
 from app.services.ai_prompts import (
     DISCOVER_COMPONENTS_PROMPT,
     SCORE_COMPONENT_PROMPT,
     OPTIMIZE_PROJECT_PROMPT,
     OPTIMIZE_CRITERIA_PROMPT,
     TRADE_STUDY_REPORT_PROMPT,
+    REPORT_GROUP_SUMMARY_PROMPT,
     CHAT_SYSTEM_PROMPT,
 )
 
 logger = logging.getLogger(__name__)
 
+# Connection pool shared by every async Claude call in the process
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "100"))
+AI_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+
+DISCOVER_SYSTEM_PROMPT = "You are an expert aerospace component researcher. Return only valid JSON."
+BATCH_SCORING_SYSTEM_PROMPT = "You are an aerospace engineer. Score components quickly and accurately. Return only valid JSON array."
+REPORT_SYSTEM_PROMPT = "You are an aerospace systems engineer writing formal technical reports."
+REPORT_SUMMARY_SYSTEM_PROMPT = "You are an aerospace systems engineer condensing trade study results accurately."
+
+# Reports whose single prompt is estimated above this many tokens are generated
+# map-reduce: component groups are summarized in parallel, then synthesized
+AI_REPORT_MAP_REDUCE_THRESHOLD_TOKENS = int(os.getenv("AI_REPORT_MAP_REDUCE_THRESHOLD_TOKENS", "40000"))
+AI_REPORT_GROUP_PROMPT_TOKENS = int(os.getenv("AI_REPORT_GROUP_PROMPT_TOKENS", "12000"))
+AI_REPORT_SUMMARY_MAX_TOKENS = int(os.getenv("AI_REPORT_SUMMARY_MAX_TOKENS", "2048"))
+# Threads summarizing groups in parallel on the blocking report path
+REPORT_SUMMARY_THREADS = 8
+
 # Try to import Anthropic client
 ANTHROPIC_AVAILABLE = False
 try:
     import anthropic
+    import httpx
     ANTHROPIC_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"anthropic not available: {e}")
     anthropic = None  # type: ignore
+    httpx = None  # type: ignore
 
 # Try to import context builder for user documents
 try:
@@ -46,6 +80,8 @@ class AIService:
     
     MODEL = "claude-sonnet-4-20250514"
     MAX_TOKENS = 8192
+    # Largest max_tokens MODEL accepts; bounds packed scoring requests
+    MODEL_MAX_OUTPUT_TOKENS = 64000
     
     def __init__(self):
         """Initialize AI service with Anthropic client."""
@@ -58,18 +94,226 @@ class AIService:
         
         # Type checker doesn't know anthropic is not None here, so we assert it
         assert anthropic is not None
+        self.api_key = api_key
         self.client = anthropic.Anthropic(api_key=api_key)
+        self._async_client = None
         self.context_builder = AIContextBuilder() if CONTEXT_BUILDER_AVAILABLE and AIContextBuilder is not None else None
     
-    def _call_claude(self, system: str, user: str, max_tokens: Optional[int] = None) -> str:
-        """Make a call to Claude API and extract response text."""
-        message = self.client.messages.create(
-            model=self.MODEL,
-            max_tokens=max_tokens or self.MAX_TOKENS,
-            system=system,
-            messages=[{"role": "user", "content": user}]
-        )
-        return extract_response_text(message)
+    def _call_claude(
+        self,
+        system: Union[str, List[Dict[str, Any]]],
+        user: str,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = False,
+        usage: Optional[Dict[str, int]] = None,
+        priority: int = PRIORITY_STANDARD,
+        operation: str = "message",
+        hedge: bool = False,
+        cacheable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Make a call to Claude API and extract response text.
+        
+        With use_cache, identical requests are answered from the persistent
+        response cache. Only use it where a repeated answer is acceptable.
+        A response is stored only if it passes ``cacheable``, so a reply the
+        caller cannot parse is not replayed on every retry.
+        While the Anthropic circuit is open, expired cache entries are served
+        too; otherwise the call fails fast with ProviderUnavailableError.
+        
+        Args:
+            system: System prompt, or a list of text blocks (to set prompt cache breakpoints)
+            user: User message
+            max_tokens: Output token limit (defaults to MAX_TOKENS)
+            use_cache: Serve and store the response via the response cache
+            usage: Optional dict that token usage counters are added to
+            priority: Rate limiter lane (interactive calls are served before batch work)
+            operation: Name the call's latency is tracked under
+            hedge: Send a duplicate request if the call is slower than the operation's p95
+            cacheable: Check that the response text parses; required for it to be cached
+        """
+        max_tokens = max_tokens or self.MAX_TOKENS
+        guard = get_provider_guard("anthropic")
+        cache_key = self._response_cache_key(system, user, max_tokens) if use_cache else None
+        if cache_key:
+            cached = get_response_cache().get(cache_key, allow_expired=guard.breaker.state == "open")
+            if cached is not None:
+                accumulate_usage(usage, None)
+                return cached
+        
+        limiter = get_rate_limiter("anthropic")
+        estimated = estimate_prompt_tokens(system, user) + max_tokens
+        # The first attempt's budget is reserved up front so queueing for it does not count as latency
+        reservations = [limiter.acquire_sync(priority, estimated)]
+        
+        def attempt():
+            reserved = reservations.pop() if reservations else limiter.acquire_sync(priority, estimated)
+            message = None
+            try:
+                message = self.client.messages.create(
+                    model=self.MODEL,
+                    max_tokens=max_tokens,
+                    system=system,
+                    messages=[{"role": "user", "content": user}]
+                )
+            finally:
+                limiter.settle(reserved, rate_limited_tokens(message) if message is not None else 0)
+            return message
+        
+        try:
+            message = guard.call_sync(operation, attempt, hedge=hedge)
+        finally:
+            for reserved in reservations:
+                limiter.settle(reserved, 0)
+        accumulate_usage(usage, message)
+        text = extract_response_text(message)
+        self._store_response(cache_key, text, message, cacheable)
+        return text
+    
+    def _response_cache_key(self, system: Any, user: str, max_tokens: int) -> Optional[str]:
+        """Cache key for a request, or None when the response cache is disabled."""
+        if not AI_RESPONSE_CACHE_ENABLED:
+            return None
+        return response_cache_key(self.MODEL, system, user, max_tokens)
+    
+    def _store_response(
+        self,
+        cache_key: Optional[str],
+        text: str,
+        message: Any,
+        cacheable: Optional[Callable[[str], bool]]
+    ):
+        """Cache a fresh response unless it is empty, truncated or fails ``cacheable``."""
+        if not cache_key or not text or cacheable is None:
+            return
+        # Truncated responses are not cached; a retry should get the chance to finish
+        if getattr(message, "stop_reason", None) == "max_tokens":
+            return
+        if not cacheable(text):
+            logger.warning("Not caching a response that did not parse")
+            return
+        get_response_cache().put(cache_key, text)
+    
+    @property
+    def async_client(self):
+        """Async Claude client on a shared, bounded connection pool (created on first use)."""
+        if self._async_client is None:
+            assert anthropic is not None and httpx is not None
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=anthropic.DefaultAsyncHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=AI_HTTP_MAX_CONNECTIONS,
+                        max_keepalive_connections=AI_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    )
+                ),
+            )
+        return self._async_client
+    
+    async def _call_claude_async(
+        self,
+        system: Union[str, List[Dict[str, Any]]],
+        user: str,
+        max_tokens: Optional[int] = None,
+        use_cache: bool = False,
+        usage: Optional[Dict[str, int]] = None,
+        priority: int = PRIORITY_STANDARD,
+        stream_into: Optional[JsonElementStream] = None,
+        operation: str = "message",
+        hedge: bool = False,
+        admission: Optional[Callable[[], AsyncContextManager]] = None,
+        timeout: Optional[float] = None,
+        cacheable: Optional[Callable[[str], bool]] = None
+    ) -> str:
+        """
+        Async variant of _call_claude; no worker thread is held while waiting.
+        
+        With stream_into, the response is streamed and parsed as it arrives,
+        so elements completed before a failure remain available on it. When
+        the call is hedged, stream_into ends up with the winning attempt's
+        elements (or, on failure, those of the attempt that got furthest).
+        
+        Args:
+            admission: Context manager factory (e.g. a concurrency limiter's
+                slot) entered once the rate limit budget has been granted
+            timeout: Seconds allowed for the call itself; waiting for budget
+                and admission does not count. Raises asyncio.TimeoutError.
+            cacheable: As for _call_claude
+        """
+        max_tokens = max_tokens or self.MAX_TOKENS
+        guard = get_provider_guard("anthropic")
+        cache_key = self._response_cache_key(system, user, max_tokens) if use_cache else None
+        if cache_key:
+            # The cache lock and SQLite I/O can stall behind concurrent writers; keep them off the event loop
+            cached = await asyncio.to_thread(
+                get_response_cache().get, cache_key, allow_expired=guard.breaker.state == "open"
+            )
+            if cached is not None:
+                accumulate_usage(usage, None)
+                if stream_into is not None:
+                    stream_into.feed(cached)
+                return cached
+        
+        limiter = get_rate_limiter("anthropic")
+        estimated = estimate_prompt_tokens(system, user) + max_tokens
+        # The first attempt's budget is reserved up front so queueing for it does not count as latency
+        reservations = [await limiter.acquire(priority, estimated)]
+        parsers: List[JsonElementStream] = []
+        
+        async def attempt():
+            reserved = reservations.pop() if reservations else await limiter.acquire(priority, estimated)
+            parser = None
+            message = None
+            try:
+                if stream_into is None:
+                    message = await self.async_client.messages.create(
+                        model=self.MODEL,
+                        max_tokens=max_tokens,
+                        system=system,
+                        messages=[{"role": "user", "content": user}]
+                    )
+                else:
+                    parser = JsonElementStream()
+                    parsers.append(parser)
+                    async with self.async_client.messages.stream(
+                        model=self.MODEL,
+                        max_tokens=max_tokens,
+                        system=system,
+                        messages=[{"role": "user", "content": user}]
+                    ) as stream:
+                        async for text in stream.text_stream:
+                            parser.feed(text)
+                        message = await stream.get_final_message()
+            finally:
+                limiter.settle(reserved, rate_limited_tokens(message) if message is not None else 0)
+            return message, parser
+        
+        try:
+            async with (admission() if admission is not None else nullcontext()):
+                message, parser = await asyncio.wait_for(guard.call(operation, attempt, hedge=hedge), timeout=timeout)
+        except BaseException:
+            if stream_into is not None and parsers:
+                stream_into.adopt(max(parsers, key=lambda candidate: len(candidate.elements)))
+            raise
+        finally:
+            for reserved in reservations:
+                limiter.settle(reserved, 0)
+        if stream_into is not None and parser is not None:
+            stream_into.adopt(parser)
+            if getattr(message, "stop_reason", None) == "max_tokens":
+                logger.warning(
+                    f"Response hit max_tokens ({max_tokens}); kept {len(stream_into.elements)} complete elements"
+                )
+        accumulate_usage(usage, message)
+        text = extract_response_text(message)
+        await asyncio.to_thread(self._store_response, cache_key, text, message, cacheable)
+        return text
+    
+    async def aclose(self):
+        """Close the async client's connection pool."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
     
     def _get_context_section(self, user_id: Optional[UUID], query: str, context_type: str = "full") -> str:
         """Get context from user documents if available."""
@@ -91,6 +335,12 @@ class AIService:
             logger.warning(f"Failed to get context: {e}")
             return ""
     
+    async def _get_context_section_async(self, user_id: Optional[UUID], query: str, context_type: str = "full") -> str:
+        """Get user document context without blocking the event loop."""
+        if not self.context_builder or not user_id:
+            return ""
+        return await asyncio.to_thread(self._get_context_section, user_id, query, context_type)
+    
     def discover_components(
         self,
         project_name: str,
@@ -116,13 +366,52 @@ class AIService:
         Returns:
             List of component dictionaries
         """
+        context = self._get_context_section(user_id, f"{component_type} components for {project_name}")
+        prompt = self._discover_prompt(
+            project_name, component_type, description, criteria_names,
+            location_preference, number_of_components, context
+        )
+        response = self._call_claude(
+            system=DISCOVER_SYSTEM_PROMPT, user=prompt, priority=PRIORITY_BATCH, operation="discover"
+        )
+        return self._parse_json_array(response)
+    
+    async def discover_components_async(
+        self,
+        project_name: str,
+        component_type: str,
+        description: Optional[str] = None,
+        criteria_names: Optional[List[str]] = None,
+        location_preference: Optional[str] = None,
+        number_of_components: int = 5,
+        user_id: Optional[UUID] = None
+    ) -> List[Dict[str, Any]]:
+        """Async variant of discover_components."""
+        context = await self._get_context_section_async(user_id, f"{component_type} components for {project_name}")
+        prompt = self._discover_prompt(
+            project_name, component_type, description, criteria_names,
+            location_preference, number_of_components, context
+        )
+        response = await self._call_claude_async(
+            system=DISCOVER_SYSTEM_PROMPT, user=prompt, priority=PRIORITY_BATCH, operation="discover"
+        )
+        return self._parse_json_array(response)
+    
+    def _discover_prompt(
+        self,
+        project_name: str,
+        component_type: str,
+        description: Optional[str],
+        criteria_names: Optional[List[str]],
+        location_preference: Optional[str],
+        number_of_components: int,
+        context: str
+    ) -> str:
+        """Build the component discovery prompt."""
         description_section = f"Description: {description}" if description else ""
         criteria_section = f"Key Criteria: {', '.join(criteria_names)}" if criteria_names else ""
         location_section = f"Preferred Region: {location_preference}" if location_preference else ""
         
-        context = self._get_context_section(user_id, f"{component_type} components for {project_name}")
-        context_section = f"\n\nREFERENCE INFORMATION:\n{context}" if context else ""
-        
         prompt = DISCOVER_COMPONENTS_PROMPT.format(
             project_name=project_name,
             component_type=component_type,
@@ -132,15 +421,9 @@ class AIService:
             num_components=number_of_components
         )
         
-        if context_section:
-            prompt += context_section
-        
-        response = self._call_claude(
-            system="You are an expert aerospace component researcher. Return only valid JSON.",
-            user=prompt
-        )
-        
-        return self._parse_json_array(response)
+        if context:
+            prompt += f"\n\nREFERENCE INFORMATION:\n{context}"
+        return prompt
     
     def score_component(
         self,
@@ -195,7 +478,12 @@ class AIService:
         response = self._call_claude(
             system="You are an aerospace engineer evaluating components. Return only valid JSON.",
             user=prompt,
-            max_tokens=1024
+            max_tokens=1024,
+            use_cache=True,
+            priority=PRIORITY_BATCH,
+            operation="score",
+            hedge=True,
+            cacheable=self._is_score_object
         )
         
         return self._parse_score_response(response)
@@ -273,6 +561,9 @@ class AIService:
         """
         Generate a comprehensive trade study report.
         
+        Large studies are generated map-reduce: component groups are summarized
+        in parallel first and the report is written from the summaries.
+        
         Args:
             project_name: Name of the project
             project_description: Project description
@@ -284,26 +575,212 @@ class AIService:
         Returns:
             Markdown-formatted report text
         """
-        criteria_text = self._format_criteria_text(criteria)
-        components_text = self._format_components_text(components)
-        
         context = self._get_context_section(user_id, f"{project_name} trade study report", "report")
-        context_section = f"\n\nREPORT STYLE GUIDELINES:\n{context}" if context else ""
+        prompt = self._report_prompt(project_name, project_description, component_type, criteria, components, context)
+        if self._needs_map_reduce(prompt):
+            groups = self._report_summary_groups(components)
+            
+            def summarize(group: List[Dict[str, Any]]) -> str:
+                return self._call_claude(
+                    system=REPORT_SUMMARY_SYSTEM_PROMPT,
+                    user=self._group_summary_prompt(project_name, component_type, criteria, group, len(components)),
+                    max_tokens=AI_REPORT_SUMMARY_MAX_TOKENS,
+                    operation="report_summary",
+                    hedge=True
+                )
+            
+            with ThreadPoolExecutor(max_workers=min(len(groups), REPORT_SUMMARY_THREADS)) as executor:
+                summaries = list(executor.map(summarize, groups))
+            prompt = self._report_prompt(
+                project_name, project_description, component_type, criteria, components, context,
+                components_text=self._summarized_components_text(components, summaries)
+            )
+        return self._call_claude(system=REPORT_SYSTEM_PROMPT, user=prompt, operation="report")
+    
+    async def generate_trade_study_report_async(
+        self,
+        project_name: str,
+        project_description: Optional[str],
+        component_type: str,
+        criteria: List[Dict[str, Any]],
+        components: List[Dict[str, Any]],
+        user_id: Optional[UUID] = None
+    ) -> str:
+        """Async variant of generate_trade_study_report; map-reduce summaries run in parallel."""
+        prompt = await self._final_report_prompt_async(
+            project_name, project_description, component_type, criteria, components, user_id
+        )
+        return await self._call_claude_async(system=REPORT_SYSTEM_PROMPT, user=prompt, operation="report")
+    
+    async def stream_trade_study_report_async(
+        self,
+        project_name: str,
+        project_description: Optional[str],
+        component_type: str,
+        criteria: List[Dict[str, Any]],
+        components: List[Dict[str, Any]],
+        user_id: Optional[UUID] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream a trade study report as text deltas from the Claude streaming API.
         
-        prompt = TRADE_STUDY_REPORT_PROMPT.format(
+        Takes the same arguments as generate_trade_study_report; the caller
+        joins the yielded deltas to get the full report. For large studies the
+        map-reduce summaries are produced first and only the synthesis streams.
+        """
+        prompt = await self._final_report_prompt_async(
+            project_name, project_description, component_type, criteria, components, user_id
+        )
+        # A stream cannot be hedged, but it still respects and feeds the circuit breaker
+        guard = get_provider_guard("anthropic")
+        guard.breaker.before_call()
+        limiter = get_rate_limiter("anthropic")
+        reserved = await limiter.acquire(
+            PRIORITY_STANDARD, estimate_prompt_tokens(REPORT_SYSTEM_PROMPT, prompt) + self.MAX_TOKENS
+        )
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        disconnected = False
+        # An interrupted stream keeps its full reservation; part of it was generated
+        used: Optional[int] = None
+        try:
+            async with self.async_client.messages.stream(
+                model=self.MODEL,
+                max_tokens=self.MAX_TOKENS,
+                system=REPORT_SYSTEM_PROMPT,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                used = rate_limited_tokens(await stream.get_final_message())
+        except (GeneratorExit, asyncio.CancelledError):
+            # The consumer stopped reading (e.g. the client disconnected), however long the stream ran
+            disconnected = True
+            raise
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            limiter.settle(reserved, used)
+            if disconnected:
+                guard.breaker.record_inconclusive()
+            else:
+                guard.record_outcome("report_stream", started, error)
+    
+    def _report_prompt(
+        self,
+        project_name: str,
+        project_description: Optional[str],
+        component_type: str,
+        criteria: List[Dict[str, Any]],
+        components: List[Dict[str, Any]],
+        context: str,
+        components_text: Optional[str] = None
+    ) -> str:
+        """Build the trade study report prompt (components_text overrides the full component listing)."""
+        context_section = f"\n\nREPORT STYLE GUIDELINES:\n{context}" if context else ""
+        return TRADE_STUDY_REPORT_PROMPT.format(
             project_name=project_name,
             component_type=component_type,
             description=project_description or "No description",
             context_section=context_section,
-            criteria_text=criteria_text,
-            components_text=components_text
+            criteria_text=self._format_criteria_text(criteria),
+            components_text=components_text if components_text is not None else self._format_components_text(components)
         )
+    
+    async def _final_report_prompt_async(
+        self,
+        project_name: str,
+        project_description: Optional[str],
+        component_type: str,
+        criteria: List[Dict[str, Any]],
+        components: List[Dict[str, Any]],
+        user_id: Optional[UUID]
+    ) -> str:
+        """
+        Prompt for the report-writing call.
         
-        return self._call_claude(
-            system="You are an aerospace systems engineer writing formal technical reports.",
-            user=prompt
+        Small studies get the full component listing. When that prompt is
+        estimated above AI_REPORT_MAP_REDUCE_THRESHOLD_TOKENS, component groups
+        are summarized in parallel first and the report is written from the
+        summaries plus a compact ranking of every component.
+        """
+        context = await self._get_context_section_async(user_id, f"{project_name} trade study report", "report")
+        prompt = self._report_prompt(project_name, project_description, component_type, criteria, components, context)
+        if not self._needs_map_reduce(prompt):
+            return prompt
+        
+        groups = self._report_summary_groups(components)
+        summaries = await asyncio.gather(*[
+            self._call_claude_async(
+                system=REPORT_SUMMARY_SYSTEM_PROMPT,
+                user=self._group_summary_prompt(project_name, component_type, criteria, group, len(components)),
+                max_tokens=AI_REPORT_SUMMARY_MAX_TOKENS,
+                operation="report_summary",
+                hedge=True
+            )
+            for group in groups
+        ])
+        return self._report_prompt(
+            project_name, project_description, component_type, criteria, components, context,
+            components_text=self._summarized_components_text(components, summaries)
         )
     
+    def _needs_map_reduce(self, prompt: str) -> bool:
+        """True when a single report prompt is too large to send as is."""
+        estimated = estimate_prompt_tokens(REPORT_SYSTEM_PROMPT, prompt)
+        if estimated <= AI_REPORT_MAP_REDUCE_THRESHOLD_TOKENS:
+            return False
+        logger.info(f"Report prompt estimated at {estimated} tokens; generating map-reduce")
+        return True
+    
+    def _report_summary_groups(self, components: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split components, in rank order, into groups whose listing fits AI_REPORT_GROUP_PROMPT_TOKENS."""
+        groups: List[List[Dict[str, Any]]] = []
+        group: List[Dict[str, Any]] = []
+        group_tokens = 0
+        for comp in sorted(components, key=lambda x: x.get("rank", 999)):
+            tokens = estimate_prompt_tokens(self._format_components_text([comp]))
+            if group and group_tokens + tokens > AI_REPORT_GROUP_PROMPT_TOKENS:
+                groups.append(group)
+                group, group_tokens = [], 0
+            group.append(comp)
+            group_tokens += tokens
+        if group:
+            groups.append(group)
+        return groups
+    
+    def _group_summary_prompt(
+        self,
+        project_name: str,
+        component_type: str,
+        criteria: List[Dict[str, Any]],
+        group: List[Dict[str, Any]],
+        total_components: int
+    ) -> str:
+        """Map-stage prompt summarizing one group of components."""
+        return REPORT_GROUP_SUMMARY_PROMPT.format(
+            project_name=project_name,
+            component_type=component_type,
+            criteria_text=self._format_criteria_text(criteria),
+            first_rank=group[0].get("rank", "N/A"),
+            last_rank=group[-1].get("rank", "N/A"),
+            total_components=total_components,
+            components_text=self._format_components_text(group)
+        )
+    
+    def _summarized_components_text(self, components: List[Dict[str, Any]], summaries: List[str]) -> str:
+        """Reduce-stage component section: full ranking table followed by the group summaries."""
+        lines = ["Full ranking:"]
+        for comp in sorted(components, key=lambda x: x.get("rank", 999)):
+            lines.append(
+                f"- Rank #{comp.get('rank', 'N/A')}: {comp.get('manufacturer', 'N/A')} "
+                f"{comp.get('part_number', 'N/A')} ({comp.get('total_score', 0):.2f})"
+            )
+        lines.append("\nComponent summaries (condensed from the per-criterion scores and rationales):")
+        lines.extend(summary.strip() for summary in summaries if summary and summary.strip())
+        return "\n".join(lines)
+    
     def chat(self, question: str) -> str:
         """
         General chat about trade studies.
@@ -317,7 +794,21 @@ class AIService:
         return self._call_claude(
             system=CHAT_SYSTEM_PROMPT,
             user=question,
-            max_tokens=2048
+            max_tokens=2048,
+            priority=PRIORITY_INTERACTIVE,
+            operation="chat",
+            hedge=True
+        )
+
+    async def chat_async(self, question: str) -> str:
+        """Async variant of chat."""
+        return await self._call_claude_async(
+            system=CHAT_SYSTEM_PROMPT,
+            user=question,
+            max_tokens=2048,
+            priority=PRIORITY_INTERACTIVE,
+            operation="chat",
+            hedge=True
         )
 
     def generate_text(self, prompt: str, system: Optional[str] = None, max_tokens: Optional[int] = None) -> str:
@@ -374,13 +865,42 @@ class AIService:
         return "\n".join(lines)
     
     def _parse_json_array(self, response: str) -> List[Dict[str, Any]]:
-        """Parse JSON array from response, with fallback."""
+        """Parse JSON array from response, recovering complete elements if it is malformed or truncated."""
         try:
             cleaned = clean_json_response(response)
             return json.loads(cleaned)
         except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            return []
+            recovered = [value for key, value in recover_json_elements(response) if key is None]
+            logger.error(f"JSON parse error: {e}; recovered {len(recovered)} complete elements")
+            return recovered
+    
+    def _strict_json(self, response: str) -> Any:
+        """The response as JSON, or None if it is not complete, valid JSON."""
+        try:
+            return json.loads(clean_json_response(response))
+        except json.JSONDecodeError:
+            return None
+    
+    def _is_score_object(self, response: str) -> bool:
+        """True if a single-criterion scoring response parses with a score."""
+        result = self._strict_json(response)
+        return isinstance(result, dict) and "score" in result
+    
+    def _is_score_array(self, response: str) -> bool:
+        """True if a batch scoring response parses into at least one score."""
+        results = self._strict_json(response)
+        return isinstance(results, list) and bool(self._validate_batch_scores(results))
+    
+    def _is_score_matrix(self, response: str, num_components: int) -> bool:
+        """True if a packed scoring response parses with scores for every component."""
+        matrix = self._strict_json(response)
+        if not isinstance(matrix, dict):
+            return False
+        by_ref = {str(key).strip(): value for key, value in matrix.items()}
+        return all(
+            isinstance(by_ref.get(str(ref)), list) and bool(self._validate_batch_scores(by_ref[str(ref)]))
+            for ref in range(1, num_components + 1)
+        )
     
     def _parse_json_object(self, response: str) -> Dict[str, Any]:
         """Parse JSON object from response, with fallback."""
@@ -420,35 +940,184 @@ class AIService:
         self,
         component: Dict[str, Any],
         criteria: List[Dict[str, Any]],
-        user_id: Optional[UUID] = None
+        user_id: Optional[UUID] = None,
+        usage: Optional[Dict[str, int]] = None
     ) -> List[Dict[str, Any]]:
         """
         Score a single component against ALL criteria in one AI call.
         Much faster than individual calls.
         
+        The system prompt and criteria form a cached prompt prefix shared by
+        every component scored against the same criteria; only the component
+        details are sent uncached.
+        
         Args:
             component: Component dict with manufacturer, part_number, description
             criteria: List of criterion dicts
+            usage: Optional dict that token and prompt-cache counters are added to
             
         Returns:
             List of score dicts, one per criterion
         """
-        criteria_text = "\n".join([
+        response = self._call_claude(
+            system=self._batch_scoring_system(criteria),
+            user=self._batch_scoring_prompt(component),
+            max_tokens=4096,
+            use_cache=True,
+            usage=usage,
+            priority=PRIORITY_BATCH,
+            operation="score_batch",
+            hedge=True,
+            cacheable=self._is_score_array
+        )
+        return self.parse_batch_scores(response)
+    
+    async def score_component_batch_async(
+        self,
+        component: Dict[str, Any],
+        criteria: List[Dict[str, Any]],
+        user_id: Optional[UUID] = None,
+        usage: Optional[Dict[str, int]] = None,
+        stream: Optional[JsonElementStream] = None,
+        admission: Optional[Callable[[], AsyncContextManager]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of score_component_batch.
+        
+        The response is streamed into ``stream`` (a new one if not given);
+        if the call fails, ``streamed_scores(stream)`` still returns every
+        score that arrived complete. ``admission`` and ``timeout`` are passed
+        to _call_claude_async.
+        """
+        stream = stream if stream is not None else JsonElementStream()
+        await self._call_claude_async(
+            system=self._batch_scoring_system(criteria),
+            user=self._batch_scoring_prompt(component),
+            max_tokens=4096,
+            use_cache=True,
+            usage=usage,
+            priority=PRIORITY_BATCH,
+            stream_into=stream,
+            operation="score_batch",
+            hedge=True,
+            admission=admission,
+            timeout=timeout,
+            cacheable=self._is_score_array
+        )
+        return self.streamed_scores(stream)
+    
+    def score_components_packed(
+        self,
+        components: List[Dict[str, Any]],
+        criteria: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Score several components against the same criteria in one AI call.
+        
+        The response is a nested JSON object mapping each component's
+        reference number to its score array.
+        
+        Args:
+            components: Component dicts with manufacturer, part_number, description
+            criteria: List of criterion dicts shared by all components
+            max_tokens: Output token limit for the request
+            usage: Optional dict that token and prompt-cache counters are added to
+            
+        Returns:
+            One entry per component, in input order: its validated score dicts,
+            or None if the response did not include that component
+        """
+        response = self._call_claude(
+            system=self._packed_scoring_system(criteria),
+            user=self._packed_scoring_prompt(components),
+            max_tokens=max_tokens,
+            use_cache=True,
+            usage=usage,
+            priority=PRIORITY_BATCH,
+            operation="score_pack",
+            hedge=True,
+            cacheable=lambda text: self._is_score_matrix(text, len(components))
+        )
+        return self._unpack_scores(response, len(components))
+    
+    async def score_components_packed_async(
+        self,
+        components: List[Dict[str, Any]],
+        criteria: List[Dict[str, Any]],
+        max_tokens: Optional[int] = None,
+        usage: Optional[Dict[str, int]] = None,
+        stream: Optional[JsonElementStream] = None,
+        admission: Optional[Callable[[], AsyncContextManager]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Async variant of score_components_packed.
+        
+        The response is streamed into ``stream`` (a new one if not given);
+        if the call fails, ``unpack_streamed_scores(stream, ...)`` still
+        returns every score that arrived complete. ``admission`` and
+        ``timeout`` are passed to _call_claude_async.
+        """
+        stream = stream if stream is not None else JsonElementStream()
+        await self._call_claude_async(
+            system=self._packed_scoring_system(criteria),
+            user=self._packed_scoring_prompt(components),
+            max_tokens=max_tokens,
+            use_cache=True,
+            usage=usage,
+            priority=PRIORITY_BATCH,
+            stream_into=stream,
+            operation="score_pack",
+            hedge=True,
+            admission=admission,
+            timeout=timeout,
+            cacheable=lambda text: self._is_score_matrix(text, len(components))
+        )
+        return self.unpack_streamed_scores(stream, len(components))
+    
+    def build_batch_scoring_params(
+        self,
+        component: Dict[str, Any],
+        criteria: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Messages API parameters for scoring one component, for offline batch submission.
+        
+        Uses the same prompt (and cacheable prefix) as score_component_batch;
+        parse the response text with parse_batch_scores.
+        """
+        return {
+            "model": self.MODEL,
+            "max_tokens": 4096,
+            "system": self._batch_scoring_system(criteria),
+            "messages": [{"role": "user", "content": self._batch_scoring_prompt(component)}],
+        }
+    
+    def parse_batch_scores(self, response: str) -> List[Dict[str, Any]]:
+        """Parse and validate the text of a batch scoring response."""
+        return self._validate_batch_scores(self._parse_json_array(response))
+    
+    def _format_scoring_criteria(self, criteria: List[Dict[str, Any]]) -> str:
+        """Criteria list shared by the single and packed scoring prompts."""
+        return "\n".join([
             f"- {c['name']}: {c.get('description', '')} (Unit: {c.get('unit', 'N/A')}, {'Higher is better' if c.get('higher_is_better', True) else 'Lower is better'})"
             for c in criteria
         ])
+    
+    def _batch_scoring_system(self, criteria: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        System blocks for batch scoring: the stable, cacheable prompt prefix.
         
-        prompt = f"""Score this component against ALL criteria below.
-
-COMPONENT:
-- Manufacturer: {component.get('manufacturer', 'Unknown')}
-- Part Number: {component.get('part_number', 'Unknown')}
-- Description: {component.get('description', 'No description')}
-
-CRITERIA TO EVALUATE:
-{criteria_text}
+        Everything here depends only on the criteria, so it is byte-identical
+        for every component in a run and ends with a cache breakpoint.
+        """
+        instructions = f"""CRITERIA TO EVALUATE:
+{self._format_scoring_criteria(criteria)}
 
-Return a JSON array with one score object per criterion:
+For the component in the user message, return a JSON array with one score object per criterion:
 [
   {{
     "criterion_name": "exact criterion name",
@@ -460,18 +1129,95 @@ Return a JSON array with one score object per criterion:
 ]
 
 IMPORTANT: Include ALL {len(criteria)} criteria. Return ONLY valid JSON."""
+        
+        return [
+            {"type": "text", "text": BATCH_SCORING_SYSTEM_PROMPT},
+            {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        ]
+    
+    def _batch_scoring_prompt(self, component: Dict[str, Any]) -> str:
+        """Per-component suffix of the batch scoring prompt."""
+        return f"""Score this component against ALL criteria.
 
-        response = self._call_claude(
-            system="You are an aerospace engineer. Score components quickly and accurately. Return only valid JSON array.",
-            user=prompt,
-            max_tokens=4096
-        )
+COMPONENT:
+- Manufacturer: {component.get('manufacturer', 'Unknown')}
+- Part Number: {component.get('part_number', 'Unknown')}
+- Description: {component.get('description', 'No description')}"""
+    
+    def _packed_scoring_system(self, criteria: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Cacheable prompt prefix for multi-component scoring requests."""
+        instructions = f"""CRITERIA TO EVALUATE:
+{self._format_scoring_criteria(criteria)}
+
+The user message lists several components, each with a reference number in brackets.
+Return a JSON object mapping every reference number to an array with one score object per criterion:
+{{
+  "1": [
+    {{
+      "criterion_name": "exact criterion name",
+      "score": <1-10>,
+      "raw_value": "<value with units>",
+      "rationale": "brief explanation",
+      "confidence": <0-1>
+    }}
+  ]
+}}
+
+IMPORTANT: Include EVERY component and ALL {len(criteria)} criteria for each. Return ONLY valid JSON."""
         
-        results = self._parse_json_array(response)
+        return [
+            {"type": "text", "text": BATCH_SCORING_SYSTEM_PROMPT},
+            {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        ]
+    
+    def _packed_scoring_prompt(self, components: List[Dict[str, Any]]) -> str:
+        """Per-request suffix listing the packed components by reference number."""
+        lines = [f"Score these {len(components)} components against ALL criteria."]
+        for ref, component in enumerate(components, start=1):
+            lines.append(f"""
+[{ref}]
+- Manufacturer: {component.get('manufacturer', 'Unknown')}
+- Part Number: {component.get('part_number', 'Unknown')}
+- Description: {component.get('description', 'No description')}""")
+        return "\n".join(lines)
+    
+    def _unpack_scores(self, response: str, num_components: int) -> List[Optional[List[Dict[str, Any]]]]:
+        """Split a nested score matrix back into per-component score lists."""
+        stream = JsonElementStream()
+        stream.feed(response)
+        return self.unpack_streamed_scores(stream, num_components)
+    
+    def streamed_scores(self, stream: JsonElementStream) -> List[Dict[str, Any]]:
+        """Validated scores completed so far in a single-component scoring response."""
+        return self._validate_batch_scores([value for key, value in stream.elements if key is None])
+    
+    def unpack_streamed_scores(
+        self,
+        stream: JsonElementStream,
+        num_components: int
+    ) -> List[Optional[List[Dict[str, Any]]]]:
+        """
+        Per-component scores completed so far in a packed scoring response.
         
+        Returns one entry per component in input order; None for components
+        with no complete score yet.
+        """
+        by_ref: Dict[str, List[Any]] = {}
+        for key, value in stream.elements:
+            if key is not None:
+                by_ref.setdefault(key.strip(), []).append(value)
+        return [
+            self._validate_batch_scores(by_ref[str(ref)]) if str(ref) in by_ref else None
+            for ref in range(1, num_components + 1)
+        ]
+    
+    def _validate_batch_scores(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Clamp scores and confidences and trim rationales from a batch scoring response."""
         # Validate and normalize results
         validated = []
         for r in results:
+            if not isinstance(r, dict):
+                continue
             try:
                 score = max(1, min(10, int(r.get("score", 5))))
             except (ValueError, TypeError):
@@ -485,7 +1231,7 @@ IMPORTANT: Include ALL {len(criteria)} criteria. Return ONLY valid JSON."""
                 "criterion_name": r.get("criterion_name", ""),
                 "score": score,
                 "raw_value": r.get("raw_value"),
-                "rationale": r.get("rationale", "")[:500],  # Limit rationale length
+                "rationale": (r.get("rationale") or "")[:500],  # Limit rationale length
                 "confidence": confidence
             })
         
@@ -502,3 +1248,9 @@ def get_ai_service() -> "AIService":
     if _ai_service is None:
         _ai_service = AIService()
     return _ai_service
+
+
+async def close_ai_service():
+    """Release the shared async connection pool, if one was opened."""
+    if _ai_service is not None:
+        await _ai_service.aclose()
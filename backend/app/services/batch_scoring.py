@@ -0,0 +1,281 @@
+"""
+Offline AI scoring through the Anthropic Message Batches API.
+
+Batch mode trades latency for throughput and cost: every component's scoring
+prompt is submitted as one Message Batch, the batch id is persisted in
+``scoring_batches``, and results are applied in bulk once the batch has ended.
+A poll_scoring_batch job polls each batch until then; clients polling the
+batch endpoint can apply results earlier.
+Results go through the same criterion matching and bulk upsert as interactive
+scoring.
+
+The provider is reached through a ``BatchTransport`` so it can be swapped out.
+``AnthropicBatchTransport`` honours ANTHROPIC_BATCH_BASE_URL, which lets tests
+point it at a local stand-in server, and ``set_batch_transport`` replaces it
+entirely.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.project_snapshot import ProjectSnapshot
+from app.services.ranking_cache import bump_project_revision
+from app.services.score_fingerprint import ScoreFingerprints
+from app.services.score_writer import CriterionResolver, build_score_rows, upsert_scores
+from app.services.scoring_packer import component_prompt_fields, criteria_prompt_fields
+
+logger = logging.getLogger(__name__)
+
+ANTHROPIC_BATCH_BASE_URL = os.getenv("ANTHROPIC_BATCH_BASE_URL")
+# How often the poll_scoring_batch job checks a submitted batch, and when it gives up
+SCORING_BATCH_POLL_INTERVAL_SECONDS = float(os.getenv("SCORING_BATCH_POLL_INTERVAL_SECONDS", "60"))
+SCORING_BATCH_POLL_TIMEOUT_SECONDS = float(os.getenv("SCORING_BATCH_POLL_TIMEOUT_SECONDS", "90000"))
+
+# Provider processing states after which results can be fetched
+ENDED_STATUSES = ("ended",)
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one request in a batch."""
+    custom_id: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BatchTransport(ABC):
+    """Interface to a message batch provider."""
+
+    @abstractmethod
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit requests ({"custom_id", "params"}) and return the provider batch id."""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        """Provider processing status, e.g. "in_progress" or "ended"."""
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        """Per-request results of an ended batch."""
+
+    @abstractmethod
+    async def cancel(self, batch_id: str):
+        """Ask the provider to stop processing a batch."""
+
+
+class AnthropicBatchTransport(BatchTransport):
+    """Message Batches API transport on an AsyncAnthropic client."""
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch = await self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    async def status(self, batch_id: str) -> str:
+        batch = await self.client.messages.batches.retrieve(batch_id)
+        return batch.processing_status
+
+    async def results(self, batch_id: str) -> List[BatchResult]:
+        results = []
+        async for entry in await self.client.messages.batches.results(batch_id):
+            result = entry.result
+            if result.type == "succeeded":
+                text = "".join(getattr(block, "text", "") for block in result.message.content)
+                results.append(BatchResult(custom_id=entry.custom_id, text=text.strip()))
+            else:
+                # Errored results wrap the API error object; others are canceled/expired
+                error = getattr(getattr(result, "error", None), "error", None)
+                message = getattr(error, "message", None) or result.type
+                results.append(BatchResult(custom_id=entry.custom_id, error=message))
+        return results
+
+    async def cancel(self, batch_id: str):
+        await self.client.messages.batches.cancel(batch_id)
+
+
+_batch_transport: Optional[BatchTransport] = None
+
+
+def get_batch_transport(ai_service: Any) -> BatchTransport:
+    """Get the configured batch transport, defaulting to the Anthropic API."""
+    global _batch_transport
+    if _batch_transport is None:
+        client = ai_service.async_client
+        if ANTHROPIC_BATCH_BASE_URL:
+            client = client.with_options(base_url=ANTHROPIC_BATCH_BASE_URL)
+        _batch_transport = AnthropicBatchTransport(client)
+    return _batch_transport
+
+
+def set_batch_transport(transport: Optional[BatchTransport]):
+    """Replace the batch transport (None restores the default)."""
+    global _batch_transport
+    _batch_transport = transport
+
+
+async def submit_scoring_batch(
+    db: Session,
+    project_id: UUID,
+    snapshot: ProjectSnapshot,
+    pending: Dict[Any, List[Any]],
+    ai_service: Any,
+    transport: BatchTransport
+) -> models.ScoringBatch:
+    """
+    Submit one scoring request per pending component and record the batch.
+
+    The expected input fingerprint of every requested pair is stored with the
+    batch, so results applied later are stamped with the definitions they
+    were actually scored against. The caller commits.
+    """
+    fingerprints = ScoreFingerprints(snapshot.components, snapshot.criteria)
+    requests = []
+    request_map: Dict[str, Dict[str, Any]] = {}
+    for component in snapshot.components:
+        criteria = pending.get(component.id)
+        if not criteria:
+            continue
+        custom_id = component.id.hex
+        params = ai_service.build_batch_scoring_params(
+            component=component_prompt_fields(component),
+            criteria=criteria_prompt_fields(criteria),
+        )
+        requests.append({"custom_id": custom_id, "params": params})
+        request_map[custom_id] = {
+            "component_id": str(component.id),
+            "fingerprints": {str(c.id): fingerprints.for_pair(component.id, c.id) for c in criteria},
+        }
+
+    provider_batch_id = await transport.submit(requests)
+    logger.info(f"Submitted scoring batch {provider_batch_id} with {len(requests)} requests")
+
+    batch = models.ScoringBatch(
+        project_id=project_id,
+        provider_batch_id=provider_batch_id,
+        status="submitted",
+        request_map=json.dumps(request_map),
+        request_count=len(requests),
+    )
+    db.add(batch)
+    db.flush()
+    return batch
+
+
+def _apply_score_rows(db: Session, project_id: UUID, score_rows: List[Dict[str, Any]]) -> tuple:
+    """Upsert applied batch rows and bump the project revision if anything changed."""
+    created, updated = upsert_scores(db, score_rows)
+    if created or updated:
+        bump_project_revision(db, project_id)
+    return created, updated
+
+
+async def refresh_scoring_batch(
+    db: Session,
+    batch: models.ScoringBatch,
+    snapshot: ProjectSnapshot,
+    ai_service: Any,
+    transport: BatchTransport
+) -> models.ScoringBatch:
+    """
+    Poll a submitted batch and bulk-apply its results once it has ended.
+
+    Results are matched to criteria with the same resolver as interactive
+    scoring. Components or criteria deleted since submission are skipped.
+    The caller commits.
+    """
+    if batch.status != "submitted":
+        return batch
+
+    status = await transport.status(batch.provider_batch_id)
+    if status not in ENDED_STATUSES:
+        return batch
+
+    request_map = json.loads(batch.request_map)
+    resolver = CriterionResolver(snapshot.criteria)
+    component_ids = {str(c.id): c.id for c in snapshot.components}
+    score_rows: List[Dict[str, Any]] = []
+    errors: List[str] = []
+
+    for result in await transport.results(batch.provider_batch_id):
+        request = request_map.get(result.custom_id)
+        if request is None:
+            continue
+        if result.error or result.text is None:
+            errors.append(f"{result.custom_id}: {result.error or 'empty response'}")
+            continue
+
+        expected = request["fingerprints"]
+        component_id = component_ids.get(request["component_id"])
+        if component_id is None:
+            continue
+        rows = build_score_rows(
+            component_id,
+            ai_service.parse_batch_scores(result.text),
+            resolver,
+            criterion_ids={c.id for c in snapshot.criteria if str(c.id) in expected},
+        )
+        for row in rows:
+            row["input_fingerprint"] = expected[str(row["criterion_id"])]
+        score_rows.extend(rows)
+
+    created, updated = await asyncio.to_thread(_apply_score_rows, db, batch.project_id, score_rows)
+
+    batch.status = "applied"
+    batch.scores_created = created
+    batch.scores_updated = updated
+    batch.errors = json.dumps(errors) if errors else None
+    batch.completed_at = datetime.now(timezone.utc)
+    logger.info(f"Applied scoring batch {batch.provider_batch_id}: {created} created, {updated} updated")
+    return batch
+
+
+async def cancel_scoring_batch(
+    db: Session,
+    batch: models.ScoringBatch,
+    transport: BatchTransport,
+    reason: str
+) -> models.ScoringBatch:
+    """
+    Stop a submitted batch at the provider and mark it canceled.
+
+    Results the provider already produced are not applied. The caller commits.
+    """
+    if batch.status != "submitted":
+        return batch
+
+    await transport.cancel(batch.provider_batch_id)
+    batch.status = "canceled"
+    batch.errors = json.dumps([reason])
+    batch.completed_at = datetime.now(timezone.utc)
+    logger.info(f"Canceled scoring batch {batch.provider_batch_id}: {reason}")
+    return batch
+
+
+def scoring_batch_summary(batch: models.ScoringBatch) -> Dict[str, Any]:
+    """API representation of a scoring batch."""
+    errors = json.loads(batch.errors) if batch.errors else []
+    return {
+        "id": batch.id,
+        "project_id": batch.project_id,
+        "provider_batch_id": batch.provider_batch_id,
+        "status": batch.status,
+        "request_count": batch.request_count,
+        "scores_created": batch.scores_created,
+        "scores_updated": batch.scores_updated,
+        "error_count": len(errors),
+        "errors": errors[:5],
+        "created_at": batch.created_at,
+        "completed_at": batch.completed_at,
+    }
@@ -0,0 +1,72 @@
+"""
+Content-addressed storage for uploaded datasheet PDFs.
+
+Each file is stored once under the SHA-256 of its bytes
+(``<root>/<first two hex chars>/<sha256>.pdf``), so the same manufacturer
+datasheet attached to many components occupies disk once. Blobs are never
+modified after they are written; writes go through a temporary file and an
+atomic rename, so concurrent uploads of the same bytes are safe. Blobs are
+deleted once no datasheet references them (see ``services.datasheet_contents``).
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATASHEET_BLOB_DIR = os.getenv("DATASHEET_BLOB_DIR", "datasheets/blobs")
+
+
+def content_hash(data: bytes) -> str:
+    """Hex SHA-256 of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """Immutable files addressed by the SHA-256 of their content."""
+
+    def __init__(self, root: str = DATASHEET_BLOB_DIR, suffix: str = ".pdf"):
+        self.root = Path(root)
+        self.suffix = suffix
+
+    def path_for(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256}{self.suffix}"
+
+    def put(self, data: bytes) -> Tuple[str, Path]:
+        """Store ``data`` unless an identical blob exists; returns its hash and path."""
+        sha256 = content_hash(data)
+        path = self.path_for(sha256)
+        if path.exists():
+            return sha256, path
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        logger.info(f"Stored blob {sha256} ({len(data)} bytes)")
+        return sha256, path
+
+    def delete(self, sha256: str):
+        """Remove a blob; a missing blob is not an error."""
+        self.path_for(sha256).unlink(missing_ok=True)
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """Get the datasheet blob store."""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = BlobStore()
+    return _blob_store
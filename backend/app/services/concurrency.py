@@ -0,0 +1,162 @@
+"""
+Adaptive concurrency control for outbound AI calls.
+
+``AdaptiveConcurrencyLimiter`` is an AIMD (additive increase, multiplicative
+decrease) limiter: the window of concurrent calls grows by roughly one slot per
+window's worth of successful calls and is cut by ``backoff`` whenever a call is
+rate limited (HTTP 429/529) or times out. Limits are read from the environment
+so each deployment can match its API tier.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AI_SCORING_CONCURRENCY_INITIAL = int(os.getenv("AI_SCORING_CONCURRENCY_INITIAL", "2"))
+AI_SCORING_CONCURRENCY_MIN = int(os.getenv("AI_SCORING_CONCURRENCY_MIN", "1"))
+AI_SCORING_CONCURRENCY_MAX = int(os.getenv("AI_SCORING_CONCURRENCY_MAX", "16"))
+AI_SCORING_CONCURRENCY_BACKOFF = float(os.getenv("AI_SCORING_CONCURRENCY_BACKOFF", "0.5"))
+AI_SCORING_TIMEOUT_SECONDS = float(os.getenv("AI_SCORING_TIMEOUT_SECONDS", "60"))
+
+# Status codes that mean "slow down" rather than "this request is broken"
+OVERLOAD_STATUS_CODES = {429, 529}
+
+
+def is_overload_error(exc: BaseException) -> bool:
+    """True for timeouts and rate-limit/overloaded responses from an AI provider."""
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    if type(exc).__name__ in ("RateLimitError", "APITimeoutError", "OverloadedError", "ProviderUnavailableError"):
+        return True
+    status_code = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return status_code in OVERLOAD_STATUS_CODES
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD concurrency window shared by every caller in the process.
+
+    Use ``async with limiter.slot():`` around each call. Calls that raise an
+    overload error shrink the window; other exceptions leave it unchanged.
+    Only one decrease happens per window "generation", so a burst of 429s from
+    calls that were already in flight does not collapse the window to the minimum.
+    """
+
+    def __init__(
+        self,
+        initial: int = AI_SCORING_CONCURRENCY_INITIAL,
+        min_limit: int = AI_SCORING_CONCURRENCY_MIN,
+        max_limit: int = AI_SCORING_CONCURRENCY_MAX,
+        backoff: float = AI_SCORING_CONCURRENCY_BACKOFF,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff = min(max(backoff, 0.1), 0.95)
+        self._window = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._generation = 0
+        self._successes = 0
+        self._overloads = 0
+        self._last_decrease_at: Optional[float] = None
+
+    @property
+    def limit(self) -> int:
+        """Current number of calls allowed in flight."""
+        return int(self._window)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls currently holding a slot."""
+        return self._in_flight
+
+    async def acquire(self) -> int:
+        """
+        Wait for a free slot.
+
+        Returns:
+            The window generation at acquire time; pass it back to ``release``.
+        """
+        while self._in_flight >= self.limit:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Hand a wake-up we can no longer use to the next waiter
+                if waiter.done() and not waiter.cancelled():
+                    self._wake_waiters()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self._in_flight += 1
+        return self._generation
+
+    def release(self, generation: int, overloaded: bool = False):
+        """Free a slot and adjust the window from the call's outcome."""
+        self._in_flight -= 1
+        if overloaded:
+            self._overloads += 1
+            # Calls started before the last decrease already saw the smaller window
+            if generation == self._generation:
+                self._window = max(float(self.min_limit), self._window * self.backoff)
+                self._generation += 1
+                self._last_decrease_at = time.time()
+                logger.warning(f"AI concurrency backed off to {self.limit}")
+        else:
+            self._successes += 1
+            self._window = min(float(self.max_limit), self._window + 1.0 / self._window)
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        free = self.limit - self._in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold a slot for the duration of one call."""
+        generation = await self.acquire()
+        overloaded = False
+        try:
+            yield
+        except BaseException as exc:
+            overloaded = is_overload_error(exc)
+            raise
+        finally:
+            self.release(generation, overloaded=overloaded)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current window and counters, for responses and diagnostics."""
+        return {
+            "limit": self.limit,
+            "window": round(self._window, 2),
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "successes": self._successes,
+            "overloads": self._overloads,
+            "last_backoff_at": self._last_decrease_at,
+        }
+
+
+_scoring_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+
+
+def get_scoring_limiter() -> AdaptiveConcurrencyLimiter:
+    """Get the process-wide limiter used for AI scoring calls."""
+    global _scoring_limiter
+    if _scoring_limiter is None:
+        _scoring_limiter = AdaptiveConcurrencyLimiter()
+    return _scoring_limiter
@@ -0,0 +1,82 @@
+"""
+Lifecycle of shared datasheet content.
+
+Uploads are stored and parsed once per distinct file (``DatasheetContent``,
+keyed by SHA-256) and any number of documents point at the same content.
+When a document is re-pointed at another file, or its component or project
+is deleted, ``release_datasheet_contents`` queues a collect_datasheet_contents
+job. The job deletes each content no document references any more, together
+with its parsed pages, its blob and its cached chunk index.
+
+Uploads lock the content row before writing the blob and referencing it (see
+``routers.datasheets._get_or_create_content``), and the job checks references
+under the same lock, so content is never collected from under an upload.
+"""
+
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app import models
+from app.datasheets.search_index import get_index_cache
+from app.services.blob_store import get_blob_store
+from app.services.jobs import FINISHED_STATUSES, enqueue_job, job_handler
+
+logger = logging.getLogger(__name__)
+
+
+def content_parse_in_progress(db: Session, content: models.DatasheetContent) -> bool:
+    """True if a queued or running job will parse ``content``."""
+    if content.parse_status != "pending" or content.parse_job_id is None:
+        return False
+    job = db.query(models.Job).filter(models.Job.id == content.parse_job_id).first()
+    return job is not None and job.status not in FINISHED_STATUSES
+
+
+def content_referenced(db: Session, sha256: str) -> bool:
+    """True if any document points at the content."""
+    return db.query(models.DatasheetDocument.id).filter(
+        models.DatasheetDocument.content_sha256 == sha256
+    ).first() is not None
+
+
+def release_datasheet_contents(db: Session, sha256s: Iterable[Optional[str]]) -> Optional[models.Job]:
+    """
+    Queue collection of contents that may have lost their last document.
+
+    Call after the change that dropped the references is committed.
+    """
+    candidates = sorted({sha256 for sha256 in sha256s if sha256})
+    if not candidates:
+        return None
+    return enqueue_job(db, "collect_datasheet_contents", {"sha256s": candidates})
+
+
+@job_handler("collect_datasheet_contents")
+async def _run_collect_datasheet_contents_job(db: Session, payload: dict):
+    """Delete unreferenced contents with their pages, blobs and cached indexes."""
+    blob_store = get_blob_store()
+    collected = []
+    for sha256 in payload["sha256s"]:
+        content = db.query(models.DatasheetContent).filter(
+            models.DatasheetContent.sha256 == sha256
+        ).with_for_update().first()
+        # A running parse job releases its content again when it finishes unreferenced
+        if content is None or content_referenced(db, sha256) or content_parse_in_progress(db, content):
+            db.commit()
+            continue
+
+        db.query(models.DatasheetContentPage).filter(
+            models.DatasheetContentPage.content_sha256 == sha256
+        ).delete(synchronize_session=False)
+        db.delete(content)
+        # Removed while the row is still locked; an upload waiting on the lock rewrites the blob
+        blob_store.delete(sha256)
+        db.commit()
+        get_index_cache().invalidate(f"content:{sha256}")
+        collected.append(sha256)
+
+    if collected:
+        logger.info(f"Collected {len(collected)} unreferenced datasheet content(s)")
+    return {"collected": collected}
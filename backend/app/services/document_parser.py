@@ -5,6 +5,8 @@ from typing import Dict, Any, Optional
 import logging
 import json
 
+from app.datasheets.pdf_extract import extract_page_texts
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,6 +90,9 @@ class DocumentParserService:
         """
         Extract text from PDF.
         
+        Large PDFs are extracted in parallel page ranges; a page that fails
+        to extract contributes no text.
+        
         Args:
             file_path: Path to PDF file
             
@@ -95,14 +100,7 @@ class DocumentParserService:
             Extracted text as string
         """
         try:
-            import pdfplumber
-            
-            text_parts = []
-            
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text() or ""
-                    text_parts.append(page_text)
+            text_parts = [page_text or "" for page_text in extract_page_texts(file_path)]
             
             full_text = "\n\n".join(text_parts)
             logger.info(f"Successfully extracted {len(full_text)} characters from PDF")
@@ -0,0 +1,461 @@
+"""
+Durable background jobs for long-running AI and rendering work.
+
+Jobs are rows in the ``jobs`` table. Handlers are registered by kind with
+``@job_handler("kind")`` and receive their own database session plus the JSON
+payload given to ``enqueue_job``. Two backends claim and run them:
+
+- ``postgres``: workers claim queued jobs with SELECT ... FOR UPDATE SKIP
+  LOCKED, so any number of them can share the table. The web process runs
+  one worker loop itself (unless JOB_EMBEDDED_WORKER is false); more can be
+  started with ``python -m app.worker``. Jobs whose heartbeat goes stale
+  (worker crashed) are reclaimed, up to JOB_MAX_ATTEMPTS.
+- ``inprocess``: jobs run as asyncio tasks inside the web process. Meant for
+  SQLite local development, where no worker is running.
+
+Cancellation is cooperative: a queued job is canceled immediately, a running
+job is flagged and its handler task is cancelled at the next heartbeat. Kinds
+registered with an ``on_cancel`` cleanup (e.g. stopping a provider batch) run
+it when canceled; a queued job of such a kind is canceled by a worker.
+
+A handler that has to wait for something external (e.g. a provider batch)
+raises ``RescheduleJob``: the job goes back to the queue with ``run_after``
+set instead of occupying a worker slot while it waits.
+"""
+
+import asyncio
+import importlib
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from uuid import UUID
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.database import DATABASE_URL, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+JOB_BACKEND = os.getenv("JOB_BACKEND") or ("inprocess" if DATABASE_URL.startswith("sqlite") else "postgres")
+JOB_POLL_INTERVAL_SECONDS = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", "2"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+# With the postgres backend, also run a worker loop inside each web process
+JOB_EMBEDDED_WORKER = os.getenv("JOB_EMBEDDED_WORKER", "true").lower() == "true"
+
+# Modules that register job handlers; the worker imports them at startup
+JOB_HANDLER_MODULES = ("app.routers.ai", "app.routers.datasheets", "app.services.datasheet_contents")
+
+FINISHED_STATUSES = ("succeeded", "failed", "canceled")
+
+JobHandler = Callable[[Session, Dict[str, Any]], Awaitable[Any]]
+_handlers: Dict[str, JobHandler] = {}
+_cancel_handlers: Dict[str, JobHandler] = {}
+
+
+class RescheduleJob(Exception):
+    """Raised by a handler to run its job again after ``delay`` seconds instead of finishing it."""
+
+    def __init__(self, delay: float):
+        super().__init__(f"Job rescheduled in {delay:.0f}s")
+        self.delay = delay
+
+
+def job_handler(kind: str, on_cancel: Optional[JobHandler] = None) -> Callable[[JobHandler], JobHandler]:
+    """
+    Register an async ``handler(db, payload)`` for a job kind.
+
+    ``on_cancel(db, payload)`` runs when a job of the kind is canceled, to
+    release anything the handler started outside the process.
+    """
+    def register(handler: JobHandler) -> JobHandler:
+        _handlers[kind] = handler
+        if on_cancel is not None:
+            _cancel_handlers[kind] = on_cancel
+        return handler
+    return register
+
+
+def load_job_handlers():
+    """Import every module that registers job handlers."""
+    for module in JOB_HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def registered_job_kinds() -> Set[str]:
+    """Job kinds that can be enqueued."""
+    return set(_handlers)
+
+
+class JobBackend:
+    """Decides where enqueued jobs run."""
+
+    def notify(self, job_id: UUID, delay: float = 0):
+        """Called after a job is enqueued; it may not run before ``delay`` seconds."""
+
+
+class PostgresJobBackend(JobBackend):
+    """Jobs are claimed by worker processes using FOR UPDATE SKIP LOCKED."""
+
+    def __init__(self):
+        self._wake: Optional[asyncio.Event] = None
+        self._wake_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def notify(self, job_id: UUID, delay: float = 0):
+        # Wakes a worker loop running in this process; other workers find the job on their next poll.
+        # Deferred jobs are found by polling once run_after has passed.
+        if delay > 0:
+            return
+        # Sync endpoints enqueue from the threadpool, hence call_soon_threadsafe.
+        if self._wake is not None and self._wake_loop is not None:
+            try:
+                self._wake_loop.call_soon_threadsafe(self._wake.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    async def wait_for_work(self, timeout: float):
+        """Sleep until ``timeout`` passes or a job is enqueued in this process."""
+        if self._wake is None:
+            self._wake = asyncio.Event()
+            self._wake_loop = asyncio.get_running_loop()
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    def claim(self, db: Session, worker_id: str) -> Optional[models.Job]:
+        """Claim the oldest due queued (or stale running) job, or return None if there is none."""
+        now = datetime.now(timezone.utc)
+        stale_before = now - timedelta(seconds=JOB_STALE_SECONDS)
+        stale = and_(models.Job.status == "running", models.Job.heartbeat_at < stale_before)
+        due = and_(
+            models.Job.status == "queued",
+            or_(models.Job.run_after.is_(None), models.Job.run_after <= now),
+        )
+
+        # Give up on jobs that keep killing their workers
+        db.query(models.Job).filter(stale, models.Job.attempts >= JOB_MAX_ATTEMPTS).update(
+            {
+                models.Job.status: "failed",
+                models.Job.error: "Job exceeded its maximum number of attempts",
+                models.Job.finished_at: now,
+            },
+            synchronize_session=False,
+        )
+
+        job = db.query(models.Job).filter(
+            or_(due, stale)
+        ).order_by(models.Job.created_at).with_for_update(skip_locked=True).first()
+
+        if job is None:
+            db.commit()
+            return None
+
+        _mark_running(job, worker_id)
+        db.commit()
+        return job
+
+
+class InProcessJobBackend(JobBackend):
+    """Jobs run as asyncio tasks in the web process (SQLite development)."""
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, loop: asyncio.AbstractEventLoop):
+        """Run jobs enqueued outside the event loop (sync endpoints) on ``loop``."""
+        self._loop = loop
+
+    def notify(self, job_id: UUID, delay: float = 0):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            self._start(job_id, delay)
+            return
+        if self._loop is None or self._loop.is_closed():
+            logger.warning(f"No event loop to run job {job_id}; it stays queued until the next startup")
+            return
+        # Sync endpoints enqueue from the threadpool
+        self._loop.call_soon_threadsafe(self._start, job_id, delay)
+
+    def _start(self, job_id: UUID, delay: float = 0):
+        task = asyncio.get_running_loop().create_task(self._run(job_id, delay))
+        # Keep a reference so the task is not garbage collected mid-run
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job_id: UUID, delay: float = 0):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if await asyncio.to_thread(self._claim, job_id):
+            await execute_job(job_id)
+
+    def _claim(self, job_id: UUID) -> bool:
+        db = SessionLocal()
+        try:
+            claimed = db.query(models.Job).filter(
+                models.Job.id == job_id,
+                models.Job.status == "queued"
+            ).update(
+                {
+                    models.Job.status: "running",
+                    models.Job.attempts: models.Job.attempts + 1,
+                    models.Job.locked_by: worker_identity(),
+                    models.Job.started_at: datetime.now(timezone.utc),
+                    models.Job.heartbeat_at: datetime.now(timezone.utc),
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return bool(claimed)
+        finally:
+            db.close()
+
+
+def _mark_running(job: models.Job, worker_id: str):
+    job.status = "running"
+    job.attempts = (job.attempts or 0) + 1
+    job.locked_by = worker_id
+    job.started_at = datetime.now(timezone.utc)
+    job.heartbeat_at = datetime.now(timezone.utc)
+
+
+def worker_identity() -> str:
+    """Identifier recorded on jobs claimed by this process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+_job_backend: Optional[JobBackend] = None
+
+
+def get_job_backend() -> JobBackend:
+    """Get the configured job backend."""
+    global _job_backend
+    if _job_backend is None:
+        _job_backend = InProcessJobBackend() if JOB_BACKEND == "inprocess" else PostgresJobBackend()
+    return _job_backend
+
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    project_id: Optional[UUID] = None
+) -> models.Job:
+    """
+    Persist a new job and hand it to the backend.
+
+    Commits the session so workers can see the job immediately.
+
+    Raises:
+        ValueError: If no handler is registered for ``kind``
+    """
+    if kind not in _handlers:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    job = models.Job(
+        kind=kind,
+        status="queued",
+        project_id=project_id,
+        payload=json.dumps(jsonable_encoder(payload)),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    get_job_backend().notify(job.id)
+    return job
+
+
+def cancel_job(db: Session, job: models.Job) -> models.Job:
+    """Cancel a queued job now, or flag a running job for cancellation."""
+    run_cleanup = False
+    if job.status == "queued" and job.kind in _cancel_handlers:
+        # A worker finishes the cancellation so the kind's cleanup runs
+        job.cancel_requested = True
+        job.run_after = None
+        run_cleanup = True
+    elif job.status == "queued":
+        job.status = "canceled"
+        job.finished_at = datetime.now(timezone.utc)
+    elif job.status == "running":
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    if run_cleanup:
+        get_job_backend().notify(job.id)
+    return job
+
+
+async def execute_job(job_id: UUID):
+    """
+    Run a claimed job to completion and record its outcome.
+
+    The handler gets its own session. A separate session refreshes the
+    heartbeat every JOB_POLL_INTERVAL_SECONDS and cancels the handler if
+    cancellation was requested. Bookkeeping queries run in worker threads
+    so they do not block the event loop.
+    """
+    control = SessionLocal()
+    work = SessionLocal()
+    try:
+        job = await asyncio.to_thread(
+            lambda: control.query(models.Job).filter(models.Job.id == job_id).first()
+        )
+        if job is None:
+            return
+        handler = _handlers.get(job.kind)
+        if handler is None:
+            await asyncio.to_thread(
+                _finish, control, job, "failed", error=f"No handler registered for job kind {job.kind}"
+            )
+            return
+
+        payload = json.loads(job.payload) if job.payload else {}
+        if job.cancel_requested:
+            # Canceled while queued
+            await _run_cancel_handler(work, job, payload)
+            await asyncio.to_thread(_finish, control, job, "canceled")
+            return
+
+        task = asyncio.ensure_future(handler(work, payload))
+        canceled = False
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=JOB_POLL_INTERVAL_SECONDS)
+            if done:
+                break
+            if await asyncio.to_thread(_heartbeat, control, job):
+                task.cancel()
+                canceled = True
+                await asyncio.gather(task, return_exceptions=True)
+                break
+
+        if canceled:
+            await asyncio.to_thread(work.rollback)
+            await _run_cancel_handler(work, job, payload)
+            await asyncio.to_thread(_finish, control, job, "canceled")
+            return
+
+        try:
+            result = task.result()
+        except RescheduleJob as exc:
+            await asyncio.to_thread(_reschedule, control, job, exc.delay)
+            get_job_backend().notify(job.id, exc.delay)
+            return
+        except HTTPException as exc:
+            await asyncio.to_thread(work.rollback)
+            await asyncio.to_thread(_finish, control, job, "failed", error=str(exc.detail))
+            return
+        except Exception as exc:
+            await asyncio.to_thread(work.rollback)
+            logger.exception(f"Job {job_id} ({job.kind}) failed")
+            await asyncio.to_thread(_finish, control, job, "failed", error=str(exc))
+            return
+        await asyncio.to_thread(_finish, control, job, "succeeded", result=result)
+    finally:
+        work.close()
+        control.close()
+
+
+async def _run_cancel_handler(db: Session, job: models.Job, payload: Dict[str, Any]):
+    on_cancel = _cancel_handlers.get(job.kind)
+    if on_cancel is None:
+        return
+    try:
+        await on_cancel(db, payload)
+    except Exception:
+        await asyncio.to_thread(db.rollback)
+        logger.exception(f"Cleanup of canceled job {job.id} ({job.kind}) failed")
+
+
+def _heartbeat(db: Session, job: models.Job) -> bool:
+    """Refresh a running job's heartbeat; returns True if cancellation was requested instead."""
+    db.refresh(job)
+    if job.cancel_requested:
+        return True
+    job.heartbeat_at = datetime.now(timezone.utc)
+    db.commit()
+    return False
+
+
+def _reschedule(db: Session, job: models.Job, delay: float):
+    # Back in the queue; attempts count crashed runs, and this run did not crash
+    job.status = "queued"
+    job.run_after = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    job.attempts = 0
+    job.locked_by = None
+    job.heartbeat_at = None
+    db.commit()
+    logger.info(f"Job {job.id} ({job.kind}) rescheduled in {delay:.0f}s")
+
+
+def _finish(db: Session, job: models.Job, status: str, result: Any = None, error: Optional[str] = None):
+    job.status = status
+    job.result = json.dumps(jsonable_encoder(result)) if result is not None else None
+    job.error = error
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    logger.info(f"Job {job.id} ({job.kind}) {status}")
+
+
+def resume_in_process_jobs():
+    """
+    Restart jobs left behind by a previous in-process run.
+
+    Call from the web app's async startup when the in-process backend is
+    active; later jobs run on the same event loop. Jobs that were running
+    when the process stopped are retried until they reach JOB_MAX_ATTEMPTS;
+    deferred jobs start once their run_after has passed.
+    """
+    backend = get_job_backend()
+    if not isinstance(backend, InProcessJobBackend):
+        return
+    backend.attach(asyncio.get_running_loop())
+
+    db = SessionLocal()
+    try:
+        for job in db.query(models.Job).filter(models.Job.status == "running").all():
+            if (job.attempts or 0) >= JOB_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.error = "Job exceeded its maximum number of attempts"
+                job.finished_at = datetime.now(timezone.utc)
+            else:
+                job.status = "queued"
+        db.commit()
+        queued = db.query(models.Job.id, models.Job.run_after).filter(models.Job.status == "queued").all()
+    finally:
+        db.close()
+
+    now = datetime.now(timezone.utc)
+    for job_id, run_after in queued:
+        if run_after is not None and run_after.tzinfo is None:
+            run_after = run_after.replace(tzinfo=timezone.utc)  # SQLite returns naive UTC
+        backend.notify(job_id, max(0.0, (run_after - now).total_seconds()) if run_after else 0)
+
+
+def job_summary(job: models.Job) -> Dict[str, Any]:
+    """API representation of a job."""
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "project_id": job.project_id,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "cancel_requested": job.cancel_requested,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
@@ -0,0 +1,202 @@
+"""
+Persistent cache for Claude responses.
+
+Responses are stored in a local SQLite file, keyed by a SHA-256 of the model,
+system prompt, user prompt and max_tokens, so an identical request is answered
+from disk instead of the API. Entries expire after a TTL and the least recently
+used entries are evicted once the cache grows past its size limit. Expired
+entries are swept every SWEEP_EVERY_WRITES writes, and the size limit is
+checked against a running count, so a write does not scan the table.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+AI_RESPONSE_CACHE_ENABLED = os.getenv("AI_RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+AI_RESPONSE_CACHE_PATH = os.getenv("AI_RESPONSE_CACHE_PATH", "ai_cache/responses.sqlite3")
+AI_RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("AI_RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+AI_RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("AI_RESPONSE_CACHE_MAX_ENTRIES", "20000"))
+
+# Writes between sweeps for expired entries, which also recount the table
+SWEEP_EVERY_WRITES = 256
+
+
+def response_cache_key(model: str, system: str, user: str, max_tokens: int) -> str:
+    """Content hash identifying one Claude request."""
+    payload = json.dumps(
+        {"model": model, "system": system, "user": user, "max_tokens": max_tokens},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed TTL + LRU cache of response text.
+
+    Cache errors are logged and treated as misses; they never fail the AI call.
+    """
+
+    def __init__(
+        self,
+        path: str = AI_RESPONSE_CACHE_PATH,
+        ttl_seconds: int = AI_RESPONSE_CACHE_TTL_SECONDS,
+        max_entries: int = AI_RESPONSE_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Running row count, so writes need not count the table; recounted at each sweep
+        self._entries = 0
+        self._writes_since_sweep = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_last_accessed ON responses (last_accessed)")
+            (self._entries,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str, allow_expired: bool = False) -> Optional[str]:
+        """
+        Return the cached response for ``key``, or None on a miss or expiry.
+
+        With allow_expired, an expired entry is still returned; used to serve
+        something while the provider is unavailable. Expired entries are only
+        removed by ``put``, so they survive an outage during which nothing new
+        is written.
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                row = conn.execute(
+                    "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                response, created_at = row
+                if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds and not allow_expired:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return response
+            except sqlite3.Error as e:
+                logger.warning(f"AI response cache read failed: {e}")
+                self.misses += 1
+                return None
+
+    def put(self, key: str, response: str):
+        """Store a response, evicting expired and least recently used entries as needed."""
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connection()
+                inserted = conn.execute(
+                    "INSERT OR IGNORE INTO responses (key, response, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                ).rowcount
+                if inserted > 0:
+                    self._entries += 1
+                else:
+                    conn.execute(
+                        "UPDATE responses SET response = ?, created_at = ?, last_accessed = ? WHERE key = ?",
+                        (response, now, now, key),
+                    )
+                self.writes += 1
+                self._evict(conn, now)
+            except sqlite3.Error as e:
+                logger.warning(f"AI response cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        self._writes_since_sweep += 1
+        if self._writes_since_sweep >= SWEEP_EVERY_WRITES:
+            self._writes_since_sweep = 0
+            if self.ttl_seconds > 0:
+                expired = conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+                ).rowcount
+                self.evictions += max(expired, 0)
+            # Other processes may share the file; resync the running count
+            (self._entries,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if self.max_entries > 0:
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                evicted = conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_accessed LIMIT ?)",
+                    (overflow,),
+                ).rowcount
+                self._entries -= max(evicted, 0)
+                self.evictions += max(evicted, 0)
+
+    def clear(self):
+        """Remove every cached response."""
+        with self._lock:
+            try:
+                self._connection().execute("DELETE FROM responses")
+                self._entries = 0
+            except sqlite3.Error as e:
+                logger.warning(f"AI response cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            try:
+                (entries,) = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()
+            except sqlite3.Error:
+                entries = None
+        lookups = self.hits + self.misses
+        return {
+            "enabled": AI_RESPONSE_CACHE_ENABLED,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_entries": self.max_entries,
+        }
+
+
+_response_cache: Optional[LLMResponseCache] = None
+
+
+def get_response_cache() -> LLMResponseCache:
+    """Get the process-wide response cache."""
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = LLMResponseCache()
+    return _response_cache
@@ -0,0 +1,195 @@
+"""
+Project snapshot loader for results, export and report endpoints.
+
+Loads a project with its criteria, components and scores in two round trips
+(project + criteria, components + scores) and returns compact, read-only
+records instead of full ORM objects. Score lookups are keyed by native
+(component_id, criterion_id) UUID pairs.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+@dataclass(slots=True)
+class CriterionRecord:
+    """Read-only view of a Criterion row."""
+    id: UUID
+    project_id: UUID
+    name: str
+    description: Optional[str]
+    weight: float
+    unit: Optional[str]
+    higher_is_better: Optional[bool]
+    minimum_requirement: Optional[float]
+    maximum_requirement: Optional[float]
+
+
+@dataclass(slots=True)
+class ComponentRecord:
+    """Read-only view of a Component row."""
+    id: UUID
+    project_id: UUID
+    manufacturer: str
+    part_number: str
+    description: Optional[str]
+    datasheet_url: Optional[str]
+    datasheet_file_path: Optional[str]
+    availability: Any
+    source: Any
+
+
+@dataclass(slots=True)
+class ScoreRecord:
+    """Read-only view of a Score row."""
+    id: UUID
+    component_id: UUID
+    criterion_id: UUID
+    raw_value: Optional[str]
+    score: int
+    rationale: Optional[str]
+    extraction_confidence: Optional[float]
+    manually_adjusted: Optional[bool]
+    adjusted_by: Optional[UUID]
+    adjusted_at: Optional[datetime]
+    input_fingerprint: Optional[str] = None
+
+    @classmethod
+    def from_model(cls, score: models.Score) -> "ScoreRecord":
+        """Build a record from a loaded Score ORM object."""
+        return cls(
+            id=score.id,
+            component_id=score.component_id,
+            criterion_id=score.criterion_id,
+            raw_value=score.raw_value,
+            score=score.score,
+            rationale=score.rationale,
+            extraction_confidence=score.extraction_confidence,
+            manually_adjusted=score.manually_adjusted,
+            adjusted_by=score.adjusted_by,
+            adjusted_at=score.adjusted_at,
+            input_fingerprint=score.input_fingerprint,
+        )
+
+
+_CRITERION_COLUMNS = (
+    models.Criterion.id,
+    models.Criterion.project_id,
+    models.Criterion.name,
+    models.Criterion.description,
+    models.Criterion.weight,
+    models.Criterion.unit,
+    models.Criterion.higher_is_better,
+    models.Criterion.minimum_requirement,
+    models.Criterion.maximum_requirement,
+)
+
+_COMPONENT_COLUMNS = (
+    models.Component.id,
+    models.Component.project_id,
+    models.Component.manufacturer,
+    models.Component.part_number,
+    models.Component.description,
+    models.Component.datasheet_url,
+    models.Component.datasheet_file_path,
+    models.Component.availability,
+    models.Component.source,
+)
+
+_SCORE_COLUMNS = (
+    models.Score.id.label("score_id"),
+    models.Score.component_id,
+    models.Score.criterion_id,
+    models.Score.raw_value,
+    models.Score.score,
+    models.Score.rationale,
+    models.Score.extraction_confidence,
+    models.Score.manually_adjusted,
+    models.Score.adjusted_by,
+    models.Score.adjusted_at,
+    models.Score.input_fingerprint,
+)
+
+
+@dataclass
+class ProjectSnapshot:
+    """A project together with its criteria, components and scores."""
+    project: Optional[models.Project]
+    criteria: List[CriterionRecord] = field(default_factory=list)
+    components: List[ComponentRecord] = field(default_factory=list)
+    scores: List[ScoreRecord] = field(default_factory=list)
+
+    @property
+    def scores_dict(self) -> Dict[Tuple[UUID, UUID], ScoreRecord]:
+        """Scores keyed by (component_id, criterion_id)."""
+        return {(s.component_id, s.criterion_id): s for s in self.scores}
+
+
+def load_project_with_criteria(
+    db: Session,
+    project_id: UUID
+) -> Optional[Tuple[models.Project, List[CriterionRecord]]]:
+    """
+    Load a project and its criteria in a single query.
+
+    Returns:
+        (project, criteria) or None if the project does not exist
+    """
+    rows = db.query(models.Project, *_CRITERION_COLUMNS).outerjoin(
+        models.Criterion, models.Criterion.project_id == models.Project.id
+    ).filter(models.Project.id == project_id).all()
+
+    if not rows:
+        return None
+
+    project = rows[0][0]
+    criteria = [CriterionRecord(*row[1:]) for row in rows if row[1] is not None]
+    return project, criteria
+
+
+def load_components_with_scores(
+    db: Session,
+    project_id: UUID
+) -> Tuple[List[ComponentRecord], List[ScoreRecord]]:
+    """
+    Load a project's components and their scores in a single query.
+
+    Components without scores are kept; their score columns come back NULL.
+    """
+    rows = db.query(*_COMPONENT_COLUMNS, *_SCORE_COLUMNS).outerjoin(
+        models.Score, models.Score.component_id == models.Component.id
+    ).filter(models.Component.project_id == project_id).all()
+
+    split = len(_COMPONENT_COLUMNS)
+    components: Dict[UUID, ComponentRecord] = {}
+    scores: List[ScoreRecord] = []
+    for row in rows:
+        component_id = row[0]
+        if component_id not in components:
+            components[component_id] = ComponentRecord(*row[:split])
+        if row[split] is not None:
+            scores.append(ScoreRecord(*row[split:]))
+
+    return list(components.values()), scores
+
+
+def load_project_snapshot(db: Session, project_id: UUID) -> Optional[ProjectSnapshot]:
+    """
+    Load everything needed to rank, export or report on a project.
+
+    Returns:
+        ProjectSnapshot, or None if the project does not exist
+    """
+    loaded = load_project_with_criteria(db, project_id)
+    if loaded is None:
+        return None
+
+    project, criteria = loaded
+    components, scores = load_components_with_scores(db, project_id)
+    return ProjectSnapshot(project=project, criteria=criteria, components=components, scores=scores)
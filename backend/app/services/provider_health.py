@@ -0,0 +1,384 @@
+"""
+Latency hedging and circuit breaking for LLM provider calls.
+
+Each provider (Anthropic, Gemini) has one ``ProviderGuard`` in the process:
+
+- Hedging: latencies are tracked per operation. Once an operation has enough
+  samples, a call still running after that operation's p95 latency gets a
+  duplicate request, and whichever finishes first wins. The slow tail stops
+  holding scoring slots for the full timeout.
+- Circuit breaking: after AI_CIRCUIT_FAILURE_THRESHOLD consecutive provider
+  failures (5xx, timeouts, connection errors) the circuit opens and calls
+  fail immediately with ``ProviderUnavailableError`` for
+  AI_CIRCUIT_RESET_SECONDS. One trial call is then let through; success
+  closes the circuit, failure opens it again, and so does a trial that is
+  cancelled or still running after AI_CIRCUIT_SLOW_CALL_SECONDS. Callers
+  serve cached or fallback results while it is open. Rate limits (429) are
+  left to the adaptive concurrency limiter and do not trip the circuit.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+AI_HEDGE_ENABLED = os.getenv("AI_HEDGE_ENABLED", "true").lower() == "true"
+AI_HEDGE_MIN_SAMPLES = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))
+AI_HEDGE_MIN_DELAY_SECONDS = float(os.getenv("AI_HEDGE_MIN_DELAY_SECONDS", "2"))
+# Hedged duplicates of blocking calls in flight per provider; past this, slow calls are not hedged
+AI_HEDGE_MAX_IN_FLIGHT = int(os.getenv("AI_HEDGE_MAX_IN_FLIGHT", "8"))
+AI_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("AI_CIRCUIT_FAILURE_THRESHOLD", "5"))
+AI_CIRCUIT_RESET_SECONDS = float(os.getenv("AI_CIRCUIT_RESET_SECONDS", "30"))
+# A call cancelled by its caller after this long counts as a provider failure (it hung);
+# also the deadline for the half-open trial call
+AI_CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("AI_CIRCUIT_SLOW_CALL_SECONDS", "45"))
+
+LATENCY_WINDOW = 200
+
+T = TypeVar("T")
+
+
+class ProviderUnavailableError(Exception):
+    """Raised without calling the provider while its circuit is open."""
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """
+    True for errors that mean the provider is struggling, not that the request is invalid.
+
+    Rate-limit responses are not failures here: the provider is up and the
+    concurrency limiter already backs off on them.
+    """
+    if isinstance(exc, (ProviderUnavailableError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    if type(exc).__name__ in (
+        "APIConnectionError", "APITimeoutError", "InternalServerError", "OverloadedError", "ServerError", "ConnectError"
+    ):
+        return True
+    status_code = getattr(exc, "status_code", None) or getattr(exc, "code", None)
+    return isinstance(status_code, int) and status_code >= 500
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies for one operation."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which to send a duplicate, or None while there are too few samples."""
+        if len(self._samples) < AI_HEDGE_MIN_SAMPLES:
+            return None
+        return max(AI_HEDGE_MIN_DELAY_SECONDS, self.percentile(0.95) or 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50 = self.percentile(0.5)
+        p95 = self.percentile(0.95)
+        return {
+            "samples": len(self._samples),
+            "p50_seconds": round(p50, 3) if p50 is not None else None,
+            "p95_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker counting consecutive provider failures."""
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = AI_CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = AI_CIRCUIT_RESET_SECONDS,
+        trial_timeout: float = AI_CIRCUIT_SLOW_CALL_SECONDS,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.trial_timeout = trial_timeout
+        self._lock = threading.Lock()
+        self._state = "closed"
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_started: Optional[float] = None
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        now = time.monotonic()
+        if self._state == "open" and now - (self._opened_at or 0) >= self.reset_seconds:
+            self._state = "half_open"
+            self._trial_in_flight = False
+        elif (
+            self._state == "half_open"
+            and self._trial_in_flight
+            and now - (self._trial_started or 0) >= self.trial_timeout
+        ):
+            # The trial hung; whatever it returns later is still recorded
+            logger.warning(f"{self.name} circuit trial call exceeded {self.trial_timeout:.0f}s")
+            self._reopen(now)
+        return self._state
+
+    def _reopen(self, now: float):
+        self._state = "open"
+        self._opened_at = now
+        self._trial_in_flight = False
+        self.times_opened += 1
+
+    def before_call(self):
+        """Raise ProviderUnavailableError if the call must not be sent."""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_started = time.monotonic()
+                return
+            self.rejected += 1
+        raise ProviderUnavailableError(
+            f"{self.name} is temporarily unavailable (circuit open); try again shortly"
+        )
+
+    def record_success(self):
+        with self._lock:
+            if self._state != "closed":
+                logger.info(f"{self.name} circuit closed")
+            self._state = "closed"
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == "half_open" or (
+                self._state == "closed" and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._reopen(time.monotonic())
+                logger.warning(f"{self.name} circuit opened after {self._consecutive_failures} consecutive failures")
+
+    def record_inconclusive(self):
+        """A call ended without telling us anything (e.g. cancelled early); a pending trial reopens the circuit."""
+        with self._lock:
+            if self._state == "half_open" and self._trial_in_flight:
+                self._reopen(time.monotonic())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            state = self._current_state()
+            retry_in = None
+            if state == "open":
+                retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - (self._opened_at or 0))), 1)
+            return {
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected,
+                "retry_in_seconds": retry_in,
+            }
+
+
+class ProviderGuard:
+    """Circuit breaker plus per-operation latency hedging for one provider."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.hedges_skipped = 0
+        self._hedge_capacity = threading.BoundedSemaphore(max(1, AI_HEDGE_MAX_IN_FLIGHT))
+
+    def _tracker(self, operation: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self._latency.get(operation)
+            if tracker is None:
+                tracker = self._latency[operation] = LatencyTracker()
+            return tracker
+
+    def _hedge_delay(self, operation: str, hedge: bool) -> Optional[float]:
+        if not (hedge and AI_HEDGE_ENABLED):
+            return None
+        return self._tracker(operation).hedge_delay()
+
+    def record_outcome(self, operation: str, started: float, exc: Optional[BaseException], hedge_won: bool = False):
+        """Feed a finished call (``exc`` None on success) into the latency window and circuit breaker."""
+        elapsed = time.monotonic() - started
+        if exc is None:
+            self._tracker(operation).record(elapsed)
+            self.breaker.record_success()
+            if hedge_won:
+                with self._lock:
+                    self.hedge_wins += 1
+        elif isinstance(exc, GeneratorExit):
+            # The consumer closed a streaming call; that says nothing about the provider
+            self.breaker.record_inconclusive()
+        elif isinstance(exc, asyncio.CancelledError) or not isinstance(exc, Exception):
+            # Cancelled or interrupted: only a call that had already hung says something about the provider
+            if elapsed >= AI_CIRCUIT_SLOW_CALL_SECONDS:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_inconclusive()
+        elif is_provider_failure(exc):
+            self.breaker.record_failure()
+        else:
+            # The provider answered; the request itself was rejected
+            self.breaker.record_success()
+
+    def _count_hedge(self, operation: str, delay: float):
+        with self._lock:
+            self.hedged += 1
+        logger.info(f"Hedging slow {self.name} {operation} call after {delay:.1f}s")
+
+    async def call(self, operation: str, attempt: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """
+        Run ``attempt()`` under the circuit breaker, hedging it once if it is slow.
+
+        ``attempt`` must be safe to run twice concurrently.
+        """
+        self.breaker.before_call()
+        started = time.monotonic()
+        delay = self._hedge_delay(operation, hedge)
+        tasks = [asyncio.ensure_future(attempt())]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                self._count_hedge(operation, delay or 0.0)
+                tasks.append(asyncio.ensure_future(attempt()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.record_outcome(operation, started, None, hedge_won=task is not tasks[0])
+                        return task.result()
+                    error = error or task.exception()
+            assert error is not None
+            self.record_outcome(operation, started, error)
+            raise error
+        except asyncio.CancelledError as exc:
+            self.record_outcome(operation, started, exc)
+            raise
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def call_sync(self, operation: str, attempt: Callable[[], T], hedge: bool = True) -> T:
+        """
+        Blocking variant of ``call``.
+
+        Once the operation can be hedged, the first attempt runs on its own
+        thread so the caller can return whichever attempt finishes first.
+        Hedges have separate, bounded capacity (AI_HEDGE_MAX_IN_FLIGHT); when
+        it is used up the call simply waits for its first attempt.
+        """
+        self.breaker.before_call()
+        started = time.monotonic()
+        delay = self._hedge_delay(operation, hedge)
+        if delay is None:
+            try:
+                result = attempt()
+            except BaseException as exc:
+                self.record_outcome(operation, started, exc)
+                raise
+            self.record_outcome(operation, started, None)
+            return result
+
+        futures = [_start_thread(attempt, f"{self.name}-{operation}")]
+        done, _ = wait(futures, timeout=delay)
+        if not done:
+            if self._hedge_capacity.acquire(blocking=False):
+                self._count_hedge(operation, delay)
+                hedge_future = _start_thread(attempt, f"{self.name}-{operation}-hedge")
+                hedge_future.add_done_callback(lambda _: self._hedge_capacity.release())
+                futures.append(hedge_future)
+            else:
+                with self._lock:
+                    self.hedges_skipped += 1
+        pending = set(futures)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    # A losing thread cannot be interrupted; its result is discarded
+                    self.record_outcome(operation, started, None, hedge_won=future is not futures[0])
+                    return future.result()
+                error = error or future.exception()
+        assert error is not None
+        self.record_outcome(operation, started, error)
+        raise error
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Circuit state, hedging counters and latency percentiles, for diagnostics."""
+        with self._lock:
+            latency = {operation: tracker.snapshot() for operation, tracker in self._latency.items()}
+            hedged, hedge_wins, skipped = self.hedged, self.hedge_wins, self.hedges_skipped
+        return {
+            "circuit": self.breaker.snapshot(),
+            "hedging": {
+                "enabled": AI_HEDGE_ENABLED,
+                "hedged_calls": hedged,
+                "hedge_wins": hedge_wins,
+                "skipped_at_capacity": skipped,
+            },
+            "latency": latency,
+        }
+
+
+def _start_thread(fn: Callable[[], T], name: str) -> "Future[T]":
+    """Run ``fn`` on a new daemon thread; a losing attempt finishes there without holding pool capacity."""
+    future: "Future[T]" = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn())
+        except BaseException as exc:
+            future.set_exception(exc)
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+    return future
+
+
+_guards: Dict[str, ProviderGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_provider_guard(provider: str) -> ProviderGuard:
+    """Get the process-wide guard for a provider ("anthropic" or "gemini")."""
+    with _guards_lock:
+        guard = _guards.get(provider)
+        if guard is None:
+            guard = _guards[provider] = ProviderGuard(provider)
+        return guard
+
+
+def provider_health_snapshot() -> Dict[str, Any]:
+    """Snapshots of every provider's guard."""
+    return {provider: get_provider_guard(provider).snapshot() for provider in ("anthropic", "gemini")}
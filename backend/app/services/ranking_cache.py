@@ -0,0 +1,198 @@
+"""
+Materialized ranking cache for project results.
+
+Results, exports and reports all need the same components, criteria, scores
+and computed rankings. This module keeps the last computed ranking per project
+in process memory, keyed by ``Project.revision``. Every write that can change a
+ranking bumps the revision in the same transaction (see ``bump_project_revision``),
+so a cached entry is only served while it still matches the database. Single
+score edits can carry the cached ranking forward (see ``apply_score_update``).
+"""
+
+import threading
+from collections import ChainMap, OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.project_snapshot import (
+    ComponentRecord,
+    CriterionRecord,
+    ScoreRecord,
+    load_components_with_scores,
+    load_project_with_criteria,
+)
+from app.services.scoring_service import get_scoring_service
+
+MAX_CACHED_PROJECTS = 256
+# Single-score updates stacked on a cached mapping before it is flattened again
+MAX_OVERLAY_DEPTH = 32
+
+
+@dataclass
+class ProjectRankings:
+    """Components, criteria, scores and ranked results for one project revision."""
+    revision: int
+    components: List[ComponentRecord]
+    criteria: List[CriterionRecord]
+    scores_dict: Mapping[Tuple[UUID, UUID], ScoreRecord] = field(default_factory=dict)
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    totals: Mapping[UUID, float] = field(default_factory=dict)  # Unrounded weighted totals
+    positions: Dict[UUID, int] = field(default_factory=dict)  # Load order, used to break ties
+    project: Any = None  # Request-scoped ORM project; never stored in the cache
+
+    @property
+    def scores(self) -> List[ScoreRecord]:
+        """All scores in the project."""
+        return list(self.scores_dict.values())
+
+
+class RankingCache:
+    """Thread-safe LRU of ProjectRankings keyed by project id and revision."""
+
+    def __init__(self, max_projects: int = MAX_CACHED_PROJECTS):
+        self.max_projects = max_projects
+        self._entries: "OrderedDict[UUID, ProjectRankings]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, project_id: UUID, revision: int) -> Optional[ProjectRankings]:
+        """Return the cached rankings if they were computed at ``revision``."""
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is None or entry.revision != revision:
+                return None
+            self._entries.move_to_end(project_id)
+            return entry
+
+    def put(self, project_id: UUID, rankings: ProjectRankings):
+        """Store rankings, evicting the least recently used project if full."""
+        with self._lock:
+            # Revisions only grow; a slow reader must not replace a newer entry
+            entry = self._entries.get(project_id)
+            if entry is not None and entry.revision > rankings.revision:
+                return
+            self._entries[project_id] = rankings
+            self._entries.move_to_end(project_id)
+            while len(self._entries) > self.max_projects:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, project_id: UUID):
+        """Drop any cached rankings for a project."""
+        with self._lock:
+            self._entries.pop(project_id, None)
+
+
+_ranking_cache = RankingCache()
+
+
+def get_ranking_cache() -> RankingCache:
+    """Get the ranking cache singleton."""
+    return _ranking_cache
+
+
+def bump_project_revision(db: Session, project_id: UUID) -> Optional[int]:
+    """
+    Increment a project's revision as part of the caller's transaction.
+
+    Call this from any write that changes components, criteria or scores.
+    The UPDATE is atomic and row-locks the project until commit, so each
+    committed write gets its own revision.
+
+    Returns:
+        The new revision, or None if the project does not exist
+    """
+    return db.execute(
+        update(models.Project)
+        .where(models.Project.id == project_id)
+        .values(revision=models.Project.revision + 1)
+        .returning(models.Project.revision)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def _overlay(base: Mapping, key: Any, value: Any) -> Mapping:
+    """
+    Copy-on-write ``{**base, key: value}``.
+
+    The change is layered over ``base`` instead of copying it, so entries
+    for older revisions stay valid. Once MAX_OVERLAY_DEPTH layers have piled
+    up they are flattened into one dict, keeping lookups cheap.
+    """
+    maps = base.maps if isinstance(base, ChainMap) else [base]
+    if len(maps) >= MAX_OVERLAY_DEPTH:
+        maps = [dict(base)]
+    return ChainMap({key: value}, *maps)
+
+
+def apply_score_update(project_id: UUID, revision: Optional[int], score: ScoreRecord):
+    """
+    Carry cached rankings forward across a committed single-score update.
+
+    ``revision`` is the value returned by bump_project_revision for that write.
+    If rankings for the previous revision are cached, only the changed
+    component is re-scored and re-sorted; otherwise this is a no-op and the
+    next read recomputes as usual. Call only after the write has committed.
+    """
+    if revision is None:
+        return
+    previous = _ranking_cache.get(project_id, revision - 1)
+    if previous is None:
+        return
+
+    try:
+        results, new_total = get_scoring_service().apply_score_delta(
+            previous.results, previous.totals, previous.positions, previous.criteria, score
+        )
+    except KeyError:
+        return
+
+    _ranking_cache.put(project_id, replace(
+        previous,
+        revision=revision,
+        scores_dict=_overlay(previous.scores_dict, (score.component_id, score.criterion_id), score),
+        results=results,
+        totals=_overlay(previous.totals, score.component_id, new_total),
+    ))
+
+
+def get_project_rankings(db: Session, project_id: UUID) -> Optional[ProjectRankings]:
+    """
+    Return ranked results for a project, recomputing only on a cache miss.
+
+    The project and its criteria are always loaded (one query) to read the
+    current revision; components and scores are only loaded on a miss.
+
+    Returns:
+        ProjectRankings with ``project`` attached, or None if the project does not exist
+    """
+    loaded = load_project_with_criteria(db, project_id)
+    if loaded is None:
+        return None
+    project, criteria = loaded
+
+    revision = project.revision or 0
+    cached = _ranking_cache.get(project_id, revision)
+    if cached is None:
+        components, scores = load_components_with_scores(db, project_id)
+        scores_dict = {(s.component_id, s.criterion_id): s for s in scores}
+        results, totals = get_scoring_service().calculate_weighted_scores_with_totals(
+            components, criteria, scores_dict
+        )
+
+        cached = ProjectRankings(
+            revision=revision,
+            components=components,
+            criteria=criteria,
+            scores_dict=scores_dict,
+            results=results,
+            totals=totals,
+            positions={c.id: i for i, c in enumerate(components)},
+        )
+        _ranking_cache.put(project_id, cached)
+
+    # The ORM project is request-scoped, so attach it to a copy rather than the cached entry
+    return replace(cached, project=project)
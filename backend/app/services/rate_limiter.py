@@ -0,0 +1,290 @@
+"""
+Process-wide, priority-aware rate limiting for LLM provider calls.
+
+Each provider (Anthropic, Gemini) gets one ``PriorityRateLimiter`` with two
+token buckets refilled continuously: requests per minute and tokens per
+minute. A call reserves one request plus its estimated tokens before it is
+sent, and reports its actual usage afterwards so the token bucket is
+corrected.
+
+Waiting calls are served strictly by priority lane, then arrival order:
+interactive work (chat, datasheet Q&A) goes ahead of standard work
+(reports, criteria suggestions), which goes ahead of batch work (scoring,
+discovery). A long scoring run therefore queues behind a user's question
+instead of using up the budget it needs.
+
+Both sync callers (worker threads) and async callers share the same limiter.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+AI_RATE_LIMIT_ENABLED = os.getenv("AI_RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+# Per-minute budgets; 0 disables that dimension
+PROVIDER_LIMITS = {
+    "anthropic": (
+        int(os.getenv("ANTHROPIC_REQUESTS_PER_MINUTE", "50")),
+        int(os.getenv("ANTHROPIC_TOKENS_PER_MINUTE", "100000")),
+    ),
+    "gemini": (
+        int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60")),
+        int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "250000")),
+    ),
+}
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_STANDARD = 1
+PRIORITY_BATCH = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_STANDARD: "standard",
+    PRIORITY_BATCH: "batch",
+}
+
+# How often a caller that is not first in line re-checks its position
+QUEUE_POLL_SECONDS = 0.05
+
+# Rough characters per token for estimating prompt size before sending
+CHARS_PER_TOKEN = 4
+
+
+def estimate_prompt_tokens(*parts: Any) -> int:
+    """Rough token count of prompt text (strings, or lists of {"text": ...} blocks)."""
+    chars = 0
+    for part in parts:
+        if isinstance(part, str):
+            chars += len(part)
+        elif isinstance(part, list):
+            chars += sum(len(block.get("text", "")) for block in part if isinstance(block, dict))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+class TokenBucket:
+    """Continuously refilled budget of ``per_minute`` units, allowed to burst up to one minute's worth."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is now)."""
+        missing = min(amount, self.capacity) - self.level
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float):
+        self.level -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class _LaneStats:
+    granted: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class PriorityRateLimiter:
+    """
+    Request and token budgets for one provider, served by priority.
+
+    Use ``acquire``/``acquire_sync`` before a call and ``settle`` after it:
+
+        reserved = await limiter.acquire(PRIORITY_BATCH, estimated_tokens)
+        ... make the call ...
+        limiter.settle(reserved, actual_tokens)
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: int):
+        self.name = name
+        self._requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self._lock = threading.Lock()
+        self._queue: List[Tuple[int, int]] = []  # heap of (priority, arrival)
+        self._wanted: Dict[Tuple[int, int], int] = {}  # tokens requested per queued ticket
+        self._granted: Dict[Tuple[int, int], int] = {}  # tickets granted but not yet picked up
+        self._arrivals = itertools.count()
+        self._lanes = {priority: _LaneStats() for priority in PRIORITY_NAMES}
+
+    @property
+    def enabled(self) -> bool:
+        return AI_RATE_LIMIT_ENABLED and (self._requests is not None or self._tokens is not None)
+
+    def _enqueue(self, priority: int, tokens: int) -> Tuple[int, int]:
+        ticket = (priority, next(self._arrivals))
+        with self._lock:
+            heapq.heappush(self._queue, ticket)
+            self._wanted[ticket] = tokens
+        return ticket
+
+    def _leave(self, ticket: Tuple[int, int]):
+        with self._lock:
+            if ticket in self._wanted:
+                del self._wanted[ticket]
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+            elif ticket in self._granted:
+                # Granted while being cancelled: return the budget
+                tokens = self._granted.pop(ticket)
+                if self._requests is not None:
+                    self._requests.give_back(1)
+                if self._tokens is not None:
+                    self._tokens.give_back(tokens)
+
+    def _try_take(self, ticket: Tuple[int, int]) -> float:
+        """
+        Grant queued calls in order while budget lasts; return 0 if ``ticket``
+        has been granted, else the seconds to wait before checking again.
+        """
+        with self._lock:
+            now = time.monotonic()
+            for bucket in (self._requests, self._tokens):
+                if bucket is not None:
+                    bucket.refill(now)
+            delay = 0.0
+            while self._queue:
+                head = self._queue[0]
+                tokens = self._wanted[head]
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is not None:
+                        delay = max(delay, bucket.delay_for(amount))
+                if delay > 0:
+                    break
+                for bucket, amount in ((self._requests, 1), (self._tokens, tokens)):
+                    if bucket is not None:
+                        bucket.take(amount)
+                heapq.heappop(self._queue)
+                self._granted[head] = self._wanted.pop(head)
+
+            if ticket in self._granted:
+                del self._granted[ticket]
+                return 0.0
+            if self._queue and self._queue[0] == ticket:
+                # Re-check periodically so a higher-priority arrival can go first
+                return min(delay, 1.0)
+            return QUEUE_POLL_SECONDS
+
+    def _record_wait(self, priority: int, waited: float):
+        with self._lock:
+            lane = self._lanes[priority]
+            lane.granted += 1
+            lane.total_wait += waited
+            lane.max_wait = max(lane.max_wait, waited)
+        if waited >= 1.0:
+            logger.info(f"{self.name} {PRIORITY_NAMES[priority]} call waited {waited:.1f}s for rate limit budget")
+
+    async def acquire(self, priority: int = PRIORITY_STANDARD, tokens: int = 0) -> int:
+        """
+        Wait until one request and ``tokens`` tokens are available for ``priority``.
+
+        Returns:
+            The number of tokens reserved; pass it to ``settle``.
+        """
+        if not self.enabled:
+            return 0
+        started = time.monotonic()
+        ticket = self._enqueue(priority, tokens)
+        try:
+            while True:
+                delay = self._try_take(ticket)
+                if not delay:
+                    break
+                await asyncio.sleep(delay)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record_wait(priority, time.monotonic() - started)
+        return tokens
+
+    def acquire_sync(self, priority: int = PRIORITY_STANDARD, tokens: int = 0) -> int:
+        """Blocking variant of ``acquire`` for calls made from worker threads."""
+        if not self.enabled:
+            return 0
+        started = time.monotonic()
+        ticket = self._enqueue(priority, tokens)
+        try:
+            while True:
+                delay = self._try_take(ticket)
+                if not delay:
+                    break
+                time.sleep(delay)
+        except BaseException:
+            self._leave(ticket)
+            raise
+        self._record_wait(priority, time.monotonic() - started)
+        return tokens
+
+    def settle(self, reserved: int, actual: Optional[int]):
+        """Correct the token bucket once a call's actual usage is known."""
+        if not self.enabled or self._tokens is None or actual is None:
+            return
+        with self._lock:
+            self._tokens.refill(time.monotonic())
+            if actual < reserved:
+                self._tokens.give_back(reserved - actual)
+            else:
+                # Usage beyond the estimate is charged; the bucket may go negative
+                self._tokens.level -= actual - reserved
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Queue depth, wait times and remaining budget, for diagnostics."""
+        with self._lock:
+            now = time.monotonic()
+            buckets = {}
+            for label, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    buckets[label] = {"available": round(bucket.level, 1), "per_minute": int(bucket.capacity)}
+            waiting = [priority for priority, _ in self._queue]
+            lanes = {
+                PRIORITY_NAMES[priority]: {
+                    "waiting": waiting.count(priority),
+                    "granted": stats.granted,
+                    "avg_wait_seconds": round(stats.total_wait / stats.granted, 3) if stats.granted else None,
+                    "max_wait_seconds": round(stats.max_wait, 3),
+                }
+                for priority, stats in self._lanes.items()
+            }
+        return {
+            "enabled": self.enabled,
+            "queue_depth": len(waiting),
+            "budgets": buckets,
+            "lanes": lanes,
+        }
+
+
+_rate_limiters: Dict[str, PriorityRateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str) -> PriorityRateLimiter:
+    """Get the process-wide limiter for a provider ("anthropic" or "gemini")."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(provider)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = PROVIDER_LIMITS.get(provider, (0, 0))
+            limiter = PriorityRateLimiter(provider, requests_per_minute, tokens_per_minute)
+            _rate_limiters[provider] = limiter
+        return limiter
+
+
+def rate_limit_snapshot() -> Dict[str, Any]:
+    """Snapshots of every provider's limiter."""
+    return {provider: get_rate_limiter(provider).snapshot() for provider in PROVIDER_LIMITS}
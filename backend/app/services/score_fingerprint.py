@@ -0,0 +1,77 @@
+"""
+Input fingerprints for AI-generated scores.
+
+Each AI score stores a hash of the component and criterion fields that went
+into its prompt. When either definition changes the hash no longer matches,
+so dirty-only re-scoring can send just the missing or stale pairs.
+"""
+
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Tuple
+from uuid import UUID
+
+# Bump when the scoring prompt changes enough that every score should be redone
+SCORING_FINGERPRINT_VERSION = "1"
+
+
+def _digest(*parts: Any) -> str:
+    payload = json.dumps(parts, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def component_fingerprint(component: Any) -> str:
+    """Hash of the component fields used in the scoring prompt."""
+    return _digest(component.manufacturer, component.part_number, component.description or "")
+
+
+def criterion_fingerprint(criterion: Any) -> str:
+    """Hash of the criterion fields used in the scoring prompt."""
+    return _digest(
+        criterion.name,
+        criterion.description or "",
+        criterion.unit or "",
+        criterion.higher_is_better,
+    )
+
+
+class ScoreFingerprints:
+    """Expected input fingerprints for every component x criterion pair of a project."""
+
+    def __init__(self, components: Iterable[Any], criteria: Iterable[Any]):
+        self._components = {c.id: component_fingerprint(c) for c in components}
+        self._criteria = {c.id: criterion_fingerprint(c) for c in criteria}
+
+    def for_pair(self, component_id: UUID, criterion_id: UUID) -> str:
+        """Fingerprint a score for this pair should carry."""
+        return _digest(
+            SCORING_FINGERPRINT_VERSION,
+            self._components[component_id],
+            self._criteria[criterion_id],
+        )
+
+    def dirty_criteria(
+        self,
+        components: List[Any],
+        criteria: List[Any],
+        scores_dict: Dict[Tuple[UUID, UUID], Any]
+    ) -> Dict[UUID, List[Any]]:
+        """
+        Criteria that need (re)scoring, grouped by component id.
+
+        A pair is dirty when it has no score or its stored fingerprint differs
+        from the expected one (including scores written before fingerprints
+        existed). Manually adjusted scores are never considered dirty.
+        Components with nothing to do are left out.
+        """
+        dirty: Dict[UUID, List[Any]] = {}
+        for component in components:
+            for criterion in criteria:
+                score = scores_dict.get((component.id, criterion.id))
+                if score is not None and (
+                    score.manually_adjusted
+                    or score.input_fingerprint == self.for_pair(component.id, criterion.id)
+                ):
+                    continue
+                dirty.setdefault(component.id, []).append(criterion)
+        return dirty
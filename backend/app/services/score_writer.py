@@ -0,0 +1,203 @@
+"""
+Bulk score writes.
+
+Upserts many (component_id, criterion_id) scores at once. On PostgreSQL this is
+a single INSERT ... ON CONFLICT statement against the
+uq_scores_component_criterion index; other databases (SQLite in local dev)
+fall back to one executemany UPDATE plus one executemany INSERT.
+
+AI scoring results name criteria loosely, so ``CriterionResolver`` maps those
+names back to criteria through a precomputed normalized-name index.
+"""
+
+import re
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert, literal_column, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.services.score_fingerprint import ScoreFingerprints
+
+# Columns overwritten when a score for the pair already exists
+UPSERT_COLUMNS = (
+    "score", "rationale", "raw_value", "extraction_confidence", "input_fingerprint", "manually_adjusted"
+)
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_criterion_name(name: str) -> str:
+    """Lowercase and collapse punctuation/whitespace so near-identical names compare equal."""
+    return _NON_ALPHANUMERIC.sub(" ", (name or "").lower()).strip()
+
+
+class CriterionResolver:
+    """
+    Resolve criterion names returned by the AI to project criteria.
+
+    Matching order is exact name, normalized name, then substring containment
+    in either direction (first criterion wins). Substring lookups are memoized
+    per distinct name, so each spelling is only scanned once per scoring run.
+    """
+
+    def __init__(self, criteria: Iterable[Any]):
+        self._criteria = list(criteria)
+        self._by_name = {c.name: c for c in self._criteria}
+        self._by_normalized: Dict[str, Any] = {}
+        for criterion in self._criteria:
+            self._by_normalized.setdefault(normalize_criterion_name(criterion.name), criterion)
+        self._resolved: Dict[str, Optional[Any]] = {}
+
+    def resolve(self, name: str) -> Optional[Any]:
+        """Return the matching criterion, or None if nothing matches."""
+        criterion = self._by_name.get(name)
+        if criterion is not None:
+            return criterion
+
+        normalized = normalize_criterion_name(name)
+        if not normalized:
+            return None
+        if normalized in self._resolved:
+            return self._resolved[normalized]
+
+        criterion = self._by_normalized.get(normalized)
+        if criterion is None:
+            criterion = next(
+                (
+                    crit for key, crit in self._by_normalized.items()
+                    if key and (key in normalized or normalized in key)
+                ),
+                None,
+            )
+        self._resolved[normalized] = criterion
+        return criterion
+
+
+def build_score_rows(
+    component_id: Any,
+    scores_list: List[Dict[str, Any]],
+    resolver: CriterionResolver,
+    fingerprints: Optional[ScoreFingerprints] = None,
+    criterion_ids: Optional[Set[Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Turn one component's AI scoring output into rows for upsert_scores.
+
+    Args:
+        component_id: Component the scores belong to
+        scores_list: Validated score dicts from AIService.score_component_batch
+        resolver: Criterion name resolver for the project
+        fingerprints: When given, each row is stamped with its input fingerprint
+        criterion_ids: When given, scores for any other criterion are dropped
+
+    Scores whose criterion name cannot be resolved are dropped.
+    """
+    rows = []
+    for score_data in scores_list:
+        criterion = resolver.resolve(score_data.get("criterion_name", ""))
+        if criterion is None or (criterion_ids is not None and criterion.id not in criterion_ids):
+            continue
+        rows.append({
+            "component_id": component_id,
+            "criterion_id": criterion.id,
+            "score": score_data["score"],
+            "rationale": score_data.get("rationale", ""),
+            "raw_value": score_data.get("raw_value"),
+            "extraction_confidence": score_data.get("confidence", 0.5),
+            "input_fingerprint": fingerprints.for_pair(component_id, criterion.id) if fingerprints else None,
+        })
+    return rows
+
+
+def _dedupe(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep the last row per (component_id, criterion_id); ON CONFLICT rejects repeats."""
+    by_key = {(r["component_id"], r["criterion_id"]): r for r in rows}
+    return list(by_key.values())
+
+
+def upsert_scores(db: Session, rows: List[Dict[str, Any]], manually_adjusted: bool = False) -> Tuple[int, int]:
+    """
+    Create or update scores in bulk as part of the caller's transaction.
+
+    Args:
+        db: Database session (not committed here)
+        rows: Dicts with component_id, criterion_id, score and optionally
+              rationale, raw_value, extraction_confidence, input_fingerprint
+        manually_adjusted: True for user-entered scores, which dirty-only
+              AI re-scoring must leave alone; AI writes clear the flag
+
+    Returns:
+        (scores_created, scores_updated)
+    """
+    rows = _dedupe(rows)
+    if not rows:
+        return 0, 0
+
+    values = [
+        {
+            "component_id": r["component_id"],
+            "criterion_id": r["criterion_id"],
+            "score": r["score"],
+            "rationale": r.get("rationale"),
+            "raw_value": r.get("raw_value"),
+            "extraction_confidence": r.get("extraction_confidence"),
+            "input_fingerprint": r.get("input_fingerprint"),
+            "manually_adjusted": manually_adjusted,
+        }
+        for r in rows
+    ]
+
+    if db.get_bind().dialect.name == "postgresql":
+        return _upsert_postgres(db, values)
+    return _upsert_executemany(db, values)
+
+
+def _upsert_postgres(db: Session, values: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Single INSERT ... ON CONFLICT DO UPDATE statement."""
+    stmt = pg_insert(models.Score).values([
+        {"id": uuid.uuid4(), **v} for v in values
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.Score.component_id, models.Score.criterion_id],
+        set_={column: stmt.excluded[column] for column in UPSERT_COLUMNS},
+    ).returning(
+        # xmax is 0 only for freshly inserted tuples
+        literal_column("(xmax = 0)").label("inserted")
+    )
+
+    inserted_flags = db.execute(stmt).scalars().all()
+    created = sum(1 for inserted in inserted_flags if inserted)
+    return created, len(inserted_flags) - created
+
+
+def _upsert_executemany(db: Session, values: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Portable fallback: look up existing pairs, then batch UPDATE and batch INSERT."""
+    component_ids = {v["component_id"] for v in values}
+    criterion_ids = {v["criterion_id"] for v in values}
+    existing = {
+        (component_id, criterion_id): score_id
+        for score_id, component_id, criterion_id in db.query(
+            models.Score.id, models.Score.component_id, models.Score.criterion_id
+        ).filter(
+            models.Score.component_id.in_(component_ids),
+            models.Score.criterion_id.in_(criterion_ids),
+        )
+    }
+
+    updates = []
+    inserts = []
+    for v in values:
+        score_id = existing.get((v["component_id"], v["criterion_id"]))
+        if score_id is not None:
+            updates.append({"id": score_id, **{c: v[c] for c in UPSERT_COLUMNS}})
+        else:
+            inserts.append({"id": uuid.uuid4(), **v})
+
+    if updates:
+        db.execute(update(models.Score), updates)
+    if inserts:
+        db.execute(insert(models.Score), inserts)
+    return len(inserts), len(updates)
@@ -0,0 +1,142 @@
+"""
+Token-budget-aware packing of components into multi-component scoring requests.
+
+Scoring one component per call costs a round trip (and a copy of the prompt
+prefix) per component. The packer groups components that are scored against
+the same criteria into requests whose estimated output stays under the
+model's output limit, so a large project needs far fewer calls.
+"""
+
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+from app.services.score_fingerprint import component_fingerprint
+
+AI_SCORING_MAX_COMPONENTS_PER_REQUEST = int(os.getenv("AI_SCORING_MAX_COMPONENTS_PER_REQUEST", "8"))
+# Optional cap on the output of one packed request; 0 uses the model's output limit
+AI_SCORING_PACK_MAX_TOKENS = int(os.getenv("AI_SCORING_PACK_MAX_TOKENS", "0"))
+
+# Rough output cost of one score object (name, score, raw value, short rationale, confidence)
+TOKENS_PER_SCORE = 110
+# Per-component wrapper in the nested response ("3": [ ... ])
+TOKENS_PER_COMPONENT = 16
+# Headroom left in max_tokens for estimation error
+OUTPUT_BUDGET_RATIO = 0.85
+
+
+def estimate_scoring_output_tokens(num_components: int, num_criteria: int) -> int:
+    """Estimated output tokens for scoring ``num_components`` against ``num_criteria``."""
+    return num_components * (TOKENS_PER_COMPONENT + num_criteria * TOKENS_PER_SCORE)
+
+
+def pack_output_limit(model_output_tokens: int) -> int:
+    """Output token limit of one packed request: AI_SCORING_PACK_MAX_TOKENS, never above the model's limit."""
+    if AI_SCORING_PACK_MAX_TOKENS > 0:
+        return min(AI_SCORING_PACK_MAX_TOKENS, model_output_tokens)
+    return model_output_tokens
+
+
+def component_prompt_fields(component: Any) -> Dict[str, Any]:
+    """Component fields sent in scoring prompts."""
+    return {
+        "manufacturer": component.manufacturer,
+        "part_number": component.part_number,
+        "description": component.description or "",
+    }
+
+
+def criteria_prompt_fields(criteria: List[Any]) -> List[Dict[str, Any]]:
+    """Criterion fields sent in scoring prompts."""
+    return [
+        {
+            "name": c.name,
+            "description": c.description or "",
+            "unit": c.unit or "",
+            "higher_is_better": c.higher_is_better,
+        }
+        for c in criteria
+    ]
+
+
+@dataclass
+class ScoringPack:
+    """Components scored together in one request against the same criteria."""
+    criteria: List[Any]
+    components: List[Any] = field(default_factory=list)
+    # Output token limit the pack was built against (0: none)
+    output_limit: int = 0
+
+    @property
+    def estimated_output_tokens(self) -> int:
+        return estimate_scoring_output_tokens(len(self.components), len(self.criteria))
+
+    @property
+    def max_tokens(self) -> int:
+        """max_tokens for the pack's request: its estimated output plus headroom, within ``output_limit``."""
+        wanted = math.ceil(self.estimated_output_tokens / OUTPUT_BUDGET_RATIO)
+        return min(wanted, self.output_limit) if self.output_limit else wanted
+
+
+def _ends_pack(fingerprint: str, capacity: int) -> bool:
+    """True if a pack closes after the component with this fingerprint (about one in ``capacity``)."""
+    return int(fingerprint[:8], 16) % capacity == 0
+
+
+def pack_scoring_work(
+    components: List[Any],
+    pending: Dict[Any, List[Any]],
+    max_tokens: int,
+    max_components: int = AI_SCORING_MAX_COMPONENTS_PER_REQUEST
+) -> List[ScoringPack]:
+    """
+    Group pending component/criteria work into scoring requests.
+
+    Components are only packed together when they share the exact criteria
+    list, which keeps the cached prompt prefix identical. Components are
+    taken in order of their input fingerprint and criteria in id order,
+    whatever order the snapshot query returned them in. Besides closing
+    when another component would push the estimated output past
+    ``max_tokens`` (less headroom) or past ``max_components``, a pack also
+    closes after any component whose fingerprint marks a boundary. Pack
+    boundaries therefore depend on the components themselves, not on their
+    position: adding or removing a component changes only the pack it falls
+    into, and every other pack still builds the identical request and hits
+    the response cache. A component that alone exceeds the budget gets a
+    pack of its own.
+
+    Args:
+        components: Components to pack (in any order)
+        pending: Criteria to score, keyed by component id (components not present are skipped)
+        max_tokens: Output token limit of one request (see ``pack_output_limit``)
+        max_components: Upper bound on components per request (1 disables packing)
+
+    Returns:
+        Packs in fingerprint order of their first component
+    """
+    budget = int(max_tokens * OUTPUT_BUDGET_RATIO)
+    max_components = max(1, max_components)
+    open_packs: Dict[Tuple[Any, ...], ScoringPack] = {}
+    packs: List[ScoringPack] = []
+
+    keyed = sorted(
+        ((component_fingerprint(c), str(c.id), c) for c in components if pending.get(c.id)),
+        key=lambda item: item[:2]
+    )
+    for fingerprint, _, component in keyed:
+        criteria = sorted(pending[component.id], key=lambda c: str(c.id))
+        signature = tuple(c.id for c in criteria)
+        per_component = TOKENS_PER_COMPONENT + len(criteria) * TOKENS_PER_SCORE
+        capacity = max(1, min(max_components, budget // per_component))
+
+        pack = open_packs.get(signature)
+        if pack is None or len(pack.components) >= capacity:
+            pack = ScoringPack(criteria=criteria, output_limit=max_tokens)
+            open_packs[signature] = pack
+            packs.append(pack)
+        pack.components.append(component)
+        if _ends_pack(fingerprint, capacity):
+            del open_packs[signature]
+
+    return packs
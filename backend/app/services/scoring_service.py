@@ -4,7 +4,64 @@ Scoring service for component evaluation and ranking calculations.
 Handles weighted score calculations and result generation.
 """
 
-from typing import List, Dict, Any, Tuple
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import List, Dict, Any, Mapping, Tuple
+
+import numpy as np
+
+
+@dataclass
+class ScoreMatrix:
+    """
+    Dense component x criterion view of a project's scores.
+
+    Attributes:
+        values: float array of shape (components, criteria); 0 where missing
+        mask: bool array of the same shape; True where a score exists
+        weights: float array of criterion weights, in criteria order
+        cells: object array holding the original score objects (None where missing)
+    """
+    values: np.ndarray
+    mask: np.ndarray
+    weights: np.ndarray
+    cells: np.ndarray
+
+    @classmethod
+    def build(
+        cls,
+        components: List[Any],
+        criteria: List[Any],
+        scores_dict: Dict[Tuple[Any, Any], Any]
+    ) -> "ScoreMatrix":
+        """Pack scores into a dense matrix with a missing-value mask."""
+        component_index = {c.id: i for i, c in enumerate(components)}
+        criterion_index = {c.id: j for j, c in enumerate(criteria)}
+        shape = (len(components), len(criteria))
+
+        values = np.zeros(shape, dtype=np.float64)
+        mask = np.zeros(shape, dtype=bool)
+        cells = np.empty(shape, dtype=object)
+
+        # Walk the scores once instead of probing every component x criterion pair
+        for (component_id, criterion_id), score in scores_dict.items():
+            i = component_index.get(component_id)
+            j = criterion_index.get(criterion_id)
+            if i is None or j is None:
+                continue
+            values[i, j] = score.score
+            mask[i, j] = True
+            cells[i, j] = score
+
+        weights = np.fromiter((c.weight for c in criteria), dtype=np.float64, count=len(criteria))
+        return cls(values=values, mask=mask, weights=weights, cells=cells)
+
+    def weighted_totals(self) -> np.ndarray:
+        """Weighted total per component, normalised by the sum of all criterion weights."""
+        total_weight = float(self.weights.sum()) if self.weights.size else 1.0
+        if total_weight <= 0:
+            return np.zeros(self.values.shape[0], dtype=np.float64)
+        return (self.values * self.mask) @ self.weights / total_weight
 
 
 class ScoringService:
@@ -14,7 +71,7 @@ class ScoringService:
     def calculate_weighted_scores(
         components: List[Any],
         criteria: List[Any],
-        scores_dict: Dict[Tuple[str, str], Any]
+        scores_dict: Dict[Tuple[Any, Any], Any]
     ) -> List[Dict[str, Any]]:
         """
         Calculate weighted scores for all components.
@@ -27,42 +84,112 @@ class ScoringService:
         Returns:
             List of result dictionaries with component, scores, and total_score
         """
-        total_weight = sum(c.weight for c in criteria) if criteria else 1
+        results, _ = ScoringService.calculate_weighted_scores_with_totals(components, criteria, scores_dict)
+        return results
+
+    @staticmethod
+    def calculate_weighted_scores_with_totals(
+        components: List[Any],
+        criteria: List[Any],
+        scores_dict: Dict[Tuple[Any, Any], Any]
+    ) -> Tuple[List[Dict[str, Any]], Dict[Any, float]]:
+        """
+        Same as calculate_weighted_scores, also returning unrounded totals.
+
+        Returns:
+            (results, totals) where totals maps component_id to its unrounded weighted total
+        """
+        if not components:
+            return [], {}
+
+        matrix = ScoreMatrix.build(components, criteria, scores_dict)
+        raw_totals = matrix.weighted_totals()
+        # The matrix product may sum in a different order than the old scalar loop;
+        # totals are equal to it up to floating-point rounding
+        totals = [round(float(t), 2) for t in raw_totals]
+
+        # Stable descending sort: ties keep their original component order
+        order = np.argsort(-np.asarray(totals), kind="stable")
         
         results = []
-        for component in components:
-            component_scores = []
-            score_dict = {}
-            
-            for criterion in criteria:
-                key = (str(component.id), str(criterion.id))
-                if key in scores_dict:
-                    score = scores_dict[key]
-                    component_scores.append(score)
-                    score_dict[criterion.id] = score
-            
-            # Calculate weighted total
-            weighted_sum = sum(
-                score_dict[criterion.id].score * criterion.weight
-                for criterion in criteria
-                if criterion.id in score_dict
-            )
-            
-            total_score = weighted_sum / total_weight if total_weight > 0 else 0
-            
+        for rank, i in enumerate(order, start=1):
+            present = np.flatnonzero(matrix.mask[i])
+            component_scores = [matrix.cells[i, j] for j in present]
             results.append({
-                "component": component,
+                "component": components[i],
                 "scores": component_scores,
-                "score_dict": score_dict,
-                "total_score": round(total_score, 2)
+                "score_dict": {criteria[j].id: matrix.cells[i, j] for j in present},
+                "total_score": totals[i],
+                "rank": rank
             })
         
-        # Sort by total score (descending) and add rank
-        results.sort(key=lambda x: x["total_score"], reverse=True)
-        for rank, result in enumerate(results, start=1):
-            result["rank"] = rank
+        return results, {c.id: float(t) for c, t in zip(components, raw_totals)}
         
-        return results
+    @staticmethod
+    def apply_score_delta(
+        results: List[Dict[str, Any]],
+        totals: Mapping[Any, float],
+        positions: Dict[Any, int],
+        criteria: List[Any],
+        score: Any
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Re-rank after a single score changes without recomputing every total.
+
+        Only the affected component's total moves, by
+        weight * (new - old) / total_weight, and only its entry is re-sorted.
+        The inputs are left untouched so cached copies stay consistent; the
+        new list shares every unchanged entry with ``results``.
+
+        Args:
+            results: Ranked results from calculate_weighted_scores_with_totals
+            totals: Unrounded totals keyed by component_id
+            positions: Original component order (component_id -> index), used to break ties
+            criteria: List of criterion objects
+            score: The new score object (component_id, criterion_id, score)
+
+        Returns:
+            (results, new unrounded total of the score's component)
+        """
+        criterion = next((c for c in criteria if c.id == score.criterion_id), None)
+        if criterion is None or score.component_id not in totals:
+            raise KeyError("Score does not belong to the ranked project")
+
+        def sort_key(result: Dict[str, Any]) -> Tuple[float, int]:
+            return (-result["total_score"], positions[result["component"].id])
+
+        old_total = totals[score.component_id]
+        current_key = (-round(old_total, 2), positions[score.component_id])
+        index = bisect_left(results, current_key, key=sort_key)
+        old_result = results[index]
+
+        old_score = old_result["score_dict"].get(criterion.id)
+        old_value = old_score.score if old_score is not None else 0
+        total_weight = sum(c.weight for c in criteria) if criteria else 1
+        new_total = old_total
+        if total_weight > 0:
+            new_total += criterion.weight * (score.score - old_value) / total_weight
+
+        score_dict = {**old_result["score_dict"], criterion.id: score}
+        new_result = {
+            **old_result,
+            "scores": [score_dict[c.id] for c in criteria if c.id in score_dict],
+            "score_dict": score_dict,
+            "total_score": round(new_total, 2),
+        }
+
+        new_results = list(results)
+        del new_results[index]
+        new_index = bisect_left(new_results, sort_key(new_result), key=sort_key)
+        new_results.insert(new_index, new_result)
+
+        # Only entries between the old and new slot change rank
+        low, high = min(index, new_index), max(index, new_index)
+        for i in range(low, high + 1):
+            if new_results[i]["rank"] != i + 1:
+                new_results[i] = {**new_results[i], "rank": i + 1}
+
+        return new_results, new_total
 
 
 # Singleton instance
@@ -72,4 +199,3 @@ _scoring_service = ScoringService()
 def get_scoring_service() -> ScoringService:
     """Get the scoring service singleton."""
     return _scoring_service
-
@@ -4,7 +4,15 @@ AI response handling utilities.
 Provides helper functions for extracting and processing responses from AI APIs.
 """
 
-from typing import Any
+from typing import Any, Dict, Optional
+
+# Usage counters reported by the Messages API, in the order they are summed
+USAGE_FIELDS = (
+    "input_tokens",
+    "output_tokens",
+    "cache_creation_input_tokens",
+    "cache_read_input_tokens",
+)
 
 
 def extract_response_text(message: Any) -> str:
@@ -28,6 +36,45 @@ def extract_response_text(message: Any) -> str:
     return response_text.strip()
 
 
+def accumulate_usage(totals: Optional[Dict[str, int]], message: Any) -> None:
+    """
+    Add a message's token usage to a running totals dict.
+    
+    Also counts API calls, and responses served from the local response
+    cache (message is None), so callers can see how much of a prompt
+    prefix was reused across a run.
+    
+    Args:
+        totals: Dict to update in place; ignored if None
+        message: Anthropic API message response, or None for a local cache hit
+    """
+    if totals is None:
+        return
+    if message is None:
+        totals["response_cache_hits"] = totals.get("response_cache_hits", 0) + 1
+        return
+    totals["api_calls"] = totals.get("api_calls", 0) + 1
+    usage = getattr(message, "usage", None)
+    for field in USAGE_FIELDS:
+        totals[field] = totals.get(field, 0) + (getattr(usage, field, None) or 0)
+
+
+def rate_limited_tokens(message: Any) -> Optional[int]:
+    """
+    Tokens a message counts against the provider's token rate limit.
+    
+    Cache reads are excluded; they do not count toward input token limits.
+    Returns None when the message carries no usage.
+    """
+    usage = getattr(message, "usage", None)
+    if usage is None:
+        return None
+    return sum(
+        getattr(usage, field, None) or 0
+        for field in ("input_tokens", "output_tokens", "cache_creation_input_tokens")
+    )
+
+
 def clean_json_response(text: str) -> str:
     """
     Remove markdown code block formatting from JSON response.
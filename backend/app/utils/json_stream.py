@@ -0,0 +1,143 @@
+"""
+Incremental, tolerant parsing of JSON arrays in streamed AI responses.
+
+Scoring responses are a JSON array of score objects, or (for packed requests)
+an object mapping reference numbers to such arrays. ``JsonElementStream``
+accepts the response text in arbitrary chunks and returns each array element
+as soon as its closing bracket arrives, so:
+
+- elements received before a stream fails or is cut off are kept;
+- a malformed element is skipped without losing its neighbours;
+- a response truncated at max_tokens still yields every complete element.
+
+Text before the first ``[``/``{`` (prose, a ```json fence) and after the
+top-level value is ignored.
+"""
+
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# Trailing commas are the most common syntax slip in model-written JSON
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class JsonElementStream:
+    """
+    Collects complete elements of the response's element arrays.
+
+    The element arrays are the top-level array, or every array that is a
+    direct value of a top-level object. Each element is stored as
+    ``(key, value)`` where ``key`` is the owning object key (None for a
+    top-level array). Only object and array elements are collected.
+    """
+
+    def __init__(self):
+        self.elements: List[Tuple[Optional[str], Any]] = []
+        self.malformed = 0
+        self.finished = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_chars: Optional[List[str]] = None
+        self._last_string: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._array_key: Optional[str] = None
+        self._element: Optional[List[str]] = None
+
+    def feed(self, text: str) -> List[Tuple[Optional[str], Any]]:
+        """Consume the next chunk of response text; returns the elements it completed."""
+        completed: List[Tuple[Optional[str], Any]] = []
+        for ch in text:
+            if self.finished:
+                break
+            if self._element is not None:
+                self._element.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._string_chars is not None:
+                        self._last_string = "".join(self._string_chars)
+                        self._string_chars = None
+                    continue
+                if self._string_chars is not None:
+                    self._string_chars.append(ch)
+                continue
+
+            if ch == '"':
+                if not self._stack:
+                    continue
+                self._in_string = True
+                # Remember strings directly inside a top-level object; they may be keys
+                self._string_chars = [] if self._stack == ["{"] else None
+            elif ch in "[{":
+                self._open(ch)
+            elif ch in "]}":
+                element = self._close()
+                if element is not None:
+                    completed.append(element)
+        self.elements.extend(completed)
+        return completed
+
+    def adopt(self, other: "JsonElementStream"):
+        """Take over the elements parsed by another stream (e.g. the winner of a hedged call)."""
+        self.elements = list(other.elements)
+        self.malformed = other.malformed
+        self.finished = other.finished
+
+    def _open(self, ch: str):
+        depth = len(self._stack)
+        if self._array_depth is not None and depth == self._array_depth and self._element is None:
+            self._element = [ch]
+        self._stack.append(ch)
+        if ch == "[" and self._array_depth is None and (depth == 0 or self._stack[:-1] == ["{"]):
+            self._array_depth = depth + 1
+            self._array_key = self._last_string if depth == 1 else None
+
+    def _close(self) -> Optional[Tuple[Optional[str], Any]]:
+        if not self._stack:
+            return None
+        self._stack.pop()
+        depth = len(self._stack)
+        if depth == 0:
+            self.finished = True
+        if self._array_depth is None:
+            return None
+        if depth < self._array_depth:
+            # The element array itself closed
+            self._array_depth = None
+            self._array_key = None
+            self._element = None
+            return None
+        if depth == self._array_depth and self._element is not None:
+            raw = "".join(self._element)
+            self._element = None
+            value = _loads_tolerant(raw)
+            if value is None:
+                self.malformed += 1
+                return None
+            return (self._array_key, value)
+        return None
+
+
+def _loads_tolerant(raw: str) -> Optional[Any]:
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(_TRAILING_COMMA.sub(r"\1", raw))
+    except json.JSONDecodeError:
+        return None
+
+
+def recover_json_elements(text: str) -> List[Tuple[Optional[str], Any]]:
+    """Every complete, well-formed element of the element arrays in ``text``."""
+    stream = JsonElementStream()
+    stream.feed(text)
+    return stream.elements
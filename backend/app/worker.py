@@ -0,0 +1,114 @@
+"""
+Background job worker.
+
+With the Postgres job backend each web process runs this loop itself (see
+JOB_EMBEDDED_WORKER). Extra workers can be started separately:
+
+    python -m app.worker
+
+Claims queued jobs with SELECT ... FOR UPDATE SKIP LOCKED and runs up to
+JOB_WORKER_CONCURRENCY of them at once. Any number of workers can share
+the jobs table.
+"""
+
+import asyncio
+import logging
+from typing import Optional
+from uuid import UUID
+
+from app.database import SessionLocal
+from app.services.ai_service import close_ai_service
+from app.services.jobs import (
+    JOB_EMBEDDED_WORKER,
+    JOB_POLL_INTERVAL_SECONDS,
+    JOB_WORKER_CONCURRENCY,
+    PostgresJobBackend,
+    execute_job,
+    get_job_backend,
+    load_job_handlers,
+    worker_identity,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(concurrency: int = JOB_WORKER_CONCURRENCY, backend: Optional[PostgresJobBackend] = None):
+    """Claim and execute jobs until cancelled."""
+    load_job_handlers()
+    backend = backend or PostgresJobBackend()
+    worker_id = worker_identity()
+    running: set = set()
+    logger.info(f"Job worker {worker_id} started (concurrency {concurrency})")
+
+    try:
+        while True:
+            if len(running) >= concurrency:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            # The claim query runs in a thread so an embedded worker does not block the web event loop
+            job_id = await asyncio.to_thread(_claim_next, backend, worker_id)
+            if job_id is None:
+                await backend.wait_for_work(JOB_POLL_INTERVAL_SECONDS)
+                continue
+
+            task = asyncio.create_task(execute_job(job_id))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+
+def _claim_next(backend: PostgresJobBackend, worker_id: str) -> Optional[UUID]:
+    db = SessionLocal()
+    try:
+        job = backend.claim(db, worker_id)
+        return job.id if job else None
+    finally:
+        db.close()
+
+
+_embedded_worker: Optional[asyncio.Task] = None
+
+
+def start_embedded_worker():
+    """
+    Start a worker loop in the web process (Postgres backend only).
+
+    Call from the web app's startup. Jobs interrupted by a restart are
+    reclaimed once their heartbeat goes stale.
+    """
+    global _embedded_worker
+    backend = get_job_backend()
+    if not JOB_EMBEDDED_WORKER or not isinstance(backend, PostgresJobBackend) or _embedded_worker is not None:
+        return
+    _embedded_worker = asyncio.create_task(run_worker(backend=backend))
+
+
+async def stop_embedded_worker():
+    """Cancel the embedded worker loop and its running jobs."""
+    global _embedded_worker
+    task, _embedded_worker = _embedded_worker, None
+    if task is not None:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+
+async def _run_standalone():
+    try:
+        await run_worker()
+    finally:
+        await close_ai_service()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(_run_standalone())
+    except KeyboardInterrupt:
+        logger.info("Job worker stopped")
+
+
+if __name__ == "__main__":
+    main()
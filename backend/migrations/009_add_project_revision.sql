@@ -0,0 +1,4 @@
+-- Add revision counter to projects for the ranking cache
+-- Bumped whenever components, criteria or scores change so cached rankings can be validated
+
+ALTER TABLE projects ADD COLUMN IF NOT EXISTS revision INTEGER NOT NULL DEFAULT 0;
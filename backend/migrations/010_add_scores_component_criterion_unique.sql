@@ -0,0 +1,13 @@
+-- Enforce one score per (component, criterion) so scores can be bulk upserted
+-- with INSERT ... ON CONFLICT (component_id, criterion_id)
+
+-- Step 1: Remove duplicate scores, keeping one row per pair
+DELETE FROM scores a
+USING scores b
+WHERE a.component_id = b.component_id
+  AND a.criterion_id = b.criterion_id
+  AND a.ctid < b.ctid;
+
+-- Step 2: Add the unique index used as the conflict target
+CREATE UNIQUE INDEX IF NOT EXISTS uq_scores_component_criterion
+    ON scores (component_id, criterion_id);
@@ -0,0 +1,4 @@
+-- Fingerprint of the component and criterion definitions a score was generated from
+-- Lets dirty-only re-scoring skip pairs whose inputs have not changed
+
+ALTER TABLE scores ADD COLUMN IF NOT EXISTS input_fingerprint VARCHAR(64);
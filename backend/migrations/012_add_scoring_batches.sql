@@ -0,0 +1,18 @@
+-- Offline AI scoring runs submitted through the Anthropic Message Batches API
+-- Persists the provider batch id so results can be applied after the batch ends
+
+CREATE TABLE IF NOT EXISTS scoring_batches (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    project_id UUID NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+    provider_batch_id VARCHAR NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'submitted',
+    request_map TEXT NOT NULL,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    scores_created INTEGER,
+    scores_updated INTEGER,
+    errors TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    completed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_scoring_batches_project_id ON scoring_batches (project_id);
@@ -0,0 +1,21 @@
+-- Durable background jobs for long-running AI and rendering work
+-- Workers claim queued jobs with SELECT ... FOR UPDATE SKIP LOCKED
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    kind VARCHAR NOT NULL,
+    status VARCHAR NOT NULL DEFAULT 'queued',
+    project_id UUID REFERENCES projects(id) ON DELETE CASCADE,
+    payload TEXT,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    locked_by VARCHAR,
+    heartbeat_at TIMESTAMP WITH TIME ZONE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_jobs_status_created_at ON jobs (status, created_at);
@@ -0,0 +1,4 @@
+-- BM25 inverted index over each datasheet's page chunks (JSON), built when the PDF is parsed
+-- Datasheet Q&A looks up question terms in it instead of scanning every page
+
+ALTER TABLE datasheet_documents ADD COLUMN IF NOT EXISTS search_index TEXT;
@@ -0,0 +1,4 @@
+-- Asynchronous datasheet ingestion: uploads return while a background job parses the PDF
+-- pages_parsed reports progress while a document is pending
+
+ALTER TABLE datasheet_documents ADD COLUMN IF NOT EXISTS pages_parsed INTEGER;
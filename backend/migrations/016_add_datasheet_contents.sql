@@ -0,0 +1,30 @@
+-- Content-addressed datasheets: identical PDFs are stored and parsed once
+-- datasheet_contents is keyed by the SHA-256 of the file; documents reference it
+
+CREATE TABLE IF NOT EXISTS datasheet_contents (
+    sha256 VARCHAR(64) PRIMARY KEY,
+    file_path VARCHAR NOT NULL,
+    size_bytes INTEGER,
+    num_pages INTEGER,
+    parse_status VARCHAR NOT NULL DEFAULT 'pending',
+    parse_error TEXT,
+    parse_job_id UUID,
+    search_index TEXT,
+    suggested_questions TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    parsed_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE TABLE IF NOT EXISTS datasheet_content_pages (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    content_sha256 VARCHAR(64) NOT NULL REFERENCES datasheet_contents(sha256) ON DELETE CASCADE,
+    page_number INTEGER NOT NULL,
+    raw_text TEXT,
+    section_title VARCHAR
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_datasheet_content_pages_page
+    ON datasheet_content_pages (content_sha256, page_number);
+
+ALTER TABLE datasheet_documents ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64) REFERENCES datasheet_contents(sha256);
+CREATE INDEX IF NOT EXISTS ix_datasheet_documents_content_sha256 ON datasheet_documents (content_sha256);
@@ -0,0 +1,4 @@
+-- Deferred jobs: a queued job is not claimed before run_after
+-- Polling jobs re-queue themselves with a delay instead of sleeping in a worker slot
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS run_after TIMESTAMP WITH TIME ZONE;